@@ -1,86 +1,184 @@
 import json
+import re
 import time
+from itertools import zip_longest
 from pathlib import Path
-from typing import Union
+from typing import Dict, List, Optional, Tuple, Union
 
 from dflow import (
+    InputArtifact,
+    InputParameter,
+    Inputs,
+    OutputArtifact,
+    Outputs,
     Step,
+    Steps,
     Workflow,
     argo_range,
-    download_artifact,
-    upload_artifact,
+    if_expression,
 )
 from dflow.plugins.dispatcher import DispatcherExecutor
 from dflow.python import PythonOPTemplate, Slices
 
+from glass.flow.dry_run import count_atoms, estimate_cost, validate_pdata
+from glass.flow.sizing import step_profiles
+from glass.flow.transfer import download_files, upload_files
+from glass.flow.upload import UploadRegistry
+from glass.io.input import partition_processes
 from glass.io.input_op import MDInputPrepOP
-from glass.property.doas_op import GraspSnapShotOP, PlotDoas
+from glass.property.aggregate_op import AggregateReplicasOP
+from glass.property.doas_op import (
+    DoasConvergeOP,
+    DoasRerunPrepOP,
+    GraspSnapShotOP,
+    PlotDoas,
+)
+from glass.property.insitu_op import InsituAnalysisOP
+from glass.property.local_structure_op import LocalStructureOP
+from glass.property.msd_op import MsdOP
+from glass.property.rdf_op import RdfOP
+from glass.property.rings_op import RingsOP
+from glass.property.sq_op import SqOP
 from glass.simulation.dp_run_op import DpRunOP
 from glass.utils import Mdata, config_argo, dispatcher_executor
 
 
-def amorphous_flow(
-    executor_run: DispatcherExecutor = None,
-    dflow_labels = None,
-    **pdata
-) -> Workflow:
+def get_process_params(processes: list, idx: int) -> dict:
+    """get the params of the process to analyse
 
-    wf = Workflow(
-        name='amorphous',
-        labels=dflow_labels,
-    )
+    Args:
+        processes (list): processes of the md run
+        idx (int): `_idx` of the process
 
-    if struc_file := pdata.get("structure"):
-        struc = upload_artifact(struc_file)
+    Raises:
+        ValueError: no md process with `_idx`
 
-    if in_lmp_file := pdata.get("in_lmp"):
-        in_lmp = upload_artifact(in_lmp_file)
-    else:
-        in_lmp = None
+    Returns:
+        dict: params of the process
+    """
+    for mini_dict in processes:
+        if mini_dict["_idx"] == idx and "params" in mini_dict:
+            return mini_dict["params"]
+    raise ValueError(f"No md process with _idx {idx} to analyse")
 
-    if model_file := pdata.get("model"):
-        model = upload_artifact(model_file)
+def get_traj_name(processes: list, idx: int) -> str:
+    """get the traj_file_name of the process to analyse
 
-    prep_MD_input = Step(
-        name="prep-md-input",
-        template=PythonOPTemplate(
-            MDInputPrepOP,
-            image="registry.dp.tech/dptech/prod-13386/pylt-analysis:v2"
-        ),
-        parameters={
-            "processes": pdata["processes"],
-            "type_map": pdata["type_map"],
-            "mass_map": pdata["mass_map"]
-        },
-        artifacts={
-            "in_lmp": in_lmp,
-            "model": model,
-            "pmg_struc": struc
-        },
-        key="prep-md-input"
+    Args:
+        processes (list): processes of the md run
+        idx (int): `_idx` of the process
+
+    Returns:
+        str: traj_file_name
+    """
+    return get_process_params(processes, idx)["traj_file_name"]
+
+def has_insitu(processes: list) -> bool:
+    """whether any md process runs in-situ analyses"""
+    return any(
+        key in mini_dict.get("params", {})
+        for mini_dict in processes
+        for key in ["rdf", "pe_atom", "coord", "msd"]
     )
 
-    wf.add(prep_MD_input)
+def step_resource(
+    resources: Optional[Dict[str, dict]],
+    name: str,
+    executor_run: DispatcherExecutor = None
+) -> Tuple[DispatcherExecutor, dict]:
+    """executor of a dispatched step and the parameters of `DpRunOP`
+    launching it, from its resources or the default executor
 
-    run_md = Step(
-        name="run-md",
-        template=PythonOPTemplate(
-            DpRunOP,
-            image="registry.dp.tech/dptech/deepmd-kit:2.2.4-cuda11.6"
-        ),
-        artifacts={
-            "work_dir": prep_MD_input.outputs.artifacts["run_path"]
-        },
-        executor=executor_run,
-        key='run-dp'
+    Args:
+        resources (Optional[Dict[str, dict]]): `executor` and `launch`
+            settings by step, see `step_executors`
+        name (str): name of the step without suffix, like "run-md"
+        executor_run (DispatcherExecutor, optional): default executor.
+            Defaults to None.
+
+    Returns:
+        Tuple[DispatcherExecutor, dict]: executor and `n_procs`, `n_threads`
+    """
+    resource = (resources or {}).get(name, {})
+    launch = resource.get("launch", {})
+    return resource.get("executor", executor_run), {
+        "n_procs": launch.get("n_procs", 1),
+        "n_threads": launch.get("n_threads", 0)
+    }
+
+def step_executors(mdata: dict, pdata: dict) -> Dict[str, dict]:
+    """executors of the steps on their own machines, with their launch
+    settings, sized from the atoms and steps of the flow if
+    `mdata["auto_sizing"]` is set, see `glass.flow.sizing.step_profiles`
+
+    Args:
+        mdata (dict): machine parameters
+        pdata (dict): parameters of the flow
+
+    Returns:
+        Dict[str, dict]: `executor` and `launch` by step
+    """
+    if not mdata.get("executors") and mdata.get("auto_sizing") is None:
+        return {}
+    estimate = None
+    if mdata.get("auto_sizing") is not None:
+        estimate = estimate_cost(pdata, count_atoms(pdata), mdata)
+    profiles = step_profiles(
+        mdata, estimate, len(pdata.get("partitions") or [None])
     )
+    return {
+        name: {
+            "executor": dispatcher_executor(profile["input_data"], **mdata),
+            "launch": profile["launch"]
+        }
+        for name, profile in profiles.items()
+    }
+
+def doas_adaptive_loop(
+    executor_run: DispatcherExecutor = None,
+    launch: Optional[dict] = None
+) -> Steps:
+    """recursive steps minimizing snapshots in waves, until the distribution
+    of atomic energies converges or the trajectory is exhausted
 
-    wf.add(run_md)
+    Args:
+        executor_run (DispatcherExecutor, optional): executor of the
+            minimizations. Defaults to None.
+        launch (Optional[dict], optional): `n_procs` and `n_threads` of
+            the minimizations. Defaults to None.
 
-    doas_idx = pdata["properties"]["doas"]["_idx"]
-    for mini_dict in pdata["processes"]:
-        if mini_dict["_idx"] == doas_idx:
-            traj_name = mini_dict["params"]["traj_file_name"]
+    Returns:
+        Steps: the loop template
+    """
+    loop = Steps(
+        name="doas-loop",
+        inputs=Inputs(
+            parameters={
+                "wave": InputParameter(value=0),
+                "wave_size": InputParameter(),
+                "traj_file_name": InputParameter(),
+                "energy_n_frame": InputParameter(),
+                "type_map": InputParameter(),
+                "mass_map": InputParameter(),
+                "target_element": InputParameter(),
+                "bins": InputParameter(),
+                "metric": InputParameter(value="ks"),
+                "tol": InputParameter(),
+                "suffix": InputParameter(value="")
+            },
+            artifacts={
+                "md_run": InputArtifact(),
+                "model": InputArtifact(),
+                "energies": InputArtifact(optional=True)
+            }
+        ),
+        outputs=Outputs(
+            artifacts={
+                "doas_fig": OutputArtifact(),
+                "energies": OutputArtifact()
+            }
+        )
+    )
 
     grasp_snap = Step(
         name="grasp-snapshot",
@@ -89,19 +187,21 @@ def amorphous_flow(
             image="registry.dp.tech/dptech/prod-13386/pylt-analysis:v2"
         ),
         artifacts={
-            "md_run": run_md.outputs.artifacts["dp_dir"],
-            "model": model
+            "md_run": loop.inputs.artifacts["md_run"],
+            "model": loop.inputs.artifacts["model"]
         },
         parameters={
-            "traj_file_name": traj_name,
-            "energy_n_frame": pdata["properties"]["doas"]["every_n_frame"],
-            "type_map": pdata["type_map"],
-            "mass_map": pdata["mass_map"]
+            "traj_file_name": loop.inputs.parameters["traj_file_name"],
+            "energy_n_frame": loop.inputs.parameters["energy_n_frame"],
+            "type_map": loop.inputs.parameters["type_map"],
+            "mass_map": loop.inputs.parameters["mass_map"],
+            "wave": loop.inputs.parameters["wave"],
+            "wave_size": loop.inputs.parameters["wave_size"]
         },
-        key='grasp-snap'
+        key="grasp-snap{{inputs.parameters.suffix}}-{{inputs.parameters.wave}}"
     )
 
-    wf.add(grasp_snap)
+    loop.add(grasp_snap)
 
     minimize_snap = Step(
         name="mini-snapshot",
@@ -117,31 +217,591 @@ def amorphous_flow(
         artifacts={
             "work_dir": grasp_snap.outputs.artifacts["minimize_dirs"]
         },
+        parameters=launch or {},
         with_param=argo_range(grasp_snap.outputs.parameters["num_minimize"]),
-        key="mini-snap-{{item}}",
+        key="mini-snap{{inputs.parameters.suffix}}"
+            "-{{inputs.parameters.wave}}-{{item}}",
         executor=executor_run
     )
 
-    wf.add(minimize_snap)
+    loop.add(minimize_snap)
 
-    plot_doas = Step(
-        name="plot-doas",
+    check_doas = Step(
+        name="check-doas",
         template=PythonOPTemplate(
-            PlotDoas,
+            DoasConvergeOP,
             image="registry.dp.tech/dptech/prod-13386/pylt-analysis:v2"
         ),
         artifacts={
-            "minimize_dirs": minimize_snap.outputs.artifacts["dp_dir"]
+            "minimize_dirs": minimize_snap.outputs.artifacts["dp_dir"],
+            "energies": loop.inputs.artifacts["energies"]
         },
         parameters={
-            "target_element": pdata["properties"]["doas"]["target_element"],
-            "bins": pdata["properties"]["doas"]["bins"],
-            "type_map": pdata["type_map"]
+            "target_element": loop.inputs.parameters["target_element"],
+            "bins": loop.inputs.parameters["bins"],
+            "type_map": loop.inputs.parameters["type_map"],
+            "metric": loop.inputs.parameters["metric"],
+            "tol": loop.inputs.parameters["tol"],
+            "wave": loop.inputs.parameters["wave"],
+            "n_waves": grasp_snap.outputs.parameters["n_waves"]
         },
-        key="plot-doas"
+        key="check-doas{{inputs.parameters.suffix}}-{{inputs.parameters.wave}}"
     )
 
-    wf.add(plot_doas)
+    loop.add(check_doas)
+
+    next_wave = Step(
+        name="doas-loop",
+        template=loop,
+        artifacts={
+            "md_run": loop.inputs.artifacts["md_run"],
+            "model": loop.inputs.artifacts["model"],
+            "energies": check_doas.outputs.artifacts["energies"]
+        },
+        parameters={
+            "wave": check_doas.outputs.parameters["next_wave"],
+            "wave_size": loop.inputs.parameters["wave_size"],
+            "traj_file_name": loop.inputs.parameters["traj_file_name"],
+            "energy_n_frame": loop.inputs.parameters["energy_n_frame"],
+            "type_map": loop.inputs.parameters["type_map"],
+            "mass_map": loop.inputs.parameters["mass_map"],
+            "target_element": loop.inputs.parameters["target_element"],
+            "bins": loop.inputs.parameters["bins"],
+            "metric": loop.inputs.parameters["metric"],
+            "tol": loop.inputs.parameters["tol"],
+            "suffix": loop.inputs.parameters["suffix"]
+        },
+        when="%s == false" % check_doas.outputs.parameters["converged"]
+    )
+
+    loop.add(next_wave)
+
+    for name in ["doas_fig", "energies"]:
+        loop.outputs.artifacts[name].from_expression = if_expression(
+            _if=check_doas.outputs.parameters["converged"],
+            _then=check_doas.outputs.artifacts[name],
+            _else=next_wave.outputs.artifacts[name]
+        )
+
+    return loop
+
+def replica_seeds(replicas: Union[int, dict]) -> List[int]:
+    """velocity seeds of independent replicas
+
+    Args:
+        replicas (Union[int, dict]): number of replicas, or like
+            {"n_replicas": 4, "seeds": [1, 2, 3, 4]} or
+            {"n_replicas": 4, "seed": 42} for consecutive seeds
+
+    Returns:
+        List[int]: one seed per replica
+    """
+    if isinstance(replicas, int):
+        replicas = {"n_replicas": replicas}
+    if seeds := replicas.get("seeds"):
+        return list(seeds)
+    return [
+        replicas.get("seed", 42) + i for i in range(replicas["n_replicas"])
+    ]
+
+def replica_levels(
+    pdata: dict,
+    executor_run: DispatcherExecutor,
+    model,
+    struc,
+    in_lmp,
+    doas_loop: Optional[Steps] = None,
+    replica: Optional[int] = None,
+    seed: Optional[int] = None,
+    resources: Optional[Dict[str, dict]] = None
+) -> List[list]:
+    """steps of the md run of one replica and of its analyses, as levels
+    of parallel steps to be added to the workflow one after another
+
+    Args:
+        pdata (dict): parameters of the flow
+        executor_run (DispatcherExecutor): executor of lammps runs
+        model: uploaded model
+        struc: uploaded structure, or None
+        in_lmp: uploaded in.lmp, or None
+        doas_loop (Optional[Steps], optional): output of
+            `doas_adaptive_loop`, shared by replicas. Defaults to None.
+        replica (Optional[int], optional): index of the replica, appended
+            to the names of steps. Defaults to None, for a single run.
+        seed (Optional[int], optional): velocity seed of the first md
+            process. Defaults to None.
+        resources (Optional[Dict[str, dict]], optional): output of
+            `step_executors`, steps without resources run on
+            `executor_run`. Defaults to None.
+
+    Returns:
+        List[list]: levels of steps
+    """
+    suffix = "" if replica is None else f"-r{replica}"
+    processes = pdata["processes"]
+    if seed is not None:
+        processes = partition_processes(processes, {"seed": seed})
+    levels = []
+
+    prep_MD_input = Step(
+        name="prep-md-input" + suffix,
+        template=PythonOPTemplate(
+            MDInputPrepOP,
+            image="registry.dp.tech/dptech/prod-13386/pylt-analysis:v2"
+        ),
+        parameters={
+            "processes": processes,
+            "packing": pdata.get("packing"),
+            "partitions": pdata.get("partitions"),
+            "type_map": pdata["type_map"],
+            "mass_map": pdata["mass_map"]
+        },
+        artifacts={
+            "in_lmp": in_lmp,
+            "model": model,
+            "pmg_struc": struc
+        },
+        key="prep-md-input" + suffix
+    )
+
+    levels.append([prep_MD_input])
+
+    executor_md, launch = step_resource(resources, "run-md", executor_run)
+    n_partitions = len(pdata.get("partitions") or [None])
+    procs_per_partition = pdata.get("procs_per_partition", 1)
+    if n_partitions > 1 and launch["n_procs"] > 1:
+        # the sized processes are shared by the partitions
+        procs_per_partition = launch["n_procs"] // n_partitions
+    run_md = Step(
+        name="run-md" + suffix,
+        template=PythonOPTemplate(
+            DpRunOP,
+            image="registry.dp.tech/dptech/deepmd-kit:2.2.4-cuda11.6"
+        ),
+        artifacts={
+            "work_dir": prep_MD_input.outputs.artifacts["run_path"]
+        },
+        parameters={
+            "partitions": n_partitions,
+            "procs_per_partition": procs_per_partition,
+            **launch
+        },
+        executor=executor_md,
+        key="run-dp" + suffix
+    )
+
+    levels.append([run_md])
+
+    md_dir = run_md.outputs.artifacts["dp_dir"]
+
+    analyses = []
+    if has_insitu(pdata["processes"]):
+        insitu = Step(
+            name="insitu-analysis" + suffix,
+            template=PythonOPTemplate(
+                InsituAnalysisOP,
+                image="registry.dp.tech/dptech/prod-13386/pylt-analysis:v2"
+            ),
+            artifacts={
+                "md_run": md_dir
+            },
+            parameters={
+                "processes": pdata["processes"],
+                "type_map": pdata["type_map"]
+            },
+            key="insitu-analysis" + suffix
+        )
+        analyses.append(insitu)
+
+    properties = pdata.get("properties", {})
+    if rdf := properties.get("rdf"):
+        rdf_step = Step(
+            name="rdf" + suffix,
+            template=PythonOPTemplate(
+                RdfOP,
+                image="registry.dp.tech/dptech/prod-13386/pylt-analysis:v2"
+            ),
+            artifacts={
+                "md_run": md_dir
+            },
+            parameters={
+                "traj_file_name": get_traj_name(
+                    pdata["processes"], rdf["_idx"]
+                ),
+                "type_map": pdata["type_map"],
+                **{k: v for k, v in rdf.items() if k != "_idx"}
+            },
+            key="rdf" + suffix
+        )
+        analyses.append(rdf_step)
+
+    if sq := properties.get("sq"):
+        sq_step = Step(
+            name="sq" + suffix,
+            template=PythonOPTemplate(
+                SqOP,
+                image="registry.dp.tech/dptech/prod-13386/pylt-analysis:v2"
+            ),
+            artifacts={
+                "md_run": md_dir
+            },
+            parameters={
+                "traj_file_name": get_traj_name(
+                    pdata["processes"], sq["_idx"]
+                ),
+                "type_map": pdata["type_map"],
+                **{k: v for k, v in sq.items() if k != "_idx"}
+            },
+            key="sq" + suffix
+        )
+        analyses.append(sq_step)
+
+    if msd := properties.get("msd"):
+        msd_params = get_process_params(pdata["processes"], msd["_idx"])
+        msd_step = Step(
+            name="msd" + suffix,
+            template=PythonOPTemplate(
+                MsdOP,
+                image="registry.dp.tech/dptech/prod-13386/pylt-analysis:v2"
+            ),
+            artifacts={
+                "md_run": md_dir
+            },
+            parameters={
+                "traj_file_name": msd_params["traj_file_name"],
+                "type_map": pdata["type_map"],
+                "frame_time": (
+                    msd_params["dump_freq"] * msd_params["time_step"]
+                ),
+                **{k: v for k, v in msd.items() if k != "_idx"}
+            },
+            key="msd" + suffix
+        )
+        analyses.append(msd_step)
+
+    if rings := properties.get("rings"):
+        rings_step = Step(
+            name="rings" + suffix,
+            template=PythonOPTemplate(
+                RingsOP,
+                image="registry.dp.tech/dptech/prod-13386/pylt-analysis:v2"
+            ),
+            artifacts={
+                "md_run": md_dir
+            },
+            parameters={
+                "traj_file_name": get_traj_name(
+                    pdata["processes"], rings["_idx"]
+                ),
+                "type_map": pdata["type_map"],
+                **{k: v for k, v in rings.items() if k != "_idx"}
+            },
+            key="rings" + suffix
+        )
+        analyses.append(rings_step)
+
+    if local := properties.get("local_structure"):
+        local_step = Step(
+            name="local-structure" + suffix,
+            template=PythonOPTemplate(
+                LocalStructureOP,
+                image="registry.dp.tech/dptech/prod-13386/pylt-analysis:v2"
+            ),
+            artifacts={
+                "md_run": md_dir
+            },
+            parameters={
+                "traj_file_name": get_traj_name(
+                    pdata["processes"], local["_idx"]
+                ),
+                "type_map": pdata["type_map"],
+                **{k: v for k, v in local.items() if k != "_idx"}
+            },
+            key="local-structure" + suffix
+        )
+        analyses.append(local_step)
+
+    if doas := properties.get("doas"):
+        traj_name = get_traj_name(pdata["processes"], doas["_idx"])
+        plot_params = {
+            "target_element": doas.get("target_element", ""),
+            "elements": doas.get("elements", []),
+            "bins": doas["bins"],
+            "kde": doas.get("kde", False),
+            "bandwidth": doas.get("bandwidth", 0.0)
+        }
+        if adaptive := doas.get("adaptive"):
+            loop_step = Step(
+                name="doas-loop" + suffix,
+                template=doas_loop,
+                artifacts={
+                    "md_run": md_dir,
+                    "model": model,
+                    "energies": None
+                },
+                parameters={
+                    "wave": 0,
+                    "wave_size": adaptive["wave_size"],
+                    "traj_file_name": traj_name,
+                    "energy_n_frame": doas["every_n_frame"],
+                    "type_map": pdata["type_map"],
+                    "mass_map": pdata["mass_map"],
+                    "target_element": doas["target_element"],
+                    "bins": doas["bins"],
+                    "metric": adaptive.get("metric", "ks"),
+                    "tol": adaptive["tol"],
+                    "suffix": suffix
+                },
+                key="doas-loop" + suffix
+            )
+            levels.append([loop_step, *analyses])
+        elif doas.get("mode") == "rerun":
+            prep_rerun = Step(
+                name="prep-rerun" + suffix,
+                template=PythonOPTemplate(
+                    DoasRerunPrepOP,
+                    image="registry.dp.tech/dptech/prod-13386/pylt-analysis:v2"
+                ),
+                artifacts={
+                    "md_run": md_dir,
+                    "model": model
+                },
+                parameters={
+                    "traj_file_name": traj_name,
+                    "energy_n_frame": doas["every_n_frame"]
+                },
+                key="prep-rerun" + suffix
+            )
+
+            levels.append([prep_rerun, *analyses])
+
+            executor_rerun, launch = step_resource(
+                resources, "rerun-snapshot", executor_run
+            )
+            rerun = Step(
+                name="rerun-snapshot" + suffix,
+                template=PythonOPTemplate(
+                    DpRunOP,
+                    image="registry.dp.tech/dptech/deepmd-kit:2.2.4-cuda11.6"
+                ),
+                artifacts={
+                    "work_dir": prep_rerun.outputs.artifacts["rerun_dir"]
+                },
+                parameters=launch,
+                executor=executor_rerun,
+                key="rerun-snap" + suffix
+            )
+
+            levels.append([rerun])
+
+            plot_doas = Step(
+                name="plot-doas" + suffix,
+                template=PythonOPTemplate(
+                    PlotDoas,
+                    image="registry.dp.tech/dptech/prod-13386/pylt-analysis:v2"
+                ),
+                artifacts={
+                    "minimize_dirs": rerun.outputs.artifacts["dp_dir"]
+                },
+                parameters={
+                    **plot_params,
+                    "type_map": pdata["type_map"],
+                    "all_frames": True
+                },
+                key="plot-doas" + suffix
+            )
+
+            levels.append([plot_doas])
+        else:
+            grasp_snap = Step(
+                name="grasp-snapshot" + suffix,
+                template=PythonOPTemplate(
+                    GraspSnapShotOP,
+                    image="registry.dp.tech/dptech/prod-13386/pylt-analysis:v2"
+                ),
+                artifacts={
+                    "md_run": md_dir,
+                    "model": model
+                },
+                parameters={
+                    "traj_file_name": traj_name,
+                    "energy_n_frame": doas["every_n_frame"],
+                    "type_map": pdata["type_map"],
+                    "mass_map": pdata["mass_map"]
+                },
+                key="grasp-snap" + suffix
+            )
+
+            levels.append([grasp_snap, *analyses])
+
+            executor_mini, launch = step_resource(
+                resources, "mini-snapshot", executor_run
+            )
+            minimize_snap = Step(
+                name="mini-snapshot" + suffix,
+                template=PythonOPTemplate(
+                    DpRunOP,
+                    image="registry.dp.tech/dptech/deepmd-kit:2.2.4-cuda11.6",
+                    slices=Slices(
+                        "{{item}}",
+                        input_artifact=["work_dir"],
+                        output_artifact=["dp_dir"]
+                    )
+                ),
+                artifacts={
+                    "work_dir": grasp_snap.outputs.artifacts["minimize_dirs"]
+                },
+                parameters=launch,
+                with_param=argo_range(
+                    grasp_snap.outputs.parameters["num_minimize"]
+                ),
+                key="mini-snap" + suffix + "-{{item}}",
+                executor=executor_mini
+            )
+
+            levels.append([minimize_snap])
+
+            plot_doas = Step(
+                name="plot-doas" + suffix,
+                template=PythonOPTemplate(
+                    PlotDoas,
+                    image="registry.dp.tech/dptech/prod-13386/pylt-analysis:v2"
+                ),
+                artifacts={
+                    "minimize_dirs": minimize_snap.outputs.artifacts["dp_dir"]
+                },
+                parameters={
+                    **plot_params,
+                    "type_map": pdata["type_map"]
+                },
+                key="plot-doas" + suffix
+            )
+
+            levels.append([plot_doas])
+    elif analyses:
+        levels.append(analyses)
+
+    return levels
+
+# output artifacts of analyses, aggregated over replicas
+REPLICA_RESULTS = {
+    "insitu-analysis": ["insitu"],
+    "rdf": ["rdf"],
+    "sq": ["sq"],
+    "msd": ["msd", "diffusion"],
+    "rings": ["rings"],
+    "local-structure": ["local_structure"],
+    "plot-doas": ["doas_data"]
+}
+
+def aggregate_steps(all_levels: List[List[list]]) -> List[Step]:
+    """steps aggregating the results of the analyses of every replica
+
+    Args:
+        all_levels (List[List[list]]): output of `replica_levels` of every
+            replica
+
+    Returns:
+        List[Step]: one step per aggregated artifact
+    """
+    steps = []
+    for name, artifacts in REPLICA_RESULTS.items():
+        replica_steps = [
+            step
+            for levels in all_levels
+            for level in levels
+            for step in level
+            if re.fullmatch(rf"{name}-r\d+", step.name)
+        ]
+        if not replica_steps:
+            continue
+        for artifact in artifacts:
+            step_name = "aggregate-" + artifact.replace('_', '-')
+            steps.append(Step(
+                name=step_name,
+                template=PythonOPTemplate(
+                    AggregateReplicasOP,
+                    image="registry.dp.tech/dptech/prod-13386/pylt-analysis:v2"
+                ),
+                artifacts={
+                    "results": [
+                        step.outputs.artifacts[artifact]
+                        for step in replica_steps
+                    ]
+                },
+                key=step_name
+            ))
+    return steps
+
+def amorphous_flow(
+    executor_run: DispatcherExecutor = None,
+    dflow_labels = None,
+    resources: Optional[Dict[str, dict]] = None,
+    **pdata
+) -> Workflow:
+
+    # every partition runs in its own partition.N directory, which the
+    # analyses of a single md run do not cover
+    if pdata.get("partitions") and (
+        pdata.get("properties") or has_insitu(pdata["processes"])
+    ):
+        raise ValueError(
+            "Partitions are not analysed, use replicas for the properties"
+        )
+
+    wf = Workflow(
+        name='amorphous',
+        labels=dflow_labels,
+    )
+
+    # unchanged files uploaded before are reused by their content hash
+    upload = UploadRegistry(**pdata.get("upload_registry", {})).upload
+    artifacts = upload_files(
+        {
+            "structure": pdata.get("structure"),
+            "in_lmp": pdata.get("in_lmp"),
+            "model": pdata.get("model")
+        },
+        upload,
+        **pdata.get("transfer", {})
+    )
+    struc, in_lmp, model = (
+        artifacts["structure"], artifacts["in_lmp"], artifacts["model"]
+    )
+
+    doas_loop = None
+    if pdata.get("properties", {}).get("doas", {}).get("adaptive"):
+        doas_loop = doas_adaptive_loop(
+            *step_resource(resources, "mini-snapshot", executor_run)
+        )
+
+    if replicas := pdata.get("replicas"):
+        if in_lmp is not None:
+            raise ValueError(
+                "Replicas set their seeds in processes, not in in_lmp"
+            )
+        all_levels = [
+            replica_levels(
+                pdata, executor_run, model, struc, in_lmp, doas_loop, i, seed,
+                resources
+            )
+            for i, seed in enumerate(replica_seeds(replicas))
+        ]
+    else:
+        all_levels = [
+            replica_levels(
+                pdata, executor_run, model, struc, in_lmp, doas_loop,
+                resources=resources
+            )
+        ]
+    # the same level of every replica runs in parallel
+    for level in zip_longest(*all_levels, fillvalue=[]):
+        wf.add([step for steps in level for step in steps])
+
+    if replicas:
+        aggregates = aggregate_steps(all_levels)
+        if aggregates:
+            wf.add(aggregates)
 
     return wf
 
@@ -149,10 +809,30 @@ def main_amorphous_flow(
     pdata_file: Union[str, Path] = "param.json",
     mdata_file: Union[str, Path] = "machine.json",
     path: Union[str, Path] = "./",
-    dflow_labels = None
+    dflow_labels = None,
+    artifacts: Optional[List[str]] = None,
+    max_workers: int = 8
 ):
+    """submit the amorphous flow, wait for it and download its results
+    concurrently
+
+    Args:
+        pdata_file (Union[str, Path], optional): parameter file.
+            Defaults to "param.json".
+        mdata_file (Union[str, Path], optional): machine file.
+            Defaults to "machine.json".
+        path (Union[str, Path], optional): directory of the results.
+            Defaults to "./".
+        dflow_labels (optional): labels of the workflow. Defaults to None.
+        artifacts (Optional[List[str]], optional): names of the artifacts to
+            download, like ["rdf", "aggregate"]. Defaults to None, all.
+        max_workers (int, optional): max number of concurrent downloads.
+            Defaults to 8.
+    """
     with open(pdata_file, 'r', encoding='utf-8') as f:
         pdata = json.load(f)
+    if errors := validate_pdata(pdata):
+        raise ValueError("Invalid parameters:\n" + "\n".join(errors))
     with open(mdata_file, 'r', encoding='utf-8') as f:
         mdata_dict = json.load(f)
     mdata = Mdata(mdata_dict)
@@ -161,14 +841,52 @@ def main_amorphous_flow(
     wf = amorphous_flow(
         executor_run=executor_run,
         dflow_labels=dflow_labels,
+        resources=step_executors(mdata, pdata),
         **pdata
     )
     wf.submit()
     while wf.query_status() in ["Pending", "Running"]:
         time.sleep(1)
     assert (wf.query_status() == "Succeeded")
-    step_name = wf.query_step(name="plot-doas")
+    replicas = pdata.get("replicas")
+    suffixes = [f"-r{i}" for i in range(len(replica_seeds(replicas)))] \
+        if replicas else [""]
+    downloads = []
+    for i, suffix in enumerate(suffixes):
+        # results of every replica in its own directory
+        out = Path(path) / f"replica.{i}" if suffix else Path(path)
+        step_name = wf.query_step(name="plot-doas" + suffix)
+        step_name += [
+            step for step in wf.query_step(name="check-doas")
+            if step.key.startswith(f"check-doas{suffix}-")
+            and step.outputs.parameters["converged"].value in [True, "true"]
+        ]
+        downloads += [("doas_fig", jj, out) for jj in step_name]
 
-    if len(step_name) > 0:
-        for jj in step_name:
-            download_artifact(jj.outputs.artifacts["doas_fig"], path)
+        for jj in wf.query_step(name="plot-doas" + suffix):
+            downloads += [("doas_data", jj, out), ("doas_snapshots", jj, out)]
+
+        for name, names in REPLICA_RESULTS.items():
+            if name == "plot-doas":
+                continue
+            for jj in wf.query_step(name=name + suffix):
+                downloads += [(artifact, jj, out) for artifact in names]
+
+    if replicas:
+        names = [
+            "aggregate-" + artifact.replace('_', '-')
+            for artifacts in REPLICA_RESULTS.values()
+            for artifact in artifacts
+        ]
+        downloads += [
+            ("aggregate", jj, Path(path)) for jj in wf.query_step(name=names)
+        ]
+
+    download_files(
+        [
+            (jj.outputs.artifacts[artifact], out)
+            for artifact, jj, out in downloads
+            if artifacts is None or artifact in artifacts
+        ],
+        max_workers
+    )
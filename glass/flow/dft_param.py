@@ -0,0 +1,426 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+from glass.io.convert import file_hash
+from glass.io.structure import read_structure
+from glass.simulation.dft_run import RESULT_FILE, get_runner, read_result
+
+# settings of the convergence tests besides `structures`, `runner`,
+# `params` and `tests`
+DEFAULT_SETTINGS = {
+    # energy per atom in eV and force components in eV/A
+    "e_tol": 1e-3,
+    "f_tol": 1e-2,
+    # following values a converged value agrees with
+    "stable": 1,
+    "wave_size": 2,
+    "n_workers": 4,
+    "max_sweeps": 8,
+    "cache_dir": ".glass_dft_cache"
+}
+
+
+class ResultCache(object):
+    def __init__(
+        self,
+        cache_dir: Union[str, Path] = ".glass_dft_cache"
+    ) -> None:
+        """
+        Results of single point calculations by the content of the
+        structure, the runner, the other parameters and the tested value,
+        so that repeated tests are not calculated again
+        """
+        self.cache_dir = Path(cache_dir)
+
+    def key(
+        self,
+        structure: Union[str, Path],
+        runner: dict,
+        params: dict,
+        name: str,
+        value: float
+    ) -> str:
+        params = {k: v for k, v in params.items() if k != name}
+        return file_hash(
+            Path(structure),
+            {"runner": runner, "params": params, "name": name, "value": value}
+        )
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self.cache_dir / f"{key}.json"
+        if not path.is_file():
+            return None
+        return read_result(path)
+
+    def put(self, key: str, result: dict):
+        """write a result atomically, sweeps may run in threads"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.cache_dir / f"{key}.json"
+        temp_file = path.with_name(
+            f"{path.name}.{os.getpid()}.{threading.get_ident()}"
+        )
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        os.replace(temp_file, path)
+
+
+def result_diff(a: dict, b: dict) -> Dict[str, float]:
+    """differences of the energy per atom and max of the force components"""
+    return {
+        "energy": abs(a["energy"] - b["energy"]),
+        "force": float(
+            np.abs(np.subtract(a["forces"], b["forces"])).max(initial=0.0)
+        )
+    }
+
+def converged_index(
+    results: List[dict],
+    e_tol: float = 1e-3,
+    f_tol: float = 1e-2,
+    stable: int = 1
+) -> Optional[int]:
+    """first result agreeing within tolerance with the `stable` results
+    after it
+
+    Args:
+        results (List[dict]): results from the cheapest to the most
+            accurate value
+        e_tol (float, optional): tolerance of the energy per atom in eV.
+            Defaults to 1e-3.
+        f_tol (float, optional): tolerance of the force components in
+            eV/A. Defaults to 1e-2.
+        stable (int, optional): number of following results.
+            Defaults to 1.
+
+    Returns:
+        Optional[int]: index of the converged result, None if none is
+    """
+    for i in range(len(results) - stable):
+        diffs = [
+            result_diff(results[i], results[i + j])
+            for j in range(1, stable + 1)
+        ]
+        if all(d["energy"] <= e_tol and d["force"] <= f_tol for d in diffs):
+            return i
+    return None
+
+def convergence_sweep(
+    structure: Union[str, Path],
+    name: str,
+    values: List[float],
+    evaluate: Callable[[Union[str, Path], str, List[float]], List[dict]],
+    cache: ResultCache,
+    runner: dict,
+    params: dict,
+    e_tol: float = 1e-3,
+    f_tol: float = 1e-2,
+    stable: int = 1,
+    wave_size: int = 2
+) -> dict:
+    """convergence test of a parameter, evaluating its values in waves of
+    parallel calculations until one converges. Cached values are free, and
+    waves take the next values not cached.
+
+    Args:
+        structure (Union[str, Path]): structure file
+        name (str): tested parameter, like "encut"
+        values (List[float]): values from the cheapest to the most accurate,
+            like increasing `encut` or decreasing `kspacing`
+        evaluate (Callable): results of a structure with values of a
+            parameter, like `local_wave` or `dflow_wave`
+        cache (ResultCache): cache of the results
+        runner (dict): settings of the runner, part of the cache key
+        params (dict): other parameters, part of the cache key
+        e_tol (float, optional): see `converged_index`. Defaults to 1e-3.
+        f_tol (float, optional): see `converged_index`. Defaults to 1e-2.
+        stable (int, optional): see `converged_index`. Defaults to 1.
+        wave_size (int, optional): calculations of a wave. Defaults to 2.
+
+    Returns:
+        dict: `results` and `diffs` of the values evaluated in order, the
+        `converged` value or None, and the counts of `n_runs` and `n_waves`
+    """
+    keys = [
+        cache.key(structure, runner, params, name, value) for value in values
+    ]
+    results = [cache.get(key) for key in keys]
+    cached = [result is not None for result in results]
+    n_runs, n_waves = 0, 0
+    while True:
+        known = next(
+            (i for i, result in enumerate(results) if result is None),
+            len(values)
+        )
+        index = converged_index(results[:known], e_tol, f_tol, stable)
+        if index is not None or known == len(values):
+            break
+        wave = [
+            i for i in range(known, len(values)) if results[i] is None
+        ][:wave_size]
+        new = evaluate(structure, name, [values[i] for i in wave])
+        for i, result in zip(wave, new):
+            cache.put(keys[i], result)
+            results[i] = result
+        n_runs += len(wave)
+        n_waves += 1
+
+    return {
+        "structure": str(structure),
+        "name": name,
+        "results": [
+            {"value": value, "energy": result["energy"], "cached": hit}
+            for value, result, hit in zip(values, results[:known], cached)
+        ],
+        "diffs": [
+            {"value": values[i], **result_diff(results[i], results[i + 1])}
+            for i in range(known - 1)
+        ],
+        "converged": None if index is None else values[index],
+        "n_runs": n_runs,
+        "n_waves": n_waves
+    }
+
+def local_wave(
+    structure: Union[str, Path],
+    name: str,
+    values: List[float],
+    runner: dict,
+    params: dict,
+    n_workers: int = 4,
+    work_dir: Union[str, Path] = "dft_param"
+) -> List[dict]:
+    """results of the values of a parameter calculated here, in threads
+    since runners wait for their calculator
+
+    Args:
+        structure (Union[str, Path]): structure file
+        name (str): tested parameter
+        values (List[float]): values of the wave
+        runner (dict): settings of the runner, see `get_runner`
+        params (dict): other parameters
+        n_workers (int, optional): number of threads. Defaults to 4.
+        work_dir (Union[str, Path], optional): directory of the
+            calculations. Defaults to "dft_param".
+
+    Returns:
+        List[dict]: result of every value
+    """
+    atoms = read_structure(structure)
+    calculator = get_runner(runner)
+    root = Path(work_dir) / Path(structure).stem
+
+    def run(value):
+        return calculator.run(
+            atoms, {**params, name: value}, root / f"{name}-{value}"
+        )
+
+    with ThreadPoolExecutor(max(1, n_workers)) as pool:
+        return list(pool.map(run, values))
+
+def dflow_wave(
+    structure: Union[str, Path],
+    name: str,
+    values: List[float],
+    runner: dict,
+    params: dict,
+    image: str,
+    executor=None,
+    work_dir: Union[str, Path] = "dft_param",
+    upload: Optional[Callable] = None,
+    dflow_labels=None
+) -> List[dict]:
+    """results of the values of a parameter calculated by a workflow
+    fanning out a slice of `DftRunOP` per value
+
+    Args:
+        structure (Union[str, Path]): structure file
+        name (str): tested parameter
+        values (List[float]): values of the wave
+        runner (dict): settings of the runner, see `get_runner`
+        params (dict): other parameters
+        image (str): image with the runner and its calculator
+        executor (optional): executor of the calculations. Defaults to None.
+        work_dir (Union[str, Path], optional): directory of the downloaded
+            results. Defaults to "dft_param".
+        upload (Optional[Callable], optional): like `upload_artifact` or
+            `UploadRegistry.upload`. Defaults to None, `upload_artifact`.
+        dflow_labels (optional): labels of the workflow. Defaults to None.
+
+    Returns:
+        List[dict]: result of every value
+    """
+    from dflow import Step, Workflow, argo_range, upload_artifact
+    from dflow.python import PythonOPTemplate, Slices
+
+    from glass.flow.transfer import download_files
+    from glass.simulation.dft_run_op import DftRunOP
+
+    wf = Workflow(name="dft-param", labels=dflow_labels)
+    run = Step(
+        name="dft-run",
+        template=PythonOPTemplate(
+            DftRunOP,
+            image=image,
+            slices=Slices(
+                "{{item}}",
+                input_parameter=["value"],
+                output_artifact=["result"]
+            )
+        ),
+        artifacts={"structure": (upload or upload_artifact)(structure)},
+        parameters={
+            "runner": runner,
+            "params": params,
+            "name": name,
+            "value": list(values)
+        },
+        with_param=argo_range(len(values)),
+        key="dft-run-{{item}}",
+        executor=executor
+    )
+    wf.add(run)
+    wf.submit()
+    while wf.query_status() in ["Pending", "Running"]:
+        time.sleep(1)
+    assert (wf.query_status() == "Succeeded")
+
+    root = Path(work_dir) / Path(structure).stem
+    dirs = [root / f"{name}-{value}" for value in values]
+    steps = {step.key: step for step in wf.query_step(name="dft-run")}
+    download_files(
+        [
+            (steps[f"dft-run-{i}"].outputs.artifacts["result"], path)
+            for i, path in enumerate(dirs)
+        ],
+        progress=False
+    )
+    return [read_result(next(path.rglob(RESULT_FILE))) for path in dirs]
+
+def dft_param_test(
+    pdata: dict,
+    evaluate: Callable[[Union[str, Path], str, List[float]], List[dict]],
+    path: Union[str, Path] = "dft_param"
+) -> dict:
+    """convergence tests of the parameters of `pdata["tests"]` for every
+    structure, the sweeps running side by side, and the parameters
+    recommended for all the structures written to `dft_param.json`
+
+    Args:
+        pdata (dict): `structures`, `runner`, `params` and `tests` like
+            {"encut": [400, 500, 600]}, and the settings of
+            `DEFAULT_SETTINGS`
+        evaluate (Callable): like `local_wave` or `dflow_wave` with the
+            runner and the parameters bound
+        path (Union[str, Path], optional): directory of the report.
+            Defaults to "dft_param".
+
+    Raises:
+        ValueError: no structure or no test
+
+    Returns:
+        dict: `sweeps` and the `recommended` value of every parameter, the
+        most accurate of the converged values, None if one did not converge
+    """
+    from glass.flow.transfer import run_concurrently
+
+    settings = {**DEFAULT_SETTINGS, **pdata}
+    structures = pdata.get("structures") or [pdata.get("structure")]
+    if not all(structures):
+        raise ValueError("structures are required")
+    if not pdata.get("tests"):
+        raise ValueError(
+            "tests are required, like {\"encut\": [400, 500, 600]}"
+        )
+    runner, params = pdata.get("runner", {}), pdata.get("params", {})
+    cache = ResultCache(settings["cache_dir"])
+    jobs = [
+        partial(
+            convergence_sweep, structure, name, values, evaluate, cache,
+            runner, params, settings["e_tol"], settings["f_tol"],
+            settings["stable"], settings["wave_size"]
+        )
+        for structure in structures
+        for name, values in pdata["tests"].items()
+    ]
+    sweeps = run_concurrently(
+        jobs, settings["max_sweeps"], "sweep", progress=False
+    )
+
+    recommended = {}
+    for name, values in pdata["tests"].items():
+        converged = [
+            sweep["converged"] for sweep in sweeps if sweep["name"] == name
+        ]
+        recommended[name] = None if None in converged \
+            else values[max(values.index(value) for value in converged)]
+    ret = {"sweeps": sweeps, "recommended": recommended}
+    Path(path).mkdir(parents=True, exist_ok=True)
+    with open(Path(path) / "dft_param.json", 'w', encoding='utf-8') as f:
+        json.dump(ret, f, indent=4)
+    return ret
+
+def main_dft_param_test(
+    pdata_file: Union[str, Path] = "param.json",
+    mdata_file: Optional[Union[str, Path]] = None,
+    path: Union[str, Path] = "dft_param",
+    dflow_labels=None
+) -> dict:
+    """convergence tests of dft parameters, calculated here without a
+    machine file, or by workflows on the dispatcher of the machine file
+
+    Args:
+        pdata_file (Union[str, Path], optional): parameter file.
+            Defaults to "param.json".
+        mdata_file (Optional[Union[str, Path]], optional): machine file.
+            Defaults to None, calculated here.
+        path (Union[str, Path], optional): directory of the calculations
+            and of the report. Defaults to "dft_param".
+        dflow_labels (optional): labels of the workflows. Defaults to None.
+
+    Raises:
+        ValueError: no image for the workflows
+
+    Returns:
+        dict: output of `dft_param_test`
+    """
+    with open(pdata_file, 'r', encoding='utf-8') as f:
+        pdata = json.load(f)
+    runner, params = pdata.get("runner", {}), pdata.get("params", {})
+    if mdata_file is None:
+        evaluate = partial(
+            local_wave,
+            runner=runner,
+            params=params,
+            n_workers=pdata.get("n_workers", DEFAULT_SETTINGS["n_workers"]),
+            work_dir=path
+        )
+        return dft_param_test(pdata, evaluate, path)
+
+    from glass.flow.upload import UploadRegistry
+    from glass.utils import Mdata, config_argo, dispatcher_executor
+
+    if not pdata.get("image"):
+        raise ValueError("image of the dft runner is required by workflows")
+    with open(mdata_file, 'r', encoding='utf-8') as f:
+        mdata = Mdata(json.load(f))
+    config_argo(**mdata)
+    evaluate = partial(
+        dflow_wave,
+        runner=runner,
+        params=params,
+        image=pdata["image"],
+        executor=dispatcher_executor(**mdata),
+        work_dir=path,
+        # structures are uploaded once for all the waves
+        upload=UploadRegistry(**pdata.get("upload_registry", {})).upload,
+        dflow_labels=dflow_labels
+    )
+    return dft_param_test(pdata, evaluate, path)
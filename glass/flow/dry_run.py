@@ -0,0 +1,393 @@
+import json
+import re
+from pathlib import Path
+from typing import List, Optional, Union
+
+from pymatgen.core.composition import Composition
+
+from glass.flow.sizing import machine_cores, step_profiles
+from glass.io.input import build_in_lmp, partition_processes
+from glass.io.protocol import PROTOCOLS, expand_protocol
+from glass.io.structure import read_structure
+
+ENSEMBLES = ["npt", "nvt"]
+# required params of md processes, by ensemble
+MD_KEYS = [
+    "thermo_steps", "traj_file_name", "ensemble", "t_damp", "time_step",
+    "dump_freq"
+]
+NPT_KEYS = ["p_style", "ini_p", "final_p", "p_damp"]
+# required keys of the analyses, besides `_idx`
+PROPERTY_KEYS = {
+    "rdf": [],
+    "sq": [],
+    "msd": [],
+    "rings": ["cutoffs"],
+    "local_structure": ["cutoffs", "triplets"],
+    "doas": ["bins", "every_n_frame"]
+}
+# throughput of deepmd in atom-steps per core-second and force evaluations
+# of a minimization, used when the parameters give none
+DEFAULT_ESTIMATE = {
+    "atom_steps_per_core_second": 2e4,
+    "minimize_evaluations": 1000
+}
+
+
+def md_processes(processes: List[dict]) -> List[dict]:
+    """md processes with protocol templates expanded to `md_run`"""
+    ret = []
+    for sub_dict in processes:
+        if sub_dict.get("process") in PROTOCOLS:
+            sub_dict = expand_protocol(sub_dict)
+        if sub_dict.get("process") == "md_run":
+            ret.append(sub_dict)
+    return ret
+
+def process_steps(sub_dict: dict) -> int:
+    """number of steps of a md process, summed over its stages if any, as
+    they are run by `add_md_process`"""
+    params = sub_dict["params"]
+    if stages := params.get("stages"):
+        return sum(stage["n_steps"] for stage in stages)
+    return params["n_steps"]
+
+def validate_processes(processes: list) -> List[str]:
+    """errors of the processes of in.lmp"""
+    if not isinstance(processes, list) or not processes:
+        return ["processes: a non-empty list is required"]
+    errors = []
+    seen = set()
+    for i, sub_dict in enumerate(processes):
+        where = f"processes[{i}]"
+        if not isinstance(sub_dict, dict):
+            errors.append(f"{where}: a dict is required")
+            continue
+        if not isinstance(sub_dict.get("_idx"), int):
+            errors.append(f"{where}._idx: an int is required")
+        elif sub_dict["_idx"] in seen:
+            errors.append(f"{where}._idx: {sub_dict['_idx']} is duplicated")
+        seen.add(sub_dict.get("_idx"))
+        process = sub_dict.get("process")
+        if process == "minimize":
+            continue
+        if process not in ["md_run", *PROTOCOLS]:
+            errors.append(
+                f"{where}.process: {process!r} is not one of "
+                f"minimize, md_run, {', '.join(PROTOCOLS)}"
+            )
+            continue
+        params = sub_dict.get("params")
+        if not isinstance(params, dict):
+            errors.append(f"{where}.params: a dict is required")
+            continue
+        keys = MD_KEYS + (NPT_KEYS if params.get("ensemble") == "npt" else [])
+        if process == "md_run" and not params.get("stages"):
+            keys = keys + ["n_steps", "ini_t", "final_t"]
+        errors += [
+            f"{where}.params: missing {key}"
+            for key in keys if key not in params
+        ]
+        if "ensemble" in params and params["ensemble"] not in ENSEMBLES:
+            errors.append(
+                f"{where}.params.ensemble: {params['ensemble']!r} is not one "
+                f"of {', '.join(ENSEMBLES)}"
+            )
+        for key in ["n_steps", "dump_freq", "thermo_steps"]:
+            if key in params and (
+                not isinstance(params[key], int) or params[key] <= 0
+            ):
+                errors.append(
+                    f"{where}.params.{key}: a positive int is required"
+                )
+        if process in PROTOCOLS and "time_step" in params:
+            try:
+                expand_protocol(sub_dict)
+            except KeyError as e:
+                errors.append(
+                    f"{where}.params: missing {e.args[0]} of {process}"
+                )
+    return errors
+
+def validate_pdata(pdata: dict, base_dir: Union[str, Path] = ".") -> List[str]:
+    """check the parameters of the amorphous flow before anything is
+    uploaded, for the errors which would otherwise be raised in a pod
+
+    Args:
+        pdata (dict): parameters of the flow
+        base_dir (Union[str, Path], optional): directory of relative paths
+            in the parameters. Defaults to ".".
+
+    Returns:
+        List[str]: errors, empty if the parameters are valid
+    """
+    errors = []
+    type_map = pdata.get("type_map")
+    mass_map = pdata.get("mass_map") or {}
+    if not isinstance(type_map, dict) or \
+            sorted(type_map) != [str(i) for i in range(len(type_map))]:
+        errors.append(
+            'type_map: a dict like {"0": "Si", "1": "O"} is required'
+        )
+        type_map = {}
+    errors += [
+        f"mass_map: missing {element}"
+        for element in type_map.values() if element not in mass_map
+    ]
+    elements = list(type_map.values())
+
+    for key in ["model", "structure", "in_lmp"]:
+        if pdata.get(key) and not (Path(base_dir) / pdata[key]).exists():
+            errors.append(f"{key}: {pdata[key]} not found")
+    if not pdata.get("model"):
+        errors.append("model: a deepmd model is required")
+    if not pdata.get("structure") and not pdata.get("packing"):
+        errors.append("structure or packing is required")
+    if pdata.get("in_lmp") and pdata.get("replicas"):
+        errors.append("replicas: seeds are set in processes, not in in_lmp")
+
+    processes = pdata.get("processes")
+    if not pdata.get("in_lmp"):
+        errors += validate_processes(processes)
+    if not isinstance(processes, list):
+        processes = []
+    params = {
+        sub_dict.get("_idx"): sub_dict.get("params")
+        for sub_dict in processes
+        if isinstance(sub_dict, dict)
+        and isinstance(sub_dict.get("params"), dict)
+    }
+    insitu = any(
+        key in sub_params
+        for sub_params in params.values()
+        for key in ["rdf", "pe_atom", "coord", "msd"]
+    )
+    if pdata.get("partitions") and (pdata.get("properties") or insitu):
+        errors.append("partitions: not analysed, use replicas for analyses")
+
+    for name, prop in (pdata.get("properties") or {}).items():
+        where = f"properties.{name}"
+        if name not in PROPERTY_KEYS:
+            errors.append(f"{where}: unknown property")
+            continue
+        if prop.get("_idx") not in params:
+            errors.append(
+                f"{where}._idx: no md process with _idx {prop.get('_idx')}"
+            )
+        elif "traj_file_name" not in params[prop["_idx"]]:
+            errors.append(
+                f"{where}._idx: process {prop['_idx']} has no traj_file_name"
+            )
+        errors += [
+            f"{where}: missing {key}"
+            for key in PROPERTY_KEYS[name] if key not in prop
+        ]
+        for pair in (prop.get("cutoffs") or {}):
+            errors += [
+                f"{where}.cutoffs: {element} of {pair} not in type_map"
+                for element in pair.split('-') if element not in elements
+            ]
+        if name == "doas":
+            targets = [prop.get("target_element")] \
+                if prop.get("target_element") else prop.get("elements", [])
+            errors += [
+                f"{where}: target element {element} not in type_map"
+                for element in targets if element not in elements
+            ]
+            if adaptive := prop.get("adaptive"):
+                errors += [
+                    f"{where}.adaptive: missing {key}"
+                    for key in ["wave_size", "tol"] if key not in adaptive
+                ]
+                if not prop.get("target_element"):
+                    errors.append(
+                        f"{where}: adaptive mode needs target_element"
+                    )
+    return errors
+
+def validate_mdata(mdata: dict) -> List[str]:
+    """errors of the machine parameters, including placeholders left from
+    the example like <YOUR-BOHRIUM-USERNAME>"""
+    errors = []
+    for section, keys in {
+        "dflow_config": ["host"],
+        "dispatcher": ["batch_type", "context_type"]
+    }.items():
+        if not isinstance(mdata.get(section), dict):
+            errors.append(f"{section}: a dict is required")
+            continue
+        errors += [
+            f"{section}: missing {key}"
+            for key in keys if key not in mdata[section]
+        ]
+
+    def placeholders(value, where):
+        if isinstance(value, dict):
+            return [
+                error for key, item in value.items()
+                for error in placeholders(item, f"{where}.{key}")
+            ]
+        if isinstance(value, str) and re.fullmatch(r'<.*>', value):
+            return [f"{where}: placeholder {value} not replaced"]
+        return []
+
+    return errors + placeholders(mdata, "machine")
+
+def count_atoms(
+    pdata: dict,
+    base_dir: Union[str, Path] = "."
+) -> Optional[int]:
+    """number of atoms of the structure or of the packing"""
+    if pdata.get("structure"):
+        return len(read_structure(Path(base_dir) / pdata["structure"]))
+    if packing := pdata.get("packing"):
+        composition = Composition(packing["composition"]) \
+            * packing.get("n_formula", 1)
+        return int(round(composition.num_atoms))
+    return None
+
+def cores_of(mdata: Optional[dict]) -> Optional[int]:
+    """number of cores of a machine type of Bohrium like c32_m64_cpu"""
+    dispatcher = (mdata or {}).get("dispatcher", {})
+    scass_type = (dispatcher.get("input_data") or {}).get("scass_type", "")
+    return machine_cores(scass_type)
+
+def estimate_cost(
+    pdata: dict,
+    n_atoms: Optional[int],
+    mdata: Optional[dict] = None
+) -> dict:
+    """counts of frames, snapshots and slices, atom-steps and core-hours of
+    the md runs and of the minimizations of snapshots, with the throughput
+    of `pdata["estimate"]` or `DEFAULT_ESTIMATE`
+
+    Args:
+        pdata (dict): parameters of the flow
+        n_atoms (Optional[int]): number of atoms, None if unknown
+        mdata (Optional[dict], optional): machine parameters, for the cores
+            of a job. Defaults to None.
+
+    Returns:
+        dict: the estimate
+    """
+    from glass.flow.amorphous import replica_seeds
+
+    settings = {**DEFAULT_ESTIMATE, **pdata.get("estimate", {})}
+    n_runs = len(replica_seeds(pdata["replicas"])) \
+        if pdata.get("replicas") else 1
+    n_runs *= len(pdata.get("partitions") or [None])
+    processes = md_processes(pdata.get("processes") or [])
+    frames = {
+        sub_dict["_idx"]: process_steps(sub_dict)
+        // sub_dict["params"]["dump_freq"] + 1
+        for sub_dict in processes
+    }
+    n_steps = sum(process_steps(sub_dict) for sub_dict in processes)
+
+    doas = (pdata.get("properties") or {}).get("doas")
+    rerun = bool(doas) and doas.get("mode") == "rerun"
+    n_snapshots, n_slices = 0, 0
+    if doas:
+        # adaptive runs may stop before all the snapshots are minimized
+        n_snapshots = -(-frames.get(doas["_idx"], 0) // doas["every_n_frame"])
+        # one minimization job per snapshot, or a single rerun job
+        n_slices = 1 if rerun else n_snapshots
+    evaluations = 1 if rerun else settings["minimize_evaluations"]
+
+    ret = {
+        "n_atoms": n_atoms,
+        "n_runs": n_runs,
+        "n_steps": n_steps,
+        "n_frames": {str(idx): n for idx, n in frames.items()},
+        "n_snapshots": n_snapshots * n_runs,
+        "n_slices": n_slices * n_runs,
+        "snapshot_evaluations": evaluations,
+        "atom_steps_per_core_second": settings["atom_steps_per_core_second"],
+        "atom_steps": None,
+        "core_hours": None
+    }
+    if n_atoms is None:
+        return ret
+    md_atom_steps = n_atoms * n_steps * n_runs
+    snapshot_atom_steps = n_atoms * evaluations * n_snapshots * n_runs
+    rate = settings["atom_steps_per_core_second"] * 3600
+    ret["atom_steps"] = {"md": md_atom_steps, "snapshots": snapshot_atom_steps}
+    ret["core_hours"] = {
+        "md": md_atom_steps / rate,
+        "snapshots": snapshot_atom_steps / rate,
+        "total": (md_atom_steps + snapshot_atom_steps) / rate
+    }
+    if cores := cores_of(mdata):
+        # the md of every run, then the slices side by side
+        ret["cores_per_job"] = cores
+        ret["wall_hours"] = (
+            md_atom_steps / n_runs
+            + snapshot_atom_steps / max(1, n_slices * n_runs)
+        ) / rate / cores
+    return ret
+
+def dry_run(
+    pdata_file: Union[str, Path] = "param.json",
+    mdata_file: Optional[Union[str, Path]] = "machine.json",
+    work_dir: Union[str, Path] = "dry_run"
+) -> dict:
+    """validate the parameters, write in.lmp and lmp.data locally and
+    estimate the cost, without uploading or submitting anything
+
+    Args:
+        pdata_file (Union[str, Path], optional): parameter file.
+            Defaults to "param.json".
+        mdata_file (Optional[Union[str, Path]], optional): machine file, not
+            checked if None. Defaults to "machine.json".
+        work_dir (Union[str, Path], optional): directory of the generated
+            files and of `dry_run.json`. Defaults to "dry_run".
+
+    Returns:
+        dict: `errors` and, if there is none, `estimate`
+    """
+    with open(pdata_file, 'r', encoding='utf-8') as f:
+        pdata = json.load(f)
+    # paths are uploaded relative to the working directory
+    base_dir = Path(".")
+    errors = validate_pdata(pdata, base_dir)
+    mdata = None
+    if mdata_file:
+        with open(mdata_file, 'r', encoding='utf-8') as f:
+            mdata = json.load(f)
+        errors += validate_mdata(mdata)
+    ret = {"errors": errors}
+    if errors:
+        return ret
+
+    work_dir = Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    if pdata.get("structure"):
+        atoms = read_structure(base_dir / pdata["structure"])
+        atoms.to_lmp_data(pdata["type_map"], pdata["mass_map"], work_dir)
+        n_atoms = len(atoms)
+    else:
+        n_atoms = count_atoms(pdata, base_dir)
+    if not pdata.get("in_lmp"):
+        processes = pdata["processes"]
+        if pdata.get("replicas"):
+            from glass.flow.amorphous import replica_seeds
+
+            # in.lmp of the first replica
+            seed = replica_seeds(pdata["replicas"])[0]
+            processes = partition_processes(processes, {"seed": seed})
+        build_in_lmp(
+            processes,
+            Path(pdata["model"]).name,
+            "lmp.data",
+            work_dir,
+            pdata["type_map"],
+            pdata.get("partitions")
+        )
+    ret["estimate"] = estimate_cost(pdata, n_atoms, mdata)
+    if mdata is not None:
+        ret["machines"] = step_profiles(
+            mdata, ret["estimate"], len(pdata.get("partitions") or [None])
+        )
+    with open(work_dir / "dry_run.json", 'w', encoding='utf-8') as f:
+        json.dump(ret, f, indent=4)
+    return ret
@@ -0,0 +1,349 @@
+import html
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """seconds since epoch of an argo timestamp like 2024-01-01T00:00:00Z"""
+    if not value:
+        return None
+    time = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    return time.timestamp()
+
+def base_name(name: str) -> str:
+    """name of a step without the index of its slice, like mini-snapshot(3)"""
+    return re.sub(r'\(.*\)$', '', name)
+
+def job_timing(step) -> Optional[dict]:
+    """start and end of the job of a dispatched step, from its `timing`
+    output written by the OP on the machine of the job"""
+    try:
+        value = step.outputs.parameters["timing"].value
+    except (AttributeError, KeyError, TypeError):
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    return {"start": float(value["start"]), "end": float(value["end"])}
+
+def pod_parents(nodes: dict) -> Dict[str, List[str]]:
+    """pods every pod depends on in the argo node graph. A step group of
+    steps, or a task of a dag, is a child of the outbound pods of the steps
+    it waits for, so the parents of a pod are its nearest pod ancestors
+    through the `children` of the nodes.
+
+    Args:
+        nodes (dict): `status.nodes` of `Workflow.query`, by id
+
+    Returns:
+        Dict[str, List[str]]: ids of the parents of every pod, by id
+    """
+    parents = {}
+    for node_id, node in nodes.items():
+        for child in node.get("children") or []:
+            parents.setdefault(child, []).append(node_id)
+    ret = {}
+    for node_id, node in nodes.items():
+        if node.get("type") != "Pod":
+            continue
+        found, seen = set(), {node_id}
+        stack = list(parents.get(node_id, []))
+        while stack:
+            parent = stack.pop()
+            if parent in seen:
+                continue
+            seen.add(parent)
+            if nodes[parent].get("type") == "Pod":
+                found.add(parent)
+            else:
+                stack.extend(parents.get(parent, []))
+        ret[node_id] = sorted(found)
+    return ret
+
+def step_records(steps: list, nodes: Optional[dict] = None) -> List[dict]:
+    """start, end and phase of the pods of a workflow, with the pods they
+    depend on
+
+    Args:
+        steps (list): steps of `Workflow.query_step`
+        nodes (Optional[dict], optional): `status.nodes` of
+            `Workflow.query`, the graph of the steps. Defaults to None,
+            for pods without parents.
+
+    Returns:
+        List[dict]: records of the pods with their times in seconds since
+        epoch, sorted by start
+    """
+    nodes = nodes or {}
+    parents = pod_parents(nodes)
+    ret = []
+    for step in steps:
+        if getattr(step, "type", None) != "Pod":
+            continue
+        name = getattr(step, "displayName", None) or step.name
+        node_id = getattr(step, "id", None)
+        # template, like the steps of a loop, the pod runs in
+        boundary = nodes.get(getattr(step, "boundaryID", None)) or {}
+        ret.append({
+            "id": node_id,
+            "name": name,
+            "base": base_name(name),
+            "key": getattr(step, "key", None),
+            "phase": getattr(step, "phase", None),
+            "start": parse_time(getattr(step, "startedAt", None)),
+            "end": parse_time(getattr(step, "finishedAt", None)),
+            "parents": parents.get(node_id, []),
+            "boundary_start": parse_time(boundary.get("startedAt")),
+            "job": job_timing(step)
+        })
+    return sorted(
+        (record for record in ret if record["start"] is not None),
+        key=lambda record: record["start"]
+    )
+
+def percentiles(values: List[float], qs=(50, 90, 99)) -> Dict[str, float]:
+    """percentiles of durations, with their count, total and max"""
+    values = np.asarray(values, dtype=float)
+    ret = {"count": len(values), "total": float(values.sum())}
+    if len(values):
+        ret.update({f"p{q}": float(np.percentile(values, q)) for q in qs})
+        ret["max"] = float(values.max())
+    return ret
+
+def critical_path(records: List[dict]) -> List[dict]:
+    """chain of pods bounding the wall time: from the last pod to finish,
+    every predecessor is the parent of the pod finishing last
+
+    Args:
+        records (List[dict]): output of `step_records`
+
+    Returns:
+        List[dict]: records on the critical path, in order
+    """
+    done = [record for record in records if record["end"] is not None]
+    if not done:
+        return []
+    by_id = {record["id"]: record for record in done}
+    path = [max(done, key=lambda record: record["end"])]
+    while parents := [
+        by_id[parent] for parent in path[-1]["parents"] if parent in by_id
+    ]:
+        path.append(max(parents, key=lambda record: record["end"]))
+    return path[::-1]
+
+def summarize(records: List[dict], start: Optional[float] = None) -> dict:
+    """timeline report of the pods of a workflow, split in wait, queue and
+    run times:
+
+    - wait, from the end of the last parent of a pod, or from the start of
+      the template it runs in without parents, to its start, which
+      includes scheduling and image pulls.
+    - queue, of a dispatched step the time of its pod outside of the job,
+      which includes the upload, the queueing on the cluster and the
+      download. None when the step outputs no job `timing`, as it is not
+      known if and how long the step queued.
+    - run, of the job of a dispatched step, or of the pod otherwise.
+
+    Args:
+        records (List[dict]): output of `step_records`
+        start (Optional[float], optional): start of the workflow. Defaults
+            to None, the start of the first pod.
+
+    Returns:
+        dict: `span`, `steps` with their wait, queue and run times, `groups`
+        with the percentiles of their durations, and `critical_path`
+    """
+    if start is None:
+        start = min((record["start"] for record in records), default=0.0)
+    end = max(
+        (record["end"] or record["start"] for record in records), default=start
+    )
+    by_id = {record["id"]: record for record in records}
+    steps = []
+    for record in records:
+        ends = [
+            by_id[parent]["end"] for parent in record["parents"]
+            if parent in by_id and by_id[parent]["end"] is not None
+        ]
+        if ends:
+            ready = max(ends)
+        elif record["boundary_start"] is not None:
+            ready = record["boundary_start"]
+        else:
+            ready = start
+        run, queue = None, None
+        if record["end"] is not None:
+            run = record["end"] - record["start"]
+            if record["job"] is not None:
+                run = record["job"]["end"] - record["job"]["start"]
+                queue = record["end"] - record["start"] - run
+        steps.append({
+            **record,
+            "wait": max(record["start"] - ready, 0.0),
+            "queue": queue,
+            "run": run,
+            "offset": record["start"] - start
+        })
+
+    groups = {}
+    for step in steps:
+        groups.setdefault(step["base"], []).append(step)
+    group_stats = {}
+    for name, members in groups.items():
+        runs = [step["run"] for step in members if step["run"] is not None]
+        stats = percentiles(runs)
+        stats["wait"] = percentiles([step["wait"] for step in members])
+        stats["queue"] = percentiles(
+            [step["queue"] for step in members if step["queue"] is not None]
+        )
+        stats["phases"] = {
+            phase: sum(step["phase"] == phase for step in members)
+            for phase in sorted({str(step["phase"]) for step in members})
+        }
+        if runs and stats["p50"] > 0:
+            # long tail of slices
+            stats["straggler_ratio"] = stats["max"] / stats["p50"]
+        group_stats[name] = stats
+
+    path = critical_path(steps)
+    queues = [step["queue"] for step in path if step["queue"] is not None]
+    return {
+        "start": start,
+        "span": end - start,
+        "n_pods": len(steps),
+        "critical_path": {
+            "steps": [step["name"] for step in path],
+            "run": float(sum(step["run"] or 0.0 for step in path)),
+            # of the dispatched steps with a known queue only
+            "queue": float(sum(queues)) if queues else None,
+            "wait": float(sum(step["wait"] for step in path))
+        },
+        "groups": group_stats,
+        "steps": steps
+    }
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    hours, rest = divmod(int(round(seconds)), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+def format_text(report: dict) -> str:
+    """plain text summary of `summarize`"""
+    path = report['critical_path']
+    lines = [
+        f"wall time     {format_duration(report['span'])}",
+        f"pods          {report['n_pods']}",
+        f"critical path {format_duration(path['run'])} run, "
+        f"{format_duration(path['queue'])} queue, "
+        f"{format_duration(path['wait'])} wait",
+        "  " + " -> ".join(path['steps']),
+        "",
+        f"{'step':<24}{'count':>6}{'total':>10}{'p50':>10}{'p90':>10}"
+        f"{'max':>10}{'queue p50':>10}{'wait p50':>10}",
+    ]
+    groups = sorted(
+        report["groups"].items(), key=lambda item: -item[1]["total"]
+    )
+    for name, stats in groups:
+        lines.append(
+            f"{name:<24}{stats['count']:>6}"
+            + ''.join(
+                f"{format_duration(stats.get(key)):>10}"
+                for key in ["total", "p50", "p90", "max"]
+            )
+            + f"{format_duration(stats['queue'].get('p50')):>10}"
+            + f"{format_duration(stats['wait'].get('p50')):>10}"
+        )
+    return '\n'.join(lines) + '\n'
+
+def format_html(report: dict) -> str:
+    """html gantt chart of the pods of `summarize`, waits in grey and
+    queues in orange"""
+    span = report["span"] or 1.0
+    critical = set(report["critical_path"]["steps"])
+    rows = []
+    for step in report["steps"]:
+        left = (step["offset"] - step["wait"]) / span * 100
+        wait = step["wait"] / span * 100
+        queue = (step["queue"] or 0.0) / span * 100
+        run = (step["run"] or 0.0) / span * 100
+        color = "#d62728" if step["name"] in critical else "#1f77b4"
+        rows.append(
+            f'<tr><td>{html.escape(step["name"])}</td><td class="bar">'
+            f'<div style="margin-left:{left:.3f}%;width:{wait:.3f}%;'
+            f'background:#ccc"></div>'
+            f'<div style="width:{queue:.3f}%;background:#ff7f0e"></div>'
+            f'<div style="width:{run:.3f}%;background:{color}" '
+            f'title="wait {format_duration(step["wait"])}, '
+            f'queue {format_duration(step["queue"])}, '
+            f'run {format_duration(step["run"])}"></div></td></tr>'
+        )
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><style>'
+        'table{width:100%;border-collapse:collapse;font:12px monospace}'
+        'td{padding:1px 4px;white-space:nowrap}td.bar{width:80%}'
+        'td.bar div{display:inline-block;height:10px}'
+        '</style></head><body>'
+        f'<pre>{html.escape(format_text(report))}</pre>'
+        f'<table>{"".join(rows)}</table></body></html>\n'
+    )
+
+def write_report(
+    report: dict,
+    prefix: Union[str, Path] = "report",
+    html_gantt: bool = False
+) -> List[Path]:
+    """write `report.json`, `report.txt` and optionally `report.html`
+
+    Args:
+        report (dict): output of `summarize`
+        prefix (Union[str, Path], optional): prefix of the files.
+            Defaults to "report".
+        html_gantt (bool, optional): write the gantt chart.
+            Defaults to False.
+
+    Returns:
+        List[Path]: paths of the files
+    """
+    ret = [Path(f"{prefix}.json"), Path(f"{prefix}.txt")]
+    with open(ret[0], 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4)
+    ret[1].write_text(format_text(report), encoding='utf-8')
+    if html_gantt:
+        ret.append(Path(f"{prefix}.html"))
+        ret[2].write_text(format_html(report), encoding='utf-8')
+    return ret
+
+def workflow_report(
+    workflow_id: str,
+    prefix: Union[str, Path] = "report",
+    html_gantt: bool = False
+) -> dict:
+    """timeline report of a submitted workflow, see `summarize`
+
+    Args:
+        workflow_id (str): id of the workflow
+        prefix (Union[str, Path], optional): prefix of the files.
+            Defaults to "report".
+        html_gantt (bool, optional): write the gantt chart.
+            Defaults to False.
+
+    Returns:
+        dict: the report
+    """
+    from dflow import Workflow
+
+    info = Workflow(id=workflow_id).query()
+    status = getattr(info, "status", None)
+    records = step_records(info.get_step(), getattr(status, "nodes", None))
+    start = parse_time(getattr(status, "startedAt", None))
+    report = summarize(records, start)
+    report["workflow_id"] = workflow_id
+    write_report(report, prefix, html_gantt)
+    return report
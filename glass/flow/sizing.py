@@ -0,0 +1,333 @@
+import copy
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+# steps run by the dispatcher, which may have their own machines
+STEPS = ["run-md", "mini-snapshot", "rerun-snapshot"]
+# cpu machine types of Bohrium picked from by the automatic sizing
+DEFAULT_MACHINES = [
+    "c2_m4_cpu", "c4_m8_cpu", "c8_m16_cpu", "c16_m32_cpu", "c32_m64_cpu"
+]
+# keys of a profile passed to the launcher rather than to the dispatcher
+LAUNCH_KEYS = ["n_procs", "n_threads"]
+DEFAULT_SIZING = {
+    "target_hours": 24.0,
+    # below this, more cores of an md run do not speed it up
+    "min_atoms_per_core": 100,
+    "overhead_seconds": 0.0
+}
+
+
+def machine_cores(scass_type: Optional[str]) -> Optional[int]:
+    """number of cores of a machine type of Bohrium like c32_m64_cpu"""
+    match = re.match(r'c(\d+)_', scass_type or "")
+    return int(match.group(1)) if match else None
+
+def machine_list(machines: Optional[list] = None) -> List[dict]:
+    """machines with their cores and price per hour, the price defaults to
+    the cores, so that the cheapest machine is the one of fewest core-hours
+
+    Args:
+        machines (Optional[list], optional): machine types, or dicts with
+            `scass_type` and optionally `cores` and `price`. Defaults to
+            None, `DEFAULT_MACHINES`.
+
+    Raises:
+        ValueError: unknown number of cores
+
+    Returns:
+        List[dict]: machines sorted by cores
+    """
+    ret = []
+    for machine in machines or DEFAULT_MACHINES:
+        if isinstance(machine, str):
+            machine = {"scass_type": machine}
+        cores = machine.get("cores") or machine_cores(machine["scass_type"])
+        if not cores:
+            raise ValueError(
+                f"Unknown cores of machine {machine['scass_type']}"
+            )
+        ret.append({"price": cores, **machine, "cores": cores})
+    return sorted(ret, key=lambda machine: machine["cores"])
+
+def effective_cores(
+    n_atoms: int,
+    cores: int,
+    min_atoms_per_core: int = 100
+) -> int:
+    """cores an md run of `n_atoms` scales to on a machine of `cores`"""
+    return max(1, min(cores, n_atoms // max(1, min_atoms_per_core)))
+
+def predict_hours(
+    n_atoms: int,
+    n_steps: int,
+    cores: int,
+    rate: float,
+    overhead: float = 0.0,
+    min_atoms_per_core: int = 100
+) -> float:
+    """wall hours of a run with the throughput model
+    `seconds = overhead + atom_steps / (rate * effective_cores)`
+
+    Args:
+        n_atoms (int): number of atoms
+        n_steps (int): number of steps or force evaluations
+        cores (int): cores of the machine
+        rate (float): atom-steps per core-second
+        overhead (float, optional): seconds of a job besides its steps,
+            like the start of lammps. Defaults to 0.0.
+        min_atoms_per_core (int, optional): see `effective_cores`.
+            Defaults to 100.
+
+    Returns:
+        float: wall hours
+    """
+    used = effective_cores(n_atoms, cores, min_atoms_per_core)
+    return (overhead + n_atoms * n_steps / (rate * used)) / 3600
+
+def calibrate(
+    timings: List[dict],
+    min_atoms_per_core: int = 100
+) -> Dict[str, float]:
+    """fit the throughput model of `predict_hours` on past runs, by least
+    squares of their seconds against their atom-steps per effective core
+
+    Args:
+        timings (List[dict]): runs with `n_atoms`, `n_steps`, `cores` and
+            `seconds`
+        min_atoms_per_core (int, optional): see `effective_cores`.
+            Defaults to 100.
+
+    Raises:
+        ValueError: no timing
+
+    Returns:
+        Dict[str, float]: `atom_steps_per_core_second` and
+        `overhead_seconds`
+    """
+    if not timings:
+        raise ValueError("No timing to calibrate on")
+    x = np.array([
+        record["n_atoms"] * record["n_steps"] / effective_cores(
+            record["n_atoms"], record["cores"], min_atoms_per_core
+        )
+        for record in timings
+    ], dtype=float)
+    y = np.array([record["seconds"] for record in timings], dtype=float)
+    if len(x) > 1 and np.ptp(x) > 0:
+        slope, overhead = np.polyfit(x, y, 1)
+        if slope > 0 and overhead >= 0:
+            return {
+                "atom_steps_per_core_second": float(1 / slope),
+                "overhead_seconds": float(overhead)
+            }
+    # through the origin if the runs can not separate the overhead
+    return {
+        "atom_steps_per_core_second": float(x.sum() / y.sum()),
+        "overhead_seconds": 0.0
+    }
+
+def report_timings(
+    report: dict,
+    workloads: Dict[str, dict],
+    cores: Dict[str, int]
+) -> List[dict]:
+    """timings of the succeeded pods of a workflow report, to calibrate on
+
+    Args:
+        report (dict): output of `glass.flow.report.summarize`
+        workloads (Dict[str, dict]): output of `step_workloads` for the
+            parameters of the workflow
+        cores (Dict[str, int]): cores of the machine of every step
+
+    Returns:
+        List[dict]: timings of `calibrate`
+    """
+    ret = []
+    for step in report["steps"]:
+        # steps of replicas are suffixed like run-md-r0
+        name = re.sub(r'-r\d+$', '', step["base"])
+        if name not in workloads or name not in cores or step["run"] is None \
+                or step["phase"] != "Succeeded":
+            continue
+        ret.append({
+            **workloads[name], "cores": cores[name], "seconds": step["run"]
+        })
+    return ret
+
+def choose_machine(
+    n_atoms: int,
+    n_steps: int,
+    machines: List[dict],
+    rate: float,
+    overhead: float = 0.0,
+    target_hours: float = 24.0,
+    min_atoms_per_core: int = 100,
+    partitions: int = 1
+) -> dict:
+    """cheapest machine finishing a run within `target_hours`, or the
+    fastest one if none does, with the mpi processes and threads of lammps
+
+    Args:
+        n_atoms (int): number of atoms of the run, of all its partitions
+        n_steps (int): number of steps or force evaluations
+        machines (List[dict]): output of `machine_list`
+        rate (float): atom-steps per core-second
+        overhead (float, optional): seconds of a job besides its steps.
+            Defaults to 0.0.
+        target_hours (float, optional): wall hours aimed at.
+            Defaults to 24.0.
+        min_atoms_per_core (int, optional): see `effective_cores`.
+            Defaults to 100.
+        partitions (int, optional): partitions run side by side, the
+            processes are a multiple of them. Defaults to 1.
+
+    Returns:
+        dict: `scass_type`, `cores`, predicted `hours` and `cost`,
+        `n_procs` and `n_threads`
+    """
+    candidates = []
+    for machine in machines:
+        hours = predict_hours(
+            n_atoms, n_steps, machine["cores"], rate, overhead,
+            min_atoms_per_core
+        )
+        candidates.append({
+            **machine, "hours": hours, "cost": hours * machine["price"]
+        })
+    in_time = [
+        machine for machine in candidates if machine["hours"] <= target_hours
+    ]
+    if in_time:
+        # machines of the same cost up to rounding, the fastest of them
+        cheapest = min(machine["cost"] for machine in in_time)
+        ret = min(
+            (
+                machine for machine in in_time
+                if machine["cost"] <= cheapest * (1 + 1e-6)
+            ),
+            key=lambda machine: machine["hours"]
+        )
+    else:
+        ret = min(
+            candidates,
+            key=lambda machine: (machine["hours"], machine["cost"])
+        )
+    used = effective_cores(n_atoms, ret["cores"], min_atoms_per_core)
+    n_procs = max(partitions, used // partitions * partitions)
+    ret["n_procs"] = n_procs
+    # cores left by the processes go to the threads of deepmd
+    ret["n_threads"] = max(1, ret["cores"] // n_procs)
+    return ret
+
+def step_workloads(estimate: dict, n_partitions: int = 1) -> Dict[str, dict]:
+    """atoms and steps of a single job of every dispatched step
+
+    Args:
+        estimate (dict): output of `glass.flow.dry_run.estimate_cost` with
+            the number of atoms
+        n_partitions (int, optional): partitions of the md run.
+            Defaults to 1.
+
+    Returns:
+        Dict[str, dict]: `n_atoms` and `n_steps` by step
+    """
+    n_atoms = estimate["n_atoms"]
+    ret = {"run-md": {
+        "n_atoms": n_atoms * n_partitions, "n_steps": estimate["n_steps"]
+    }}
+    if estimate["n_snapshots"]:
+        per_run = estimate["n_snapshots"] // estimate["n_runs"]
+        # a rerun evaluates all the snapshots in one job
+        ret["mini-snapshot"] = {
+            "n_atoms": n_atoms, "n_steps": estimate["snapshot_evaluations"]
+        }
+        ret["rerun-snapshot"] = {"n_atoms": n_atoms, "n_steps": per_run}
+    return ret
+
+def load_timings(timings: Union[str, Path, List[dict]]) -> List[dict]:
+    if isinstance(timings, list):
+        return timings
+    with open(timings, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def step_profiles(
+    mdata: dict,
+    estimate: Optional[dict] = None,
+    n_partitions: int = 1
+) -> Dict[str, dict]:
+    """machine and launcher settings of every dispatched step. A profile of
+    `mdata["executors"]` sets the input data of the dispatcher of a step,
+    like its `scass_type`, and its `n_procs` and `n_threads`. With
+    `mdata["auto_sizing"]`, steps without a machine type get the one of
+    `choose_machine` with the throughput calibrated on `timings` if given.
+    Steps without profile nor sizing run on the default dispatcher.
+
+    Args:
+        mdata (dict): machine parameters
+        estimate (Optional[dict], optional): output of
+            `glass.flow.dry_run.estimate_cost`, required by the sizing.
+            Defaults to None.
+        n_partitions (int, optional): partitions of the md run.
+            Defaults to 1.
+
+    Returns:
+        Dict[str, dict]: `input_data` of the dispatcher, `launch` settings
+        and the predicted `hours` if sized, by step
+    """
+    default = (mdata.get("dispatcher") or {}).get("input_data") or {}
+    profiles = mdata.get("executors") or {}
+    sizing = mdata.get("auto_sizing")
+    workloads = {}
+    if sizing is not None and estimate and estimate.get("n_atoms"):
+        workloads = step_workloads(estimate, n_partitions)
+        sizing = {**DEFAULT_SIZING, **sizing}
+        rate = sizing.get(
+            "atom_steps_per_core_second",
+            estimate["atom_steps_per_core_second"]
+        )
+        overhead = sizing["overhead_seconds"]
+        if sizing.get("timings"):
+            model = calibrate(
+                load_timings(sizing["timings"]), sizing["min_atoms_per_core"]
+            )
+            rate = model["atom_steps_per_core_second"]
+            overhead = model["overhead_seconds"]
+
+    ret = {}
+    for name in STEPS:
+        profile = copy.deepcopy(profiles.get(name) or {})
+        launch = {
+            key: profile.pop(key) for key in LAUNCH_KEYS if key in profile
+        }
+        input_data = {**default, **profile}
+        ret[name] = {"input_data": input_data, "launch": launch}
+        if name not in workloads or (
+            "scass_type" in profile
+            and not machine_cores(profile["scass_type"])
+        ):
+            continue
+        # a machine type of the profile is kept, only its launch is sized
+        machines = [profile["scass_type"]] if "scass_type" in profile \
+            else sizing.get("machines")
+        chosen = choose_machine(
+            **workloads[name],
+            machines=machine_list(machines),
+            rate=rate,
+            overhead=overhead,
+            target_hours=sizing["target_hours"],
+            min_atoms_per_core=sizing["min_atoms_per_core"],
+            partitions=n_partitions if name == "run-md" else 1
+        )
+        input_data["scass_type"] = chosen["scass_type"]
+        ret[name]["launch"] = {
+            "n_procs": chosen["n_procs"],
+            "n_threads": chosen["n_threads"],
+            **launch
+        }
+        ret[name]["hours"] = chosen["hours"]
+    return ret
@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from dflow import download_artifact, upload_artifact
+from tqdm import tqdm
+
+
+def run_concurrently(
+    jobs: List[Callable[[], Any]],
+    max_workers: int = 8,
+    desc: str = "transfer",
+    progress: bool = True
+) -> List[Any]:
+    """run network bound jobs in a bounded thread pool, so that their time
+    is bound by the bandwidth rather than the latency of every request.
+    All the jobs are run even if some fail, then the first error is raised.
+
+    Args:
+        jobs (List[Callable[[], Any]]): jobs without arguments
+        max_workers (int, optional): max number of threads. Defaults to 8.
+        desc (str, optional): description of the progress bar.
+            Defaults to "transfer".
+        progress (bool, optional): show a progress bar. Defaults to True.
+
+    Returns:
+        List[Any]: result of every job, in order
+    """
+    results = [None] * len(jobs)
+    errors = []
+    with ThreadPoolExecutor(max(1, max_workers)) as pool, \
+            tqdm(total=len(jobs), desc=desc, disable=not progress) as bar:
+        futures = {pool.submit(job): i for i, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                errors.append(e)
+            bar.update()
+    if errors:
+        raise errors[0]
+    return results
+
+def upload_files(
+    paths: Dict[str, Optional[Union[str, Path]]],
+    upload: Callable = upload_artifact,
+    max_workers: int = 8,
+    progress: bool = True
+) -> Dict[str, Any]:
+    """upload files concurrently. `upload_artifact` changes the working
+    directory to pack a tar archive, which is not safe across threads, so
+    the artifacts are uploaded without archive.
+
+    Args:
+        paths (Dict[str, Optional[Union[str, Path]]]): files by name, None
+            is not uploaded
+        upload (Callable, optional): like `upload_artifact` or
+            `UploadRegistry.upload`. Defaults to `upload_artifact`.
+        max_workers (int, optional): max number of threads. Defaults to 8.
+        progress (bool, optional): show a progress bar. Defaults to True.
+
+    Returns:
+        Dict[str, Any]: artifact by name, or None
+    """
+    names = [name for name, path in paths.items() if path is not None]
+    artifacts = run_concurrently(
+        [
+            lambda path=paths[name]: upload(path, archive=None)
+            for name in names
+        ],
+        max_workers,
+        "upload",
+        progress
+    )
+    ret = dict.fromkeys(paths)
+    ret.update(zip(names, artifacts))
+    return ret
+
+def download_files(
+    artifacts: List[Tuple[Any, Union[str, Path]]],
+    max_workers: int = 8,
+    progress: bool = True,
+    **kwargs
+) -> List[Any]:
+    """download artifacts concurrently
+
+    Args:
+        artifacts (List[Tuple[Any, Union[str, Path]]]): artifact and its
+            local directory
+        max_workers (int, optional): max number of threads. Defaults to 8.
+        progress (bool, optional): show a progress bar. Defaults to True.
+        kwargs: passed to `download_artifact`
+
+    Returns:
+        List[Any]: downloaded paths of every artifact
+    """
+    return run_concurrently(
+        [
+            lambda artifact=artifact, path=path: download_artifact(
+                artifact, path=path, **kwargs
+            )
+            for artifact, path in artifacts
+        ],
+        max_workers,
+        "download",
+        progress
+    )
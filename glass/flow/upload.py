@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Union
+
+from dflow import S3Artifact, config, s3_config, upload_artifact
+from dflow.utils import MinioClient, StorageClient
+
+# registry of uploaded artifacts shared by the submissions of a user
+REGISTRY_FILE = Path(
+    os.environ.get(
+        "GLASS_UPLOAD_REGISTRY", Path.home() / ".glass" / "uploads.json"
+    )
+)
+
+
+class LocalStorageClient(StorageClient):
+    def __init__(self, root: Union[str, Path]) -> None:
+        """
+        Storage client keeping objects as files under `root`, a stand-in of
+        the object storage for tests and offline runs
+        """
+        self.root = Path(root)
+
+    def upload(self, key: str, path: str) -> None:
+        target = self.root / key
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, target)
+
+    def download(self, key: str, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(self.root / key, path)
+
+    def list(self, prefix: str, recursive: bool = False) -> List[str]:
+        if not self.root.is_dir():
+            return []
+        keys = [
+            str(path.relative_to(self.root))
+            for path in self.root.rglob('*') if path.is_file()
+        ]
+        return sorted(key for key in keys if key.startswith(prefix))
+
+    def copy(self, src: str, dst: str) -> None:
+        for key in self.list(src):
+            self.upload(dst + key[len(src):], str(self.root / key))
+
+    def get_md5(self, key: str) -> str:
+        md5 = hashlib.md5()
+        with open(self.root / key, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                md5.update(block)
+        return md5.hexdigest()
+
+
+def content_hash(path: Union[str, Path]) -> str:
+    """sha256 of a file or of the files of a directory, including their
+    names, since OPs may rely on the name of an artifact like the model"""
+    path = Path(path)
+    sha = hashlib.sha256(path.name.encode())
+    files = sorted(p for p in path.rglob('*') if p.is_file()) \
+        if path.is_dir() else [path]
+    for file in files:
+        sha.update(str(file.relative_to(path.parent)).encode())
+        with open(file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+    return sha.hexdigest()
+
+
+class UploadRegistry(object):
+    def __init__(
+        self,
+        registry_file: Union[str, Path] = REGISTRY_FILE,
+        storage_client: Optional[StorageClient] = None,
+        max_age: Optional[float] = None
+    ) -> None:
+        """
+        Storage keys of uploaded artifacts by the content hash of their
+        files, so that the same model or structure is uploaded once and
+        reused by later submissions while its key is still in the storage.
+        The storage client defaults to the one configured in dflow.
+
+        Args:
+            registry_file (Union[str, Path], optional): json file of the
+                records. Defaults to `REGISTRY_FILE`.
+            storage_client (Optional[StorageClient], optional): storage
+                client. Defaults to None, `s3_config["storage_client"]`.
+            max_age (Optional[float], optional): max age in days of a
+                record to be reused, for storages purging old objects.
+                Defaults to None, no limit.
+        """
+        self.registry_file = Path(registry_file)
+        self.storage_client = storage_client
+        self.max_age = max_age
+        self.lock = threading.Lock()
+
+    @property
+    def client(self) -> StorageClient:
+        if self.storage_client is not None:
+            return self.storage_client
+        return s3_config["storage_client"] or MinioClient()
+
+    def load(self) -> dict:
+        if not self.registry_file.is_file():
+            return {}
+        with open(self.registry_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save(self, records: dict):
+        """write the records atomically, other submissions may read them"""
+        self.registry_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = self.registry_file.with_name(
+            f'{self.registry_file.name}.{os.getpid()}'
+        )
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(records, f, indent=4)
+        os.replace(temp_file, self.registry_file)
+
+    def lookup(self, digest: str) -> Optional[dict]:
+        """record of a content hash, if its key is still valid
+
+        Args:
+            digest (str): output of `content_hash`
+
+        Returns:
+            Optional[dict]: `key` and `path_list` of the artifact
+        """
+        record = self.load().get(digest)
+        if record is None:
+            return None
+        if self.max_age is not None \
+                and time.time() - record["uploaded_at"] > self.max_age * 86400:
+            return None
+        if not self.client.list(prefix=record["key"]):
+            return None
+        return record
+
+    def upload(self, path: Union[str, Path], **kwargs) -> S3Artifact:
+        """upload a file or directory unless the same content was uploaded
+        before, in debug mode it is always uploaded
+
+        Args:
+            path (Union[str, Path]): file or directory
+            kwargs: passed to `upload_artifact`
+
+        Returns:
+            S3Artifact: the artifact
+        """
+        if config["mode"] == "debug" and not config["debug_s3"]:
+            return upload_artifact(path, **kwargs)
+        digest = content_hash(path)
+        record = self.lookup(digest)
+        if record is not None:
+            return S3Artifact(key=record["key"], path_list=record["path_list"])
+        artifact = upload_artifact(path, storage_client=self.client, **kwargs)
+        # uploads may run in threads
+        with self.lock:
+            records = self.load()
+            records[digest] = {
+                "key": artifact.key,
+                "path_list": artifact.path_list,
+                "path": str(Path(path).resolve()),
+                "uploaded_at": time.time()
+            }
+            self.save(records)
+        return artifact
@@ -0,0 +1,226 @@
+import glob
+import hashlib
+import json
+import os
+from collections import deque
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from glass.io.structure import Atoms, read_structure, write_poscar
+from glass.traj.traj import Traj, map_chunks
+
+# names of the inputs picked from a directory
+STRUCTURE_PATTERNS = [
+    "*.vasp", "*.poscar", "POSCAR*", "CONTCAR*", "*.cif", "*.xyz", "*.extxyz"
+]
+DUMP_PATTERNS = ["*.dump", "*.lammpstrj", "dump.*"]
+# suffix of the outputs
+OUTPUT_SUFFIX = {"lmp": ".data", "poscar": ".vasp"}
+MANIFEST = ".glass_convert.json"
+
+
+def collect_inputs(paths: List[str], patterns: List[str]) -> List[Path]:
+    """input files of globs, files and directories, in which the files
+    matching `patterns` are picked
+
+    Args:
+        paths (List[str]): globs, files or directories
+        patterns (List[str]): patterns of names in directories
+
+    Returns:
+        List[Path]: input files without duplicates, in order
+    """
+    ret = []
+    for path in paths:
+        for match in sorted(glob.glob(str(path), recursive=True)) or [path]:
+            match = Path(match)
+            if match.is_dir():
+                ret += sorted(
+                    file for file in match.iterdir()
+                    if file.is_file()
+                    and any(
+                        fnmatch(file.name, pattern) for pattern in patterns
+                    )
+                )
+            elif match.is_file():
+                ret.append(match)
+    return list(dict.fromkeys(ret))
+
+def output_paths(
+    inputs: List[Path],
+    to: str,
+    out_dir: Optional[Path] = None
+) -> List[Path]:
+    """outputs beside the inputs, or in `out_dir` keeping the paths of the
+    inputs relative to their common parent, so that inputs of the same name
+    in different directories do not collide
+
+    Args:
+        inputs (List[Path]): input files
+        to (str): "lmp" or "poscar"
+        out_dir (Optional[Path], optional): output directory. Defaults to
+            None.
+
+    Returns:
+        List[Path]: output file of every input
+    """
+    suffix = OUTPUT_SUFFIX[to]
+    resolved = [path.resolve() for path in inputs]
+    if out_dir is None or not resolved:
+        return [path.with_name(path.name + suffix) for path in resolved]
+    root = Path(os.path.commonpath([str(path.parent) for path in resolved]))
+    return [
+        Path(out_dir) / path.relative_to(root).with_name(path.name + suffix)
+        for path in resolved
+    ]
+
+def file_hash(path: Path, settings: dict) -> str:
+    """sha256 of the content of a file and the conversion settings"""
+    sha = hashlib.sha256(json.dumps(settings, sort_keys=True).encode())
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+def dump_to_atoms(filename: Path, type_map: dict) -> Atoms:
+    """last frame of a lammps dump"""
+    last = deque(Traj(str(filename)), maxlen=1)
+    if not last:
+        raise ValueError(f"No frame in {filename}")
+    frame = last[0]
+    elements = [type_map[str(i)] for i in range(len(type_map))]
+    return Atoms(frame["cell"], frame["coords"], frame["atom_types"], elements)
+
+def convert_file(
+    src: Path,
+    dst: Path,
+    to: str,
+    type_map: dict,
+    mass_map: Optional[dict] = None
+) -> Path:
+    """convert a structure to lammps data, or the last frame of a lammps
+    dump to POSCAR
+
+    Args:
+        src (Path): input file
+        dst (Path): output file
+        to (str): "lmp" or "poscar"
+        type_map (dict): type map start from zero {"0": H}
+        mass_map (Optional[dict], optional): atomic mass of chemical element
+            {"H": 1}, required by lammps data. Defaults to None.
+
+    Raises:
+        NotImplementedError: unknown output format
+
+    Returns:
+        Path: path of the output file
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if to == "lmp":
+        atoms = read_structure(src)
+        return atoms.to_lmp_data(type_map, mass_map, dst.parent, dst.name)
+    if to == "poscar":
+        return write_poscar(dump_to_atoms(src, type_map), dst)
+    raise NotImplementedError('Only lmp and poscar supported for now.')
+
+def _convert_chunk(
+    tasks: List[Tuple[Path, Path]],
+    to: str,
+    type_map: dict,
+    mass_map: Optional[dict]
+) -> List[Optional[str]]:
+    """convert a chunk of files, returning the error of every file or None"""
+    ret = []
+    for src, dst in tasks:
+        try:
+            convert_file(src, dst, to, type_map, mass_map)
+            ret.append(None)
+        except Exception as e:
+            ret.append(f"{type(e).__name__}: {e}")
+    return ret
+
+def convert_files(
+    paths: List[str],
+    to: str,
+    type_map: dict,
+    mass_map: Optional[dict] = None,
+    out_dir: Optional[Path] = None,
+    n_workers: int = 1,
+    chunk_size: int = 8,
+    force: bool = False
+) -> Dict[str, list]:
+    """convert many files in a process pool. Inputs are skipped if their
+    content and the settings hash the same as in the manifest of the last
+    run, or, without a record, if their output is newer than them.
+
+    Args:
+        paths (List[str]): globs, files or directories of inputs
+        to (str): "lmp" from structures, or "poscar" from lammps dumps
+        type_map (dict): type map start from zero {"0": H}
+        mass_map (Optional[dict], optional): atomic mass of chemical element
+            {"H": 1}, required by lammps data. Defaults to None.
+        out_dir (Optional[Path], optional): output directory. Defaults to
+            None, beside the inputs.
+        n_workers (int, optional): number of processes. Defaults to 1.
+        chunk_size (int, optional): number of files sent to a process at
+            once. Defaults to 8.
+        force (bool, optional): convert every input. Defaults to False.
+
+    Raises:
+        ValueError: no mass map for lammps data
+
+    Returns:
+        Dict[str, list]: `converted`, `skipped` outputs and `failed`
+        inputs with their errors
+    """
+    if to == "lmp" and not mass_map:
+        raise ValueError("mass_map is required by lammps data")
+    inputs = collect_inputs(
+        paths, STRUCTURE_PATTERNS if to == "lmp" else DUMP_PATTERNS
+    )
+    outputs = output_paths(inputs, to, out_dir)
+    manifest_file = Path(out_dir or '.') / MANIFEST
+    manifest = {}
+    if manifest_file.is_file():
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    settings = {"to": to, "type_map": type_map, "mass_map": mass_map}
+
+    ret = {"converted": [], "skipped": [], "failed": []}
+    tasks, hashes = [], []
+    for src, dst in zip(inputs, outputs):
+        digest = file_hash(src, settings)
+        record = manifest.get(str(src.resolve()))
+        if not force and dst.is_file() and (
+            record == digest if record is not None
+            else dst.stat().st_mtime >= src.stat().st_mtime
+        ):
+            manifest[str(src.resolve())] = digest
+            ret["skipped"].append(str(dst))
+            continue
+        tasks.append((src, dst))
+        hashes.append(digest)
+
+    chunks = [
+        tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)
+    ]
+    errors = [
+        error
+        for chunk in map_chunks(
+            _convert_chunk, chunks, n_workers, to, type_map, mass_map
+        )
+        for error in chunk
+    ]
+    for (src, dst), digest, error in zip(tasks, hashes, errors):
+        if error is None:
+            manifest[str(src.resolve())] = digest
+            ret["converted"].append(str(dst))
+        else:
+            manifest.pop(str(src.resolve()), None)
+            ret["failed"].append([str(src), error])
+
+    manifest_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=4)
+    return ret
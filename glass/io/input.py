@@ -1,6 +1,8 @@
+import copy
 import os
 import random
 import shutil
+from itertools import islice
 from pathlib import Path
 from typing import List, Optional
 
@@ -9,6 +11,9 @@ from dpdata import System
 from pymatgen.core.periodic_table import Element
 from pymatgen.core.structure import Structure
 
+from glass.io.protocol import PROTOCOLS, expand_protocol
+from glass.traj.traj import Traj, map_chunks
+
 
 def structure_to_sys(pmg_structure: Structure) -> System:
     r"""Convert dpdata.System object into pymatgen.Structure object
@@ -162,43 +167,238 @@ def convert_to_lmp_data(
     file_path = Path(work_dir) / 'lmp.data'
     return file_path
 
-def add_md_process(
+def lammps_cell(cell: np.ndarray) -> np.ndarray:
+    """rotate lattice vectors into the lower triangular form of lammps, with
+    `a` along x and `b` in the xy plane
+
+    Args:
+        cell (np.ndarray): lattice vectors as rows, in shape (3, 3)
+
+    Returns:
+        np.ndarray: rotated lattice vectors in shape (3, 3)
+    """
+    a, b, c = np.asarray(cell, dtype=float)
+    ax = np.linalg.norm(a)
+    bx = b @ a / ax
+    by = np.sqrt(b @ b - bx ** 2)
+    cx = c @ a / ax
+    cy = (b @ c - bx * cx) / by
+    cz = np.sqrt(c @ c - cx ** 2 - cy ** 2)
+    return np.array([[ax, 0, 0], [bx, by, 0], [cx, cy, cz]])
+
+def write_lmp_data(
+    cell: np.ndarray,
+    coords: np.ndarray,
+    atom_types: np.ndarray,
+    type_map: dict,
+    mass_map: dict,
+    work_dir: Path,
+    filename: str = 'lmp.data'
+) -> Path:
+    """write lammps data directly from arrays, in the same format as
+    `convert_to_lmp_data` but without building pymatgen or dpdata objects
+
+    Args:
+        cell (np.ndarray): lattice vectors as rows, in shape (3, 3)
+        coords (np.ndarray): cartesian coordinates in shape (n_atoms, 3)
+        atom_types (np.ndarray): atom types start from zero, as in type map
+        type_map (dict): type map start from zero {"0": H}
+        mass_map (dict): atomic mass of chemical element {"H": 1}
+        work_dir (Path): directory to write the data file
+        filename (str, optional): name of the data file.
+            Defaults to 'lmp.data'.
+
+    Returns:
+        Path: path of the data file
+    """
+    cell = np.asarray(cell, dtype=float)
+    new_cell = lammps_cell(cell)
+    coords = np.asarray(coords, dtype=float) @ np.linalg.inv(cell) @ new_cell
+    fmt = "%15.10f"
+    lines = ["\n"]
+    lines.append(f"{len(coords)} atoms\n")
+    lines.append(f"{len(type_map)} atom types\n")
+    for i, name in enumerate(["x", "y", "z"]):
+        lines.append(f"{fmt % 0} {fmt % new_cell[i][i]} {name}lo {name}hi\n")
+    tilt = (new_cell[1][0], new_cell[2][0], new_cell[2][1])
+    lines.append(' '.join(fmt % x for x in tilt) + " xy xz yz\n")
+    lines.append("\n")
+    lines.append("Masses\n")
+    lines.append("\n")
+    for key, element in type_map.items():
+        lines.append(f"{int(key) + 1} {mass_map[element]}\n")
+    lines.append("\n")
+    lines.append("Atoms # atomic\n")
+    lines.append("\n")
+    file_path = Path(work_dir) / filename
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+        np.savetxt(
+            f,
+            np.column_stack((
+                np.arange(1, len(coords) + 1),
+                np.asarray(atom_types) + 1,
+                coords
+            )),
+            fmt="%6d %6d" + f" {fmt}" * 3
+        )
+    return file_path
+
+def get_type_ids(type_map: dict) -> dict:
+    """map element to lammps atom type
+
+    Args:
+        type_map (dict): type map start from zero {"0": H}
+
+    Returns:
+        dict: lammps atom type start from one {"H": 1}
+    """
+    return {element: int(key) + 1 for key, element in type_map.items()}
+
+def add_insitu_analyses(
     param: list,
     param_dict: dict,
-    fix_id: int
+    fix_id: int,
+    type_map: Optional[dict] = None
 ):
-    """_summary_
+    """add in-situ analyses of a md process, each with its own output
+    frequency, so that averaged properties need no full-coordinate dump.
+
+    Supported keys of `param_dict`:
+        rdf: {"n_bins", "cutoff", "pairs", "n_every", "n_repeat", "n_freq"}
+            -> `{traj_file_name}.rdf` written by `fix ave/time`
+        pe_atom: {"freq"} -> `{traj_file_name}.pe_atom` per-atom dump
+        coord: {"cutoff", "freq"} -> `{traj_file_name}.coord` per-atom dump
+        msd: {"freq"} -> `{traj_file_name}.msd` with one column per element
 
     Args:
-        param (list): _description_
-        param_dict (dict): _description_
-        fix_id (int): _description_
+        param (list): lines of in.lmp
+        param_dict (dict): parameters of the md process
+        fix_id (int): id of the md process
+        type_map (Optional[dict], optional): type map, required by element
+            names in rdf pairs and by msd. Defaults to None.
+
+    Returns:
+        tuple: lines of in.lmp, and lines to clean up after the run
+
+    Raises:
+        ValueError: msd without a type map
+    """
+    traj = param_dict["traj_file_name"]
+    cleanup = []
+    if rdf := param_dict.get("rdf"):
+        pairs = ''
+        type_ids = get_type_ids(type_map) if type_map else {}
+        for pair in rdf.get("pairs", []):
+            pairs += ' ' + ' '.join(
+                str(type_ids.get(ele, ele)) for ele in pair
+            )
+        n_freq = rdf.get("n_freq", param_dict["dump_freq"])
+        n_every = rdf.get("n_every", n_freq)
+        n_repeat = rdf.get("n_repeat", n_freq // n_every)
+        cutoff = ''
+        if rdf.get("cutoff"):
+            cutoff = f' cutoff {rdf["cutoff"]}'
+            param.append(f'comm_modify     cutoff {rdf["cutoff"] + 1.0}\n')
+        param.append(f'compute         rdf{fix_id} all rdf {rdf.get("n_bins", 100)}{pairs}{cutoff}\n')
+        param.append(f'fix             rdf{fix_id} all ave/time {n_every} {n_repeat} {n_freq} \
+                     c_rdf{fix_id}[*] file {traj}.rdf mode vector\n')
+        cleanup += [f'unfix           rdf{fix_id}\n', f'uncompute       rdf{fix_id}\n']
+    if pe_atom := param_dict.get("pe_atom"):
+        param.append(f'compute         pe{fix_id} all pe/atom\n')
+        param.append(f'dump            pe{fix_id} all custom {pe_atom["freq"]} \
+                     {traj}.pe_atom id type c_pe{fix_id}\n')
+        param.append(f'dump_modify     pe{fix_id} sort id\n')
+        cleanup += [f'undump          pe{fix_id}\n', f'uncompute       pe{fix_id}\n']
+    if coord := param_dict.get("coord"):
+        param.append(f'compute         coord{fix_id} all coord/atom cutoff {coord["cutoff"]}\n')
+        param.append(f'dump            coord{fix_id} all custom {coord["freq"]} \
+                     {traj}.coord id type c_coord{fix_id}\n')
+        param.append(f'dump_modify     coord{fix_id} sort id\n')
+        cleanup += [f'undump          coord{fix_id}\n', f'uncompute       coord{fix_id}\n']
+    if msd := param_dict.get("msd"):
+        if not type_map:
+            raise ValueError(
+                f"In-situ msd of {traj} needs the type map of the elements"
+            )
+        columns = ''
+        for element, type_id in get_type_ids(type_map).items():
+            param.append(f'group           {element} type {type_id}\n')
+            param.append(f'compute         msd{fix_id}{element} {element} msd\n')
+            columns += f' c_msd{fix_id}{element}[4]'
+            cleanup.append(f'uncompute       msd{fix_id}{element}\n')
+        param.append(f'fix             msd{fix_id} all ave/time {msd["freq"]} 1 {msd["freq"]} \
+                     {columns.strip()} file {traj}.msd\n')
+        cleanup.insert(0, f'unfix           msd{fix_id}\n')
+    return param, cleanup
+
+def md_fix(param_dict: dict, stage: dict, fix_id: int) -> str:
+    """the thermostat fix of a md process for the temperatures of a stage
+
+    Args:
+        param_dict (dict): parameters of the md process
+        stage (dict): stage with `ini_t` and `final_t`
+        fix_id (int): id of the md process
 
     Raises:
-        NotImplementedError: _description_
+        NotImplementedError: unknown ensemble
 
     Returns:
-        _type_: _description_
+        str: the fix line of in.lmp
     """
-    param.append('thermo_style    custom step temp epair etotal econserve press density pe\n')
-    param.append(f'thermo          {param_dict["thermo_steps"]}\n')
     ensemble = param_dict["ensemble"]
     if ensemble == 'npt':
-        param.append(f'fix             {fix_id} all {ensemble} temp {param_dict["ini_t"]} \
-                     {param_dict["final_t"]} {param_dict["t_damp"]} {param_dict["p_style"]} \
-                        {param_dict["ini_p"]} {param_dict["final_p"]} {param_dict["p_damp"]}\n')
+        return f'fix             {fix_id} all {ensemble} temp {stage["ini_t"]} \
+                     {stage["final_t"]} {param_dict["t_damp"]} {param_dict["p_style"]} \
+                        {param_dict["ini_p"]} {param_dict["final_p"]} {param_dict["p_damp"]}\n'
     elif ensemble == 'nvt':
-        param.append(f'fix             {fix_id} all {ensemble} temp {param_dict["ini_t"]} \
-                     {param_dict["final_t"]} {param_dict["t_damp"]}\n')
+        return f'fix             {fix_id} all {ensemble} temp {stage["ini_t"]} \
+                     {stage["final_t"]} {param_dict["t_damp"]}\n'
     else:
         raise NotImplementedError('Only npt and nvt supported for now.')
+
+def add_md_process(
+    param: list,
+    param_dict: dict,
+    fix_id: int,
+    type_map: Optional[dict] = None
+):
+    """add a md process, run in one or several temperature stages which
+    share the dump and the in-situ analyses
+
+    Args:
+        param (list): lines of in.lmp
+        param_dict (dict): parameters of the md process, with optional
+            `stages` as a list of {"ini_t", "final_t", "n_steps"}, see
+            `glass.io.protocol`, and optional `seed` to create velocities
+        fix_id (int): id of the md process
+        type_map (Optional[dict], optional): type map, used by the in-situ
+            analyses, see `add_insitu_analyses`. Defaults to None.
+
+    Raises:
+        NotImplementedError: unknown ensemble
+
+    Returns:
+        list: lines of in.lmp
+    """
+    stages = param_dict.get("stages") or [param_dict]
+    param.append('thermo_style    custom step temp epair etotal econserve press density pe\n')
+    param.append(f'thermo          {param_dict["thermo_steps"]}\n')
+    param.append(md_fix(param_dict, stages[0], fix_id))
     param.append(f'timestep        {param_dict["time_step"]}\n')
     param.append('neighbor        1.0 bin\n')
     param.append('neigh_modify    every 2 delay 10 check yes\n')
     param.append(f'dump Dump{param_dict["traj_file_name"]} all custom {param_dict["dump_freq"]} \
                  {param_dict["traj_file_name"]}.lammpstrj id type x y z\n')
-    param.append(f'run             {param_dict["n_steps"]}\n')
-    param.append(f'unfix           {fix_id}\n')
+    param, cleanup = add_insitu_analyses(param, param_dict, fix_id, type_map)
+    if seed := param_dict.get("seed"):
+        param.append(f'velocity        all create {stages[0]["ini_t"]} {seed} dist gaussian\n')
+    for i, stage in enumerate(stages):
+        if i > 0:
+            param.append(md_fix(param_dict, stage, fix_id))
+        param.append(f'run             {stage["n_steps"]}\n')
+        param.append(f'unfix           {fix_id}\n')
+    param += cleanup
     return param
 
 def add_minimize(param: list, e_tol: float=1e-10, f_tol: float=1e-8):
@@ -215,26 +415,138 @@ def add_minimize(param: list, e_tol: float=1e-10, f_tol: float=1e-8):
     param.append(f'minimize        {e_tol} {f_tol} 10000 100000')
     return param
 
+def add_processes(
+    param: list,
+    processes: List[dict],
+    type_map: Optional[dict] = None
+) -> list:
+    """add the minimize, md_run and protocol processes to in.lmp
+
+    Args:
+        param (list): lines of in.lmp
+        processes (List[dict]): processes
+        type_map (Optional[dict], optional): type map. Defaults to None.
+
+    Raises:
+        NotImplementedError: unknown process
+
+    Returns:
+        list: lines of in.lmp
+    """
+    for sub_dict in processes:
+        if sub_dict.get('process') in PROTOCOLS:
+            sub_dict = expand_protocol(sub_dict)
+        if sub_dict.get('process') == 'minimize':
+            param = add_minimize(param)
+        elif sub_dict.get('process') == 'md_run':
+            param = add_md_process(
+                param,
+                sub_dict["params"],
+                sub_dict["_idx"],
+                type_map
+            )
+        else:
+            raise NotImplementedError(
+                f'only minimize, md_run and {", ".join(PROTOCOLS)} '
+                'supported for now.'
+            )
+    return param
+
+def partition_processes(processes: List[dict], partition: dict) -> List[dict]:
+    """processes of one partition, with its own seed and parameters
+
+    Args:
+        processes (List[dict]): processes shared by all the partitions
+        partition (dict): like {"seed": 1, "processes": {"1": {"rate": 1}}},
+            `seed` creates the velocities of the first md process, and
+            `processes` overrides the params of processes by `_idx`
+
+    Returns:
+        List[dict]: processes of the partition
+    """
+    processes = copy.deepcopy(processes)
+    overrides = partition.get("processes", {})
+    seeded = False
+    for sub_dict in processes:
+        sub_dict["params"] = {
+            **sub_dict.get("params", {}),
+            **overrides.get(str(sub_dict["_idx"]), {})
+        }
+        is_md = sub_dict.get("process") in ["md_run", *PROTOCOLS]
+        if is_md and not seeded and "seed" in partition:
+            sub_dict["params"]["seed"] = partition["seed"]
+            seeded = True
+    return processes
+
+def merge_world_lines(partitions: List[list]) -> list:
+    """merge the in.lmp lines of several partitions into a single in.lmp,
+    every value differing between partitions becoming a `world` variable
+
+    Args:
+        partitions (List[list]): lines of in.lmp of every partition
+
+    Raises:
+        ValueError: the partitions do not share the same commands
+
+    Returns:
+        list: lines of the merged in.lmp
+    """
+    if len({len(lines) for lines in partitions}) > 1:
+        raise ValueError("All partitions must run the same processes")
+    variables = []
+    merged = []
+    for lines in zip(*partitions):
+        if len(set(lines)) == 1:
+            merged.append(lines[0])
+            continue
+        tokens = [line.split() for line in lines]
+        if len({len(items) for items in tokens}) > 1:
+            raise ValueError(
+                f"Partitions differ in command: {lines[0].strip()}"
+            )
+        new = []
+        for values in zip(*tokens):
+            if len(set(values)) == 1:
+                new.append(values[0])
+                continue
+            name = f'{tokens[0][0]}_{len(variables) + 1}'
+            variables.append(f'variable        {name} world {" ".join(values)}\n')
+            new.append('${%s}' % name)
+        merged.append(' '.join(new) + '\n')
+    return variables + merged
+
 def build_in_lmp(
     processes: dict,
     # param: list,
     model_name: str,
     struc_file: str,
-    work_dir: Path
+    work_dir: Path,
+    type_map: Optional[dict] = None,
+    partitions: Optional[List[dict]] = None
 ) -> None:
-    """_summary_
+    """write in.lmp of the processes
+
+    With `partitions`, in.lmp runs one replica of the processes per lammps
+    partition (`lmp -partition Nx1`), each in its own `partition.{i}`
+    directory, so that replicas with different seeds or quench rates share
+    one job and one allocation. Values differing between replicas are
+    passed as `world` variables.
 
     Args:
-        config (dict): _description_
-        param (list): _description_
-        model_name (str): _description_
-        struc_file (str): _description_
+        processes (dict): processes
+        model_name (str): filename of the model
+        struc_file (str): filename of the lammps data
+        work_dir (Path): directory to write `in.lmp`
+        type_map (Optional[dict], optional): type map, used by the in-situ
+            analyses of md processes. Defaults to None.
+        partitions (Optional[List[dict]], optional): one dict per
+            partition, see `partition_processes`. Defaults to None.
 
     Raises:
-        NotImplementedError: _description_
+        NotImplementedError: unknown process
 
     Returns:
-        _type_: _description_
+        None
     """
     param = []
     param.append('units           metal\n')
@@ -243,26 +555,58 @@ def build_in_lmp(
     param.append('atom_modify     map array\n')
     param.append('boundary        p p p\n')
     param.append('atom_modify     sort 0 0.0\n')
-    param.append(f'read_data       {struc_file}\n')
-    param.append(f'pair_style      deepmd {model_name}\n')
+    if partitions:
+        ids = ' '.join(str(i) for i in range(len(partitions)))
+        param.append(f'variable        partition world {ids}\n')
+        param.append('shell           mkdir partition.${partition}\n')
+        param.append('shell           cd partition.${partition}\n')
+        param.append(f'read_data       ../{struc_file}\n')
+        param.append(f'write_data      {struc_file} nocoeff\n')
+        param.append(f'pair_style      deepmd ../{model_name}\n')
+    else:
+        param.append(f'read_data       {struc_file}\n')
+        param.append(f'pair_style      deepmd {model_name}\n')
     param.append('pair_coeff      * *\n')
-    if processes:
-        for sub_dict in processes:
-            if sub_dict.get('process') == 'minimize':
-                param = add_minimize(param)
-            elif sub_dict.get('process') == 'md_run':
-                param = add_md_process(param, sub_dict["params"], sub_dict["_idx"])
-            else:
-                raise NotImplementedError('only minimize and md_run supported for now.')
+    if processes and partitions:
+        param += merge_world_lines([
+            add_processes(
+                [], partition_processes(processes, partition), type_map
+            )
+            for partition in partitions
+        ])
+    elif processes:
+        param = add_processes(param, processes, type_map)
     with open(Path(work_dir) / 'in.lmp', 'w') as file:
         file.writelines(param)
     return None
 
+def _stage_snapshots(
+    frames: List[dict],
+    type_map: dict,
+    mass_map: dict,
+    work_dir: Path
+) -> int:
+    """write the lammps data of a chunk of selected frames, see
+    `grasp_strucs_from_traj`"""
+    for frame in frames:
+        name = f'lmp-{frame["index"]}'
+        write_lmp_data(
+            frame["cell"], frame["coords"], frame["atom_types"],
+            type_map, mass_map, work_dir, f'{name}.data'
+        )
+        os.makedirs(work_dir / name, exist_ok=True)
+        shutil.copy(work_dir / f'{name}.data', work_dir / name / 'lmp.data')
+    return len(frames)
+
 def grasp_strucs_from_traj(
         traj_name: str,
         every_n_frame: int,
         type_map: dict,
         mass_map: dict,
+        wave: int = 0,
+        wave_size: Optional[int] = None,
+        n_workers: int = 1,
+        chunk_size: int = 8
     ) -> List[Path]:
     """This function is used to grasp single structures from a lammps trajectory
 
@@ -271,25 +615,56 @@ def grasp_strucs_from_traj(
         every_n_frame (int): select frame from the traj every n frames
         type_map (dict): type map
         mass_map (dict): mass map
+        wave (int, optional): index of the wave to grasp. Defaults to 0.
+        wave_size (Optional[int], optional): if set, the selected frames are
+            split into interleaved waves of about `wave_size` frames, and only
+            the frames of `wave` are grasped. Defaults to None.
+        n_workers (int, optional): number of processes writing the lammps
+            data, the frames are passed in shared memory. Defaults to 1.
+        chunk_size (int, optional): number of frames sent to a process at
+            once. Defaults to 8.
+    """
+    start, step = 0, every_n_frame
+    if wave_size:
+        n_selected = -(-count_frames(traj_name) // every_n_frame)
+        n_waves = get_n_waves(n_selected, wave_size)
+        # the frames of the wave only are parsed
+        start, step = every_n_frame * wave, every_n_frame * n_waves
+    frames = (
+        {**frame, "index": i}
+        for i, frame in enumerate(Traj(traj_name).iter_frames(step, start))
+    )
+    chunks = iter(lambda: list(islice(frames, chunk_size)), [])
+    n_frames = sum(map_chunks(
+        _stage_snapshots, chunks, n_workers,
+        type_map, mass_map, Path.cwd(), shared=True
+    ))
+    return [Path(f'lmp-{i}') for i in range(n_frames)]
+
+def get_n_waves(n_frames: int, wave_size: int) -> int:
+    """number of interleaved waves needed to cover `n_frames` frames
+
+    Args:
+        n_frames (int): number of selected frames
+        wave_size (int): number of frames in each wave
+
+    Returns:
+        int: number of waves
+    """
+    return max(1, -(-n_frames // wave_size))
+
+def count_frames(traj_name: str) -> int:
+    """count the frames of a lammps trajectory without parsing them
+
+    Args:
+        traj_name (str): filename of the traj
+
+    Returns:
+        int: number of frames
     """
-    total_strucs = System(traj_name, 'lammps/dump')
-    selected_strucs = total_strucs[::every_n_frame]
-    list_path = []
-    for i, frame in enumerate(selected_strucs):
-        frame.to('lmp', f'lmp-{i}.data')
-        with open(f'lmp-{i}.data', 'r') as fp:
-            lines = fp.readlines()
-            new_lines = lines[0:8]
-            new_lines.append('\n')
-            new_lines.append('Masses\n')
-            new_lines.append('\n')
-            for ele_type in type_map.keys():
-                new_lines.append(f'{int(ele_type[-1]) + 1} {mass_map[type_map[ele_type]]}\n')
-            new_lines.append('\n')
-            new_lines += lines[8:]
-        with open(f'lmp-{i}.data', 'w') as f:
-            f.writelines(new_lines)
-        os.makedirs(f'lmp-{i}', exist_ok=True)
-        shutil.copy(f'lmp-{i}.data', Path(f'lmp-{i}') / 'lmp.data')
-        list_path.append(Path(f'lmp-{i}'))
-    return list_path
+    n_frames = 0
+    with open(traj_name, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('ITEM: TIMESTEP'):
+                n_frames += 1
+    return n_frames
@@ -3,9 +3,10 @@ from pathlib import Path
 from typing import List
 
 from dflow.python import OP, OPIO, Artifact, OPIOSign, Parameter
-from pymatgen.core.structure import Structure
 
-from glass.io.input import build_in_lmp, convert_to_lmp_data, get_dope
+from glass.io.input import build_in_lmp, get_dope
+from glass.io.packing import random_packing_lmp_data
+from glass.io.structure import Atoms, read_structure
 
 
 class DopeStrucPrep(OP):
@@ -44,7 +45,7 @@ class DopeStrucPrep(OP):
         compen_type = op_in["compen_type"]
         type_map = op_in["type_map"]
         mass_map = op_in["mass_map"]
-        structure = Structure.from_file(filename)
+        structure = read_structure(filename).to_structure()
         new_structure = get_dope(
             structure, method,
             dopant_ratio,
@@ -53,7 +54,11 @@ class DopeStrucPrep(OP):
             compen_ratio,
             compen_type
         )
-        dir_path = convert_to_lmp_data(new_structure, type_map, mass_map)
+        dir_path = Atoms.from_structure(new_structure).to_lmp_data(
+            type_map,
+            mass_map,
+            Path(".")
+        )
         op_out = {
             "dir_path": dir_path
         }
@@ -72,7 +77,9 @@ class MDInputPrepOP(OP):
             "processes": Parameter(List[dict], default=None),
             "in_lmp": Artifact(Path),
             "model": Artifact(Path),
-            "pmg_struc": Artifact(Path),
+            "pmg_struc": Artifact(Path, optional=True),
+            "packing": Parameter(dict, default=None),
+            "partitions": Parameter(List[dict], default=None),
             "type_map": Parameter(dict),
             "mass_map": Parameter(dict)
         })
@@ -91,16 +98,34 @@ class MDInputPrepOP(OP):
         model = op_in["model"]
         shutil.copy(model, dir_path)
         struc = op_in["pmg_struc"]
-        pmg_struc = Structure.from_file(struc)
         type_map = op_in["type_map"]
         mass_map = op_in["mass_map"]
-        file_path = convert_to_lmp_data(pmg_struc, type_map, mass_map, dir_path)
+        if struc is not None:
+            file_path = read_structure(struc).to_lmp_data(
+                type_map, mass_map, dir_path
+            )
+        elif op_in["packing"]:
+            file_path = random_packing_lmp_data(
+                type_map,
+                mass_map,
+                dir_path,
+                **op_in["packing"]
+            )
+        else:
+            raise ValueError("Either pmg_struc or packing is required")
         in_lmp = op_in["in_lmp"]
         if in_lmp:
             shutil.move(in_lmp, dir_path)
         else:
             processes = op_in["processes"]
-            build_in_lmp(processes, model.name, file_path.name, dir_path)
+            build_in_lmp(
+                processes,
+                model.name,
+                file_path.name,
+                dir_path,
+                type_map,
+                op_in["partitions"]
+            )
         op_out = {
             "run_path": dir_path
         }
@@ -0,0 +1,248 @@
+from itertools import product
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from pymatgen.core.composition import Composition
+from pymatgen.core.periodic_table import Element
+from pymatgen.core.structure import Structure
+
+from glass.io.input import write_lmp_data
+
+# g/cm^3 of 1 amu per angstrom^3
+AMU_A3_TO_G_CM3 = 1.66053907
+
+
+class CellList(object):
+    def __init__(
+        self,
+        length: float,
+        cutoff: float,
+        capacity: int = 8
+    ) -> None:
+        """
+        Atoms of a cubic periodic box binned into cells no smaller than
+        `cutoff`, so that all the atoms within `cutoff` of a point are in
+        the 27 cells around it. `grid[c]` holds the indices of the atoms of
+        cell `c`, padded with -1.
+        """
+        self.length = length
+        self.n_cells = max(1, int(length // cutoff))
+        self.width = length / self.n_cells
+        self.grid = np.full((self.n_cells ** 3, capacity), -1, dtype=int)
+        self.counts = np.zeros(self.n_cells ** 3, dtype=int)
+        self.stencil = np.array(list(product([-1, 0, 1], repeat=3)))
+
+    def cell_index(self, points: np.ndarray) -> np.ndarray:
+        """flat index of the cells of points in shape (n_points, 3)"""
+        index = np.floor(points / self.width).astype(int) % self.n_cells
+        return np.ravel_multi_index(index.T, (self.n_cells,) * 3)
+
+    def candidates(self, points: np.ndarray) -> np.ndarray:
+        """atoms in the 27 cells around every point, padded with -1
+
+        Args:
+            points (np.ndarray): coordinates in shape (n_points, 3)
+
+        Returns:
+            np.ndarray: atom indices in shape (n_points, 27 * capacity)
+        """
+        index = np.floor(points / self.width).astype(int)
+        around = (index[:, None, :] + self.stencil[None, :, :]) % self.n_cells
+        flat = np.ravel_multi_index(
+            around.reshape(-1, 3).T,
+            (self.n_cells,) * 3
+        ).reshape(len(points), -1)
+        return self.grid[flat].reshape(len(points), -1)
+
+    def insert(self, atom: int, point: np.ndarray):
+        """add an atom at `point`, growing the cells if full"""
+        cell = self.cell_index(point[None, :])[0]
+        if self.counts[cell] == self.grid.shape[1]:
+            self.grid = np.pad(
+                self.grid,
+                ((0, 0), (0, self.grid.shape[1])),
+                constant_values=-1
+            )
+        self.grid[cell, self.counts[cell]] = atom
+        self.counts[cell] += 1
+
+
+def distance_matrix(
+    elements: List[str],
+    min_distances: Dict[str, float],
+    default_distance: float = 1.0
+) -> np.ndarray:
+    """min distance of every pair of elements
+
+    Args:
+        elements (List[str]): elements
+        min_distances (Dict[str, float]): min distances like {"Si-O": 1.5}
+        default_distance (float, optional): min distance of the pairs not
+            given. Defaults to 1.0.
+
+    Returns:
+        np.ndarray: symmetric min distances in shape
+        (n_elements, n_elements)
+    """
+    matrix = np.full((len(elements), len(elements)), float(default_distance))
+    for pair, distance in min_distances.items():
+        a, b = (elements.index(element) for element in pair.split('-'))
+        matrix[a, b] = matrix[b, a] = distance
+    return matrix
+
+def pack_atoms(
+    counts: List[int],
+    length: float,
+    distances: np.ndarray,
+    seed: Optional[int] = 42,
+    batch_size: int = 256,
+    max_trials: int = 1000
+) -> Tuple[np.ndarray, np.ndarray]:
+    """random sequential insertion of atoms in a cubic periodic box. Every
+    batch of candidates is checked at once against the atoms of the 27
+    cells around them, then against the accepted candidates of the batch.
+
+    Args:
+        counts (List[int]): number of atoms of every type
+        length (float): length of the box
+        distances (np.ndarray): min distance of every pair of types
+        seed (Optional[int], optional): random seed. Defaults to 42.
+        batch_size (int, optional): candidates in a batch. Defaults to 256.
+        max_trials (int, optional): max candidates per atom before giving
+            up. Defaults to 1000.
+
+    Raises:
+        ValueError: the min distances are too large for the box, or the
+            atoms can not be packed
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: coordinates in shape (n_atoms, 3) and
+        types of atoms
+    """
+    cutoff = distances.max()
+    if cutoff >= length / 2:
+        raise ValueError(
+            f"Min distance {cutoff} is too large for a box of {length}"
+        )
+    rng = np.random.default_rng(seed)
+    cells = CellList(length, cutoff)
+    coords = np.zeros((sum(counts), 3))
+    types = np.zeros(sum(counts), dtype=int)
+    limits = distances ** 2
+    n_placed = 0
+    # the most constrained types first
+    for type_i in np.argsort(-np.diag(distances), kind='stable'):
+        n_target = n_placed + counts[type_i]
+        n_trials = 0
+        while n_placed < n_target:
+            if n_trials > max_trials * counts[type_i]:
+                raise ValueError(
+                    f"Could not pack {counts[type_i]} atoms of type {type_i}, "
+                    "lower the density or the min distances"
+                )
+            points = rng.random((batch_size, 3)) * length
+            n_trials += batch_size
+            neighbors = cells.candidates(points)
+            delta = points[:, None, :] - coords[neighbors]
+            delta -= length * np.round(delta / length)
+            dist2 = np.einsum('ijk,ijk->ij', delta, delta)
+            clash = (neighbors >= 0) \
+                & (dist2 < limits[type_i, types[neighbors]])
+            points = points[~clash.any(axis=1)]
+            # candidates of the batch may still clash with each other
+            delta = points[:, None, :] - points[None, :, :]
+            delta -= length * np.round(delta / length)
+            clash = np.einsum('ijk,ijk->ij', delta, delta) \
+                < limits[type_i, type_i]
+            accepted = []
+            for i in range(len(points)):
+                if n_placed + len(accepted) == n_target:
+                    break
+                if not clash[i, accepted].any():
+                    accepted.append(i)
+            for point in points[accepted]:
+                coords[n_placed] = point
+                types[n_placed] = type_i
+                cells.insert(n_placed, point)
+                n_placed += 1
+    return coords, types
+
+def random_packing(
+    composition: Union[str, dict],
+    density: float,
+    min_distances: Dict[str, float],
+    n_formula: int = 1,
+    default_distance: float = 1.0,
+    seed: Optional[int] = 42,
+    batch_size: int = 256,
+    max_trials: int = 1000
+) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """random packing of atoms in a cubic periodic cell of given density,
+    used as initial structure of a melt-quench instead of a crystal
+
+    Args:
+        composition (Union[str, dict]): formula like "SiO2", or number of
+            atoms of every element like {"Si": 64, "O": 128}
+        density (float): density in g/cm^3
+        min_distances (Dict[str, float]): min distances like {"Si-O": 1.5}
+        n_formula (int, optional): number of formula units. Defaults to 1.
+        default_distance (float, optional): min distance of the pairs not
+            given. Defaults to 1.0.
+        seed (Optional[int], optional): random seed. Defaults to 42.
+        batch_size (int, optional): see `pack_atoms`. Defaults to 256.
+        max_trials (int, optional): see `pack_atoms`. Defaults to 1000.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, List[str]]: cell in shape (3, 3),
+        cartesian coordinates in shape (n_atoms, 3), and element of every
+        atom
+    """
+    composition = Composition(composition) * n_formula
+    elements = [str(element) for element in composition.elements]
+    counts = [composition[element] for element in elements]
+    if any(abs(count - round(count)) > 1e-8 for count in counts):
+        raise ValueError(f"Non-integer number of atoms in {composition}")
+    counts = [int(round(count)) for count in counts]
+    mass = sum(
+        Element(element).atomic_mass * count
+        for element, count in zip(elements, counts)
+    )
+    length = (mass * AMU_A3_TO_G_CM3 / density) ** (1 / 3)
+    coords, types = pack_atoms(
+        counts,
+        length,
+        distance_matrix(elements, min_distances, default_distance),
+        seed,
+        batch_size,
+        max_trials
+    )
+    return np.eye(3) * length, coords, [elements[i] for i in types]
+
+def random_packing_structure(**kwargs) -> Structure:
+    """random packing as a pymatgen structure, see `random_packing`"""
+    cell, coords, species = random_packing(**kwargs)
+    return Structure(cell, species, coords, coords_are_cartesian=True)
+
+def random_packing_lmp_data(
+    type_map: dict,
+    mass_map: dict,
+    work_dir: Path,
+    **kwargs
+) -> Path:
+    """write a random packing directly to lammps data, see `random_packing`
+
+    Args:
+        type_map (dict): type map start from zero {"0": H}
+        mass_map (dict): atomic mass of chemical element {"H": 1}
+        work_dir (Path): directory to write `lmp.data`
+
+    Returns:
+        Path: path of `lmp.data`
+    """
+    cell, coords, species = random_packing(**kwargs)
+    type_index = {element: int(key) for key, element in type_map.items()}
+    atom_types = np.array([type_index[element] for element in species])
+    return write_lmp_data(
+        cell, coords, atom_types, type_map, mass_map, work_dir
+    )
@@ -0,0 +1,92 @@
+import copy
+from typing import List
+
+PROTOCOLS = ["melt", "quench", "anneal", "cool"]
+
+
+def n_steps_of(params: dict, time_step: float) -> int:
+    """number of steps of a stage given as `n_steps` or `time` in ps"""
+    if "n_steps" in params:
+        return int(params["n_steps"])
+    return int(round(params["time"] / time_step))
+
+def ramp_steps(
+    ini_t: float,
+    final_t: float,
+    rate: float,
+    time_step: float
+) -> int:
+    """number of steps to change the temperature at `rate` in K/ps"""
+    return max(1, int(round(abs(final_t - ini_t) / rate / time_step)))
+
+def protocol_stages(process: str, params: dict) -> List[dict]:
+    """temperature stages of a protocol template
+
+    Templates and their parameters:
+        melt: {"temp", "time" or "n_steps"} hold at a high temperature
+        anneal: {"temp", "time" or "n_steps"} hold at a temperature
+        cool: {"ini_t", "final_t", "rate"} ramp at `rate` in K/ps
+        quench: {"ini_t", "stages": [{"final_t", "rate"}, ...]} ramps in
+            several stages, each with its own rate, or {"ini_t", "final_t",
+            "rate"} for a single one. A stage with `time` or `n_steps`
+            instead of `rate` holds at its `final_t`.
+
+    Args:
+        process (str): one of `PROTOCOLS`
+        params (dict): parameters of the template
+
+    Raises:
+        NotImplementedError: unknown template
+
+    Returns:
+        List[dict]: stages with `ini_t`, `final_t` and `n_steps`
+    """
+    time_step = params["time_step"]
+    if process in ["melt", "anneal"]:
+        return [{
+            "ini_t": params["temp"],
+            "final_t": params["temp"],
+            "n_steps": n_steps_of(params, time_step)
+        }]
+    if process in ["cool", "quench"]:
+        stages = params.get("stages") or [params]
+        ret = []
+        temp = params["ini_t"]
+        for stage in stages:
+            final_t = stage["final_t"]
+            if "rate" in stage:
+                n_steps = ramp_steps(temp, final_t, stage["rate"], time_step)
+                ret.append({
+                    "ini_t": temp, "final_t": final_t, "n_steps": n_steps
+                })
+            else:
+                ret.append({
+                    "ini_t": final_t,
+                    "final_t": final_t,
+                    "n_steps": n_steps_of(stage, time_step)
+                })
+            temp = final_t
+        return ret
+    raise NotImplementedError(
+        f'Only {", ".join(PROTOCOLS)} supported for now.'
+    )
+
+def expand_protocol(sub_dict: dict) -> dict:
+    """turn a process using a protocol template into a `md_run` process
+    with several stages, which share the dump and the in-situ analyses
+
+    Args:
+        sub_dict (dict): process like {"_idx": 0, "process": "quench",
+            "params": {...}}, the params also include those of `md_run`
+            except the temperatures and `n_steps`
+
+    Returns:
+        dict: the `md_run` process
+    """
+    params = copy.deepcopy(sub_dict["params"])
+    stages = protocol_stages(sub_dict["process"], params)
+    params["stages"] = stages
+    params["ini_t"] = stages[0]["ini_t"]
+    params["final_t"] = stages[-1]["final_t"]
+    params["n_steps"] = sum(stage["n_steps"] for stage in stages)
+    return {**sub_dict, "process": "md_run", "params": params}
@@ -0,0 +1,396 @@
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from pymatgen.core.structure import Structure
+
+from glass.io.input import write_lmp_data
+
+
+class Atoms(object):
+    def __init__(
+        self,
+        cell: np.ndarray,
+        coords: np.ndarray,
+        codes: np.ndarray,
+        elements: List[str]
+    ) -> None:
+        """
+        Periodic structure held as arrays: lattice vectors as rows in
+        `cell`, cartesian `coords` in shape (n_atoms, 3), and the species of
+        every atom as `codes` indexing `elements`. Lighter than a pymatgen
+        `Structure`, which builds a `Site` object per atom.
+        """
+        self.cell = np.asarray(cell, dtype=float).reshape(3, 3)
+        self.coords = np.asarray(coords, dtype=float).reshape(-1, 3)
+        self.codes = np.asarray(codes, dtype=int)
+        self.elements = list(elements)
+
+    def __len__(self) -> int:
+        return len(self.coords)
+
+    @classmethod
+    def from_symbols(
+        cls,
+        cell: np.ndarray,
+        coords: np.ndarray,
+        symbols: List[str]
+    ) -> 'Atoms':
+        """atoms from the element of every atom, in order of appearance"""
+        elements, first, codes = np.unique(
+            np.asarray(symbols, dtype=str),
+            return_index=True,
+            return_inverse=True
+        )
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        return cls(
+            cell, coords, rank[codes.reshape(-1)], elements[order].tolist()
+        )
+
+    @classmethod
+    def from_structure(cls, structure: Structure) -> 'Atoms':
+        """atoms of a pymatgen structure"""
+        return cls.from_symbols(
+            structure.lattice.matrix,
+            structure.cart_coords,
+            [site.specie.symbol for site in structure]
+        )
+
+    @property
+    def symbols(self) -> List[str]:
+        """element of every atom"""
+        return [self.elements[code] for code in self.codes]
+
+    @property
+    def frac_coords(self) -> np.ndarray:
+        """fractional coordinates"""
+        return self.coords @ np.linalg.inv(self.cell)
+
+    def atom_types(self, type_map: dict) -> np.ndarray:
+        """atom types of a type map start from zero {"0": H}
+
+        Raises:
+            ValueError: an element is not in the type map
+        """
+        type_index = {element: int(key) for key, element in type_map.items()}
+        missing = [
+            element for element in self.elements if element not in type_index
+        ]
+        if missing:
+            raise ValueError(f"Elements {missing} not in type map {type_map}")
+        types = np.array([type_index[element] for element in self.elements])
+        return types[self.codes]
+
+    def to_structure(self) -> Structure:
+        """pymatgen structure, only for operations that need one"""
+        return Structure(
+            self.cell, self.symbols, self.coords, coords_are_cartesian=True
+        )
+
+    def to_lmp_data(
+        self,
+        type_map: dict,
+        mass_map: dict,
+        work_dir: Path,
+        filename: str = 'lmp.data'
+    ) -> Path:
+        """write lammps data, see `write_lmp_data`"""
+        return write_lmp_data(
+            self.cell,
+            self.coords,
+            self.atom_types(type_map),
+            type_map,
+            mass_map,
+            work_dir,
+            filename
+        )
+
+
+def read_poscar(filename: Union[str, Path]) -> Atoms:
+    """read a POSCAR of vasp 5, or of vasp 4 with the elements in the
+    comment line
+
+    Args:
+        filename (Union[str, Path]): POSCAR file
+
+    Raises:
+        ValueError: the elements are not given
+
+    Returns:
+        Atoms: the structure
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        header = [f.readline() for _ in range(9)]
+        scale = float(header[1].split()[0])
+        cell = np.array(
+            [line.split()[:3] for line in header[2:5]], dtype=float
+        )
+        tokens = header[5].split()
+        if tokens[0].isdigit():
+            counts = [int(x) for x in tokens]
+            elements = header[0].split()[:len(counts)]
+            if len(elements) < len(counts):
+                raise ValueError(f"Elements not given in {filename}")
+            line = 6
+        else:
+            elements = [
+                element.split('/')[0].split('_')[0] for element in tokens
+            ]
+            counts = [int(x) for x in header[6].split()]
+            line = 7
+        if header[line].strip()[0] in 'sS':
+            line += 1
+        cartesian = header[line].strip()[0] in 'cCkK'
+        # the rest of the lines after the header, read at once
+        f.seek(0)
+        for _ in range(line + 1):
+            f.readline()
+        coords = np.loadtxt(
+            f, usecols=(0, 1, 2), max_rows=sum(counts), ndmin=2
+        )
+    if scale < 0:
+        scale = (-scale / abs(np.linalg.det(cell))) ** (1 / 3)
+    cell *= scale
+    coords = coords * scale if cartesian else coords @ cell
+    symbols = np.repeat(elements, counts)
+    return Atoms.from_symbols(cell, coords, symbols)
+
+def _parse_properties(properties: str) -> Dict[str, Tuple[int, int]]:
+    """columns of the properties of extxyz like species:S:1:pos:R:3"""
+    fields = properties.split(':')
+    ret, column = {}, 0
+    for name, n in zip(fields[0::3], fields[2::3]):
+        ret[name] = (column, column + int(n))
+        column += int(n)
+    return ret
+
+def read_extxyz(filename: Union[str, Path]) -> Atoms:
+    """read the first frame of an extended xyz file
+
+    Args:
+        filename (Union[str, Path]): extxyz file
+
+    Raises:
+        ValueError: no lattice in the comment line
+
+    Returns:
+        Atoms: the structure
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        n_atoms = int(f.readline())
+        info = dict(re.findall(r'(\w+)=("[^"]*"|\S+)', f.readline()))
+        info = {key.lower(): value.strip('"') for key, value in info.items()}
+        if "lattice" not in info:
+            raise ValueError(f"No lattice in {filename}")
+        columns = _parse_properties(
+            info.get("properties", "species:S:1:pos:R:3")
+        )
+        data = np.loadtxt(f, dtype=str, max_rows=n_atoms, ndmin=2)
+    cell = np.array(info["lattice"].split(), dtype=float).reshape(3, 3)
+    start, end = columns["pos"]
+    symbols = data[:, columns["species"][0]]
+    return Atoms.from_symbols(cell, data[:, start:end].astype(float), symbols)
+
+def _cif_number(value: str) -> float:
+    """number of cif without the uncertainty like 5.43(2)"""
+    return float(value.split('(')[0])
+
+def _cif_data(filename: Union[str, Path]) -> Tuple[dict, List[dict]]:
+    """tags and loops of the first data block of a cif file"""
+    tokenize = re.compile(r"'[^']*'|\"[^\"]*\"|\S+").findall
+    tags, loops = {}, []
+    lines = []
+    with open(filename, 'r', encoding='utf-8') as f:
+        in_text = False
+        for line in f:
+            # skip multi-line text fields between semicolons
+            if line.startswith(';'):
+                in_text = not in_text
+                continue
+            line = line.strip()
+            if in_text or not line or line.startswith('#'):
+                continue
+            if line.lower().startswith('data_') and lines:
+                break
+            lines.append(line)
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.lower() == 'loop_':
+            i += 1
+            names = []
+            while i < len(lines) and lines[i].startswith('_'):
+                names.append(lines[i].split()[0].lower())
+                i += 1
+            values = []
+            while i < len(lines) and not lines[i].startswith('_') \
+                    and lines[i].lower() != 'loop_':
+                values += [token.strip('\'"') for token in tokenize(lines[i])]
+                i += 1
+            loops.append({
+                name: values[j::len(names)] for j, name in enumerate(names)
+            })
+            continue
+        if line.startswith('_'):
+            tokens = tokenize(line)
+            if len(tokens) > 1:
+                tags[tokens[0].lower()] = tokens[1].strip('\'"')
+            elif i + 1 < len(lines):
+                i += 1
+                tags[tokens[0].lower()] = lines[i].strip('\'"')
+        i += 1
+    return tags, loops
+
+def _symmetry_operation(xyz: str) -> Tuple[np.ndarray, np.ndarray]:
+    """rotation and translation of a symmetry operation like -x,y+1/2,z"""
+    rotation = np.zeros((3, 3))
+    translation = np.zeros(3)
+    for i, term in enumerate(xyz.lower().replace(' ', '').split(',')):
+        for sign, value in re.findall(r'([+-]?)([^+-]+)', term):
+            factor = -1.0 if sign == '-' else 1.0
+            if value in 'xyz':
+                rotation[i, 'xyz'.index(value)] = factor
+            else:
+                numerator, _, denominator = value.partition('/')
+                translation[i] += \
+                    factor * float(numerator) / float(denominator or 1)
+    return rotation, translation
+
+def lattice_from_parameters(
+    a: float, b: float, c: float,
+    alpha: float, beta: float, gamma: float
+) -> np.ndarray:
+    """lattice vectors with `a` along x and `b` in the xy plane, angles in
+    degrees"""
+    alpha, beta, gamma = np.radians([alpha, beta, gamma])
+    cx = c * np.cos(beta)
+    cy = c * (np.cos(alpha) - np.cos(beta) * np.cos(gamma)) / np.sin(gamma)
+    return np.array([
+        [a, 0, 0],
+        [b * np.cos(gamma), b * np.sin(gamma), 0],
+        [cx, cy, np.sqrt(c ** 2 - cx ** 2 - cy ** 2)]
+    ])
+
+def read_cif(filename: Union[str, Path], tol: float = 1e-3) -> Atoms:
+    """read the ordered structure of a basic cif file, applying the symmetry
+    operations to the asymmetric unit. Occupancies are ignored.
+
+    Args:
+        filename (Union[str, Path]): cif file
+        tol (float, optional): fractional distance under which the images
+            of a site are merged. Defaults to 1e-3.
+
+    Raises:
+        ValueError: no atom sites in the file
+
+    Returns:
+        Atoms: the structure
+    """
+    tags, loops = _cif_data(filename)
+    cell = lattice_from_parameters(*(
+        _cif_number(tags[f"_cell_{name}"]) for name in [
+            "length_a", "length_b", "length_c",
+            "angle_alpha", "angle_beta", "angle_gamma"
+        ]
+    ))
+    sites = next(
+        (loop for loop in loops if "_atom_site_fract_x" in loop), None
+    )
+    if sites is None:
+        raise ValueError(f"No atom sites in {filename}")
+    labels = sites.get("_atom_site_type_symbol", sites.get("_atom_site_label"))
+    # like Si4+ or Si1 to Si
+    elements = [re.match(r'[A-Z][a-z]?', label).group() for label in labels]
+    frac = np.array([
+        [_cif_number(x) for x in sites[f"_atom_site_fract_{axis}"]]
+        for axis in "xyz"
+    ]).T
+    operations = ["x,y,z"]
+    for loop in loops:
+        for key in [
+            "_symmetry_equiv_pos_as_xyz", "_space_group_symop_operation_xyz"
+        ]:
+            if key in loop:
+                operations = loop[key]
+
+    coords, symbols = [], []
+    for site, element in zip(frac, elements):
+        images = np.array([
+            rotation @ site + translation
+            for rotation, translation in map(_symmetry_operation, operations)
+        ]) % 1.0
+        unique = []
+        for image in images:
+            delta = image - np.array(unique).reshape(-1, 3)
+            delta -= np.round(delta)
+            if not np.any(np.linalg.norm(delta, axis=1) < tol):
+                unique.append(image)
+        coords += unique
+        symbols += [element] * len(unique)
+    return Atoms.from_symbols(cell, np.array(coords) @ cell, symbols)
+
+def read_structure(
+    filename: Union[str, Path],
+    fmt: Optional[str] = None
+) -> Atoms:
+    """read a structure into arrays, by the format or the name of the file.
+    POSCAR, cif and extxyz are read natively, other formats by pymatgen.
+
+    Args:
+        filename (Union[str, Path]): structure file
+        fmt (Optional[str], optional): one of "poscar", "cif" and "extxyz".
+            Defaults to None, guessed from the name of the file.
+
+    Returns:
+        Atoms: the structure
+    """
+    name = Path(filename).name.lower()
+    if fmt is None:
+        if name.endswith('.cif'):
+            fmt = "cif"
+        elif name.endswith(('.xyz', '.extxyz')):
+            fmt = "extxyz"
+        elif name.endswith(('.vasp', '.poscar')) \
+                or 'poscar' in name or 'contcar' in name:
+            fmt = "poscar"
+    if fmt == "poscar":
+        return read_poscar(filename)
+    if fmt == "cif":
+        return read_cif(filename)
+    if fmt == "extxyz":
+        return read_extxyz(filename)
+    return Atoms.from_structure(Structure.from_file(filename))
+
+def write_poscar(
+    atoms: Atoms,
+    filename: Union[str, Path],
+    comment: Optional[str] = None
+) -> Path:
+    """write a POSCAR of vasp 5 in cartesian coordinates, atoms grouped by
+    element
+
+    Args:
+        atoms (Atoms): the structure
+        filename (Union[str, Path]): output file
+        comment (Optional[str], optional): first line. Defaults to None, the
+            formula.
+
+    Returns:
+        Path: path of the output file
+    """
+    order = np.argsort(atoms.codes, kind='stable')
+    counts = np.bincount(atoms.codes, minlength=len(atoms.elements))
+    elements = [e for e, n in zip(atoms.elements, counts) if n > 0]
+    counts = counts[counts > 0]
+    if comment is None:
+        comment = ''.join(f'{e}{n}' for e, n in zip(elements, counts))
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(f'{comment}\n1.0\n')
+        np.savetxt(f, atoms.cell, fmt='%20.10f')
+        f.write(' '.join(elements) + '\n')
+        f.write(' '.join(str(n) for n in counts) + '\nCartesian\n')
+        np.savetxt(f, atoms.coords[order], fmt='%20.10f')
+    return Path(filename)
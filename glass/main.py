@@ -1,15 +1,80 @@
 import argparse
+import json
 
-from glass.flow.amorphous import main_amorphous_flow
+# Handlers import their dependencies when they run, so that `glass --help`
+# and short subcommands do not load dflow, pymatgen, dpdata or matplotlib.
 
 
+def dft_param_test(args):
+    from glass.flow.dft_param import main_dft_param_test
+
+    ret = main_dft_param_test(
+        pdata_file=args.parameter,
+        mdata_file=args.machine,
+        path=args.output
+    )
+    for sweep in ret["sweeps"]:
+        print(f'{sweep["structure"]} {sweep["name"]}: converged at '
+              f'{sweep["converged"]}, {sweep["n_runs"]} runs in '
+              f'{sweep["n_waves"]} waves')
+    print(f'recommended {json.dumps(ret["recommended"])}')
+
 def amorphous_flow(args):
+    if args.dry_run:
+        return amorphous_dry_run(args)
+    from glass.flow.amorphous import main_amorphous_flow
+
     main_amorphous_flow(
         pdata_file=args.parameter,
         mdata_file=args.machine,
-        path=args.output
+        path=args.output,
+        artifacts=args.artifacts,
+        max_workers=args.max_workers
     )
 
+def amorphous_dry_run(args):
+    from glass.flow.dry_run import dry_run
+
+    ret = dry_run(args.parameter, args.machine, args.dry_run_dir)
+    for error in ret["errors"]:
+        print(error)
+    if ret["errors"]:
+        raise SystemExit(1)
+    print(f"in.lmp and lmp.data written to {args.dry_run_dir}")
+    print(json.dumps(ret["estimate"], indent=4))
+
+def convert(args):
+    from glass.io.convert import convert_files
+
+    with open(args.parameter, 'r', encoding='utf-8') as f:
+        pdata = json.load(f)
+    ret = convert_files(
+        args.inputs,
+        args.to,
+        pdata["type_map"],
+        pdata.get("mass_map"),
+        out_dir=args.output,
+        n_workers=args.n_workers,
+        force=args.force
+    )
+    print(f'converted {len(ret["converted"])}, skipped {len(ret["skipped"])}, '
+          f'failed {len(ret["failed"])}')
+    for src, error in ret["failed"]:
+        print(f'{src}: {error}')
+    if ret["failed"]:
+        raise SystemExit(1)
+
+def report(args):
+    from glass.flow.report import format_text, workflow_report
+
+    if args.machine:
+        from glass.utils import Mdata, config_argo
+
+        with open(args.machine, 'r', encoding='utf-8') as f:
+            config_argo(**Mdata(json.load(f)))
+    ret = workflow_report(args.workflow_id, args.output, args.html)
+    print(format_text(ret), end='')
+
 def main():
     parser = argparse.ArgumentParser(
         prog='glass',
@@ -26,7 +91,8 @@ def main():
         "-m",
         "--machine",
         type=str,
-        help="User-defined configuration file"
+        help="User-defined configuration file, calculated locally without it",
+        default=None
     )
     parser_dft_param.add_argument(
         "-p",
@@ -34,6 +100,14 @@ def main():
         type=str,
         help="parameter file for current task"
     )
+    parser_dft_param.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="Directory of the calculations and of dft_param.json",
+        default="dft_param"
+    )
+    parser_dft_param.set_defaults(handler=dft_param_test)
 
     # parser_amorphous_test
     parser_amorphous_test = subparsers.add_parser(
@@ -59,8 +133,114 @@ def main():
         help="Path for download output files",
         default="./"
     )
+    parser_amorphous_test.add_argument(
+        "-a",
+        "--artifacts",
+        type=str,
+        nargs="+",
+        help="Names of the artifacts to download, like rdf doas_data",
+        default=None
+    )
+    parser_amorphous_test.add_argument(
+        "-j",
+        "--max-workers",
+        type=int,
+        help="Max number of concurrent downloads",
+        default=8
+    )
+    parser_amorphous_test.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Validate the parameters, write in.lmp and estimate the cost "
+             "without uploading or submitting"
+    )
+    parser_amorphous_test.add_argument(
+        "--dry-run-dir",
+        type=str,
+        help="Directory of the files written by the dry run",
+        default="dry_run"
+    )
     parser_amorphous_test.set_defaults(handler=amorphous_flow)
 
+    # parser_convert
+    parser_convert = subparsers.add_parser(
+        "convert",
+        help="Convert structures to lammps data, or lammps dumps to POSCAR"
+    )
+    parser_convert.add_argument(
+        "inputs",
+        type=str,
+        nargs="+",
+        help="Globs, files or directories of inputs"
+    )
+    parser_convert.add_argument(
+        "-p",
+        "--parameter",
+        type=str,
+        help="parameter file with type_map and mass_map",
+        default="param.json"
+    )
+    parser_convert.add_argument(
+        "-t",
+        "--to",
+        type=str,
+        choices=["lmp", "poscar"],
+        help="lmp from structures, or poscar from the last frame of dumps",
+        default="lmp"
+    )
+    parser_convert.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="Output directory, beside the inputs by default",
+        default=None
+    )
+    parser_convert.add_argument(
+        "-n",
+        "--n-workers",
+        type=int,
+        help="Number of processes",
+        default=1
+    )
+    parser_convert.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Convert unchanged inputs again"
+    )
+    parser_convert.set_defaults(handler=convert)
+
+    # parser_report
+    parser_report = subparsers.add_parser(
+        "report",
+        help="Timeline and critical path of a workflow"
+    )
+    parser_report.add_argument(
+        "workflow_id",
+        type=str,
+        help="ID of the workflow"
+    )
+    parser_report.add_argument(
+        "-m",
+        "--machine",
+        type=str,
+        help="User-defined configuration file",
+        default=None
+    )
+    parser_report.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="Prefix of the report files",
+        default="report"
+    )
+    parser_report.add_argument(
+        "--html",
+        action="store_true",
+        help="Also write a gantt chart in html"
+    )
+    parser_report.set_defaults(handler=report)
+
     # parser arguments actually
     args = parser.parse_args()
     if hasattr(args, 'handler'):
@@ -0,0 +1,197 @@
+import json
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+
+def mean_stderr(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """mean and standard error of the mean over replicas
+
+    Args:
+        values (np.ndarray): values of every replica along the first axis
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: mean and standard error, zero for a
+        single replica
+    """
+    values = np.asarray(values, dtype=float)
+    mean = values.mean(axis=0)
+    if len(values) < 2:
+        return mean, np.zeros_like(mean)
+    return mean, values.std(axis=0, ddof=1) / np.sqrt(len(values))
+
+def aggregate_values(values: list):
+    """aggregate the same item of the results of every replica. Dicts are
+    aggregated item by item, identical values like axes are kept as they
+    are, and numbers or arrays of the same shape become
+    {"mean": ..., "stderr": ...}. Other values are kept per replica as
+    {"replicas": [...]}.
+
+    Args:
+        values (list): the item of every replica
+
+    Returns:
+        the aggregated item
+    """
+    first = values[0]
+    if isinstance(first, dict):
+        return {
+            key: aggregate_values([value[key] for value in values])
+            for key in first
+            if all(
+                isinstance(value, dict) and key in value for value in values
+            )
+        }
+    if all(value == first for value in values):
+        return first
+    try:
+        array = np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        return {"replicas": values}
+    mean, stderr = mean_stderr(array)
+    return {"mean": mean.tolist(), "stderr": stderr.tolist()}
+
+def aggregate_json(files: List[Path], filename: str) -> Path:
+    """aggregate json results of replicas, see `aggregate_values`
+
+    Args:
+        files (List[Path]): json file of every replica
+        filename (str): output file
+
+    Returns:
+        Path: path of the output file
+    """
+    results = []
+    for file in files:
+        with open(file, 'r', encoding='utf-8') as f:
+            results.append(json.load(f))
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(aggregate_values(results), f, indent=4)
+    return Path(filename)
+
+def aggregate_csv(files: List[Path], filename: str) -> Path:
+    """aggregate csv results of replicas, like g(r) or S(q), whose first
+    column is the shared axis. Every other column is written as its mean
+    and a `_stderr` column.
+
+    Args:
+        files (List[Path]): csv file of every replica
+        filename (str): output file
+
+    Raises:
+        ValueError: replicas do not share the same columns or axis
+
+    Returns:
+        Path: path of the output file
+    """
+    headers, tables = [], []
+    for file in files:
+        with open(file, 'r', encoding='utf-8') as f:
+            headers.append(f.readline().strip().split(','))
+        tables.append(np.loadtxt(file, delimiter=',', skiprows=1, ndmin=2))
+    if any(header != headers[0] for header in headers) \
+            or any(table.shape != tables[0].shape for table in tables) \
+            or not all(
+                np.allclose(table[:, 0], tables[0][:, 0]) for table in tables
+            ):
+        raise ValueError(f"Replicas of {files[0]} do not share the same axis")
+    mean, stderr = mean_stderr(np.array([table[:, 1:] for table in tables]))
+    columns = [tables[0][:, 0]]
+    header = [headers[0][0]]
+    for i, name in enumerate(headers[0][1:]):
+        columns += [mean[:, i], stderr[:, i]]
+        header += [name, f'{name}_stderr']
+    np.savetxt(
+        filename,
+        np.column_stack(columns),
+        delimiter=',',
+        header=','.join(header),
+        comments=''
+    )
+    return Path(filename)
+
+def aggregate_doas(files: List[Path], filename: str) -> Path:
+    """aggregate the distributions of atomic energies of replicas, written
+    by `write_doas`. The histograms of replicas have their own edges, so
+    their densities are evaluated on common edges spanning all of them, with
+    the finest bin width of the replicas.
+
+    Args:
+        files (List[Path]): npz file of every replica
+        filename (str): output file
+
+    Returns:
+        Path: path of the output file
+    """
+    replicas = [dict(np.load(file)) for file in files]
+    elements = [
+        key[:-len('_edges')] for key in replicas[0] if key.endswith('_edges')
+    ]
+    ret = {}
+    for element in elements:
+        data = [
+            replica for replica in replicas if f'{element}_edges' in replica
+        ]
+        lower = min(replica[f'{element}_edges'][0] for replica in data)
+        upper = max(replica[f'{element}_edges'][-1] for replica in data)
+        width = min(
+            np.diff(replica[f'{element}_edges']).min() for replica in data
+        )
+        n_bins = max(1, int(np.ceil((upper - lower) / width - 1e-8)))
+        edges = np.linspace(lower, upper, n_bins + 1)
+        centers = (edges[1:] + edges[:-1]) / 2
+        densities = []
+        for replica in data:
+            own = replica[f'{element}_edges']
+            index = np.searchsorted(own, centers, side='right') - 1
+            inside = (index >= 0) & (index < len(own) - 1)
+            density = np.zeros(n_bins)
+            density[inside] = replica[f'{element}_density'][index[inside]]
+            densities.append(density)
+        ret[f'{element}_edges'] = edges
+        ret[f'{element}_density'], ret[f'{element}_density_stderr'] = \
+            mean_stderr(densities)
+        if all(f'{element}_kde' in replica for replica in data):
+            grid = np.linspace(
+                edges[0], edges[-1], len(data[0][f'{element}_grid'])
+            )
+            kde = [
+                np.interp(
+                    grid,
+                    replica[f'{element}_grid'],
+                    replica[f'{element}_kde'],
+                    left=0.0,
+                    right=0.0
+                )
+                for replica in data
+            ]
+            ret[f'{element}_grid'] = grid
+            ret[f'{element}_kde'], ret[f'{element}_kde_stderr'] = \
+                mean_stderr(kde)
+    np.savez(filename, **ret)
+    return Path(filename)
+
+def aggregate_results(files: List[Path], prefix: str = 'replicas') -> Path:
+    """aggregate the results of replicas by the type of their files
+
+    Args:
+        files (List[Path]): result file of every replica, like `rdf.csv`
+        prefix (str, optional): prefix of the output file, like
+            `replicas_rdf.csv`. Defaults to 'replicas'.
+
+    Raises:
+        NotImplementedError: unknown type of file
+
+    Returns:
+        Path: path of the output file
+    """
+    files = [Path(file) for file in files]
+    filename = f'{prefix}_{files[0].name}'
+    if files[0].suffix == '.csv':
+        return aggregate_csv(files, filename)
+    if files[0].suffix == '.json':
+        return aggregate_json(files, filename)
+    if files[0].suffix == '.npz':
+        return aggregate_doas(files, filename)
+    raise NotImplementedError('Only csv, json and npz supported for now.')
@@ -0,0 +1,30 @@
+from pathlib import Path
+from typing import List
+
+from dflow.python import OP, OPIO, Artifact, OPIOSign
+
+from glass.property.aggregate import aggregate_results
+
+
+class AggregateReplicasOP(OP):
+    """Mean and standard error of a property over independent replicas
+    """
+
+    @classmethod
+    def get_input_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "results": Artifact(List[Path])
+        })
+
+    @classmethod
+    def get_output_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "aggregate": Artifact(Path)
+        })
+
+    @OP.exec_sign_check
+    def execute(self, op_in: OPIO) -> OPIO:
+        op_out = {
+            "aggregate": aggregate_results(op_in["results"])
+        }
+        return op_out
@@ -1,7 +1,10 @@
+from itertools import islice
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
-import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from tqdm import tqdm
 
 
@@ -32,6 +35,46 @@ def generate_doas_mini_input(model: str, work_dir: Path) -> Path:
     file_path = Path(work_dir) / 'in.lmp'
     return file_path
 
+def generate_doas_rerun_input(
+    model: str,
+    traj_file: str,
+    every_n_frame: int,
+    work_dir: Path
+) -> Path:
+    """generate the lammps input to compute atomic energies of the frames of a
+    trajectory with `rerun`, instead of minimizing every snapshot
+
+    Args:
+        model (str): filename of the model
+        traj_file (str): filename of the lammps trajectory
+        every_n_frame (int): rerun the traj every n frames
+        work_dir (Path): directory to write `in.lmp`
+
+    Returns:
+        Path: path of `in.lmp`
+    """
+    ret = []
+    ret.append("units           metal\n")
+    ret.append("\n")
+    ret.append("atom_style      atomic\n")
+    ret.append("atom_modify     map array\n")
+    ret.append("boundary        p p p\n")
+    ret.append("atom_modify     sort 0 0.0\n")
+    ret.append("\n")
+    ret.append("read_data       lmp.data\n")
+    ret.append("\n")
+    ret.append(f"pair_style      deepmd {model}\n")
+    ret.append("pair_coeff      * * \n")
+    ret.append("\n")
+    ret.append("compute peratom_energy all pe/atom\n")
+    ret.append("dump peratom_dump all custom 1 dump.atom_energy id type c_peratom_energy\n")
+    ret.append("dump_modify peratom_dump sort id\n")
+    ret.append(f"rerun {traj_file} skip {every_n_frame} dump x y z box yes\n")
+    with open(Path(work_dir) / "in.lmp", 'w', encoding="utf=8") as f:
+        f.writelines(ret)
+    file_path = Path(work_dir) / 'in.lmp'
+    return file_path
+
 def get_type_index(type_map, target_element):
     """get the index of target element
 
@@ -78,37 +121,391 @@ def parse_single(filename: str, target_element: str, type_map: dict):
     second_half_data = data[n::]
     return second_half_data
 
-def plot_doas(
+def parse_frames(filename: str, target_element: str, type_map: dict):
+    """This function is used to grasp atomic energy of every frame of a
+    dump, e.g. the output of a `rerun` task of lammps
+
+    Args:
+        filename (str): filename of the dump
+        target_element (str): target_element
+        type_map (dict): type map
+
+    Returns:
+        list: atomic energies of target element, one list per frame
+    """
+    frames = []
+    type_index = get_type_index(type_map, target_element)
+    with open(filename, 'r', encoding='utf-8') as file:
+        lines = file.readlines()
+        i = 0
+        while i < len(lines):
+            line = lines[i].strip()
+            if line.startswith("ITEM:"):
+                frames.append([])
+                i += 9
+                continue
+            else:
+                item = line.split()
+                if int(item[1]) == int(type_index):
+                    frames[-1].append(item)
+            i += 1
+    return frames
+
+def read_atom_energies(
+    filename: str
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """read the atomic energies of every frame of a dump written by
+    `compute pe/atom`, with columns `id type energy`
+
+    Args:
+        filename (str): filename of the dump
+
+    Yields:
+        Tuple[np.ndarray, np.ndarray]: atom types start from one, and atomic
+        energies of a frame
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.startswith("ITEM: TIMESTEP"):
+                continue
+            header = [next(f) for _ in range(8)]
+            n_atoms = int(header[2])
+            data = np.loadtxt(islice(f, n_atoms), ndmin=2)
+            yield data[:, 1].astype(int), data[:, 2]
+
+def collect_snapshots(
+    target_folders: list,
+    type_map: dict,
+    elements: Optional[List[str]] = None,
+    all_frames: bool = False
+) -> Dict[str, List[np.ndarray]]:
+    """collect the atomic energies of several elements at once, reading
+    every dump a single time
+
+    Args:
+        target_folders (list): folders containing `dump.atom_energy`
+        type_map (dict): type map
+        elements (Optional[List[str]], optional): elements like ["Si", "O"].
+            Defaults to None, for all the elements of the type map.
+        all_frames (bool, optional): see `collect_energies`.
+            Defaults to False.
+
+    Returns:
+        Dict[str, List[np.ndarray]]: atomic energies of each element, one
+        array per snapshot, i.e. per folder, or per frame with `all_frames`
+    """
+    if not elements:
+        elements = list(type_map.values())
+    type_index = {
+        element: get_type_index(type_map, element) for element in elements
+    }
+    snapshots = {element: [] for element in elements}
+    for folder in tqdm(target_folders):
+        frames = list(read_atom_energies(Path(folder) / 'dump.atom_energy'))
+        if not all_frames:
+            types = np.concatenate([frame[0] for frame in frames])
+            energies = np.concatenate([frame[1] for frame in frames])
+            frames = [(types, energies)]
+        for element, index in type_index.items():
+            for types, energies in frames:
+                selected = energies[types == index]
+                if not all_frames:
+                    # the minimized half, see `parse_single`
+                    selected = selected[len(selected) // 2:]
+                snapshots[element].append(selected)
+    return snapshots
+
+def collect_energies(
     target_folders: list,
     target_element: str,
+    type_map: dict,
+    all_frames: bool = False
+) -> np.ndarray:
+    """collect the atomic energies of target element from minimization folders
+
+    Args:
+        target_folders (list): folders containing `dump.atom_energy`
+        target_element (str): element like "H"
+        type_map (dict): type map
+        all_frames (bool, optional): take every frame of the dumps, as
+            written by a `rerun` task, instead of the minimized half.
+            Defaults to False.
+
+    Returns:
+        np.ndarray: atomic energies of target element
+    """
+    snapshots = collect_snapshots(
+        target_folders,
+        type_map,
+        [target_element],
+        all_frames
+    )[target_element]
+    if not snapshots:
+        return np.array([], dtype=float)
+    return np.concatenate(snapshots)
+
+def snapshot_statistics(snapshots: Dict[str, List[np.ndarray]]) -> List[dict]:
+    """count, mean, std, min and max of the atomic energies of each element
+    in every snapshot
+
+    Args:
+        snapshots (Dict[str, List[np.ndarray]]): output of `collect_snapshots`
+
+    Returns:
+        List[dict]: one row per snapshot and element
+    """
+    rows = []
+    for element, arrays in snapshots.items():
+        for i, energies in enumerate(arrays):
+            if len(energies) == 0:
+                continue
+            rows.append({
+                "snapshot": i,
+                "element": element,
+                "count": len(energies),
+                "mean": float(energies.mean()),
+                "std": float(energies.std()),
+                "min": float(energies.min()),
+                "max": float(energies.max())
+            })
+    return rows
+
+def kde_fft(
+    energies: np.ndarray,
+    grid: np.ndarray,
+    bandwidth: Optional[float] = None
+) -> np.ndarray:
+    """Gaussian kernel density estimate on a uniform grid, by linear binning
+    of the samples and FFT convolution with the kernel, in
+    O(n + m log m) instead of O(n m)
+
+    Args:
+        energies (np.ndarray): samples
+        grid (np.ndarray): uniform grid of m points
+        bandwidth (Optional[float], optional): width of the kernel.
+            Defaults to None, for Silverman's rule of thumb.
+
+    Returns:
+        np.ndarray: density on the grid
+    """
+    n = len(energies)
+    m = len(grid)
+    delta = grid[1] - grid[0]
+    if not bandwidth:
+        spread = min(
+            np.std(energies),
+            np.subtract(*np.percentile(energies, [75, 25])) / 1.34
+        ) or np.std(energies) or delta
+        bandwidth = 0.9 * spread * n ** (-0.2)
+    # linear binning: split every sample between its two grid points
+    pos = np.clip((energies - grid[0]) / delta, 0, m - 1)
+    left = np.minimum(pos.astype(int), m - 2)
+    frac = pos - left
+    counts = np.bincount(left, 1 - frac, minlength=m) \
+        + np.bincount(left + 1, frac, minlength=m)
+    # kernel on offsets -m..m, zero padded so the convolution is not circular
+    offsets = np.arange(-m, m + 1) * delta
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) \
+        / (np.sqrt(2 * np.pi) * bandwidth)
+    size = 4 * m + 1
+    conv = np.fft.irfft(
+        np.fft.rfft(counts, size) * np.fft.rfft(kernel, size),
+        size
+    )
+    return conv[m:2 * m] / n
+
+def compute_doas(
+    energies: Dict[str, np.ndarray],
     bins: int,
-    type_map: dict
-):
-    """_summary_
+    kde: bool = False,
+    bandwidth: Optional[float] = None,
+    n_grid: int = 512
+) -> Dict[str, dict]:
+    """histogram, and optionally KDE, of the atomic energies of each element
 
     Args:
-        target_folders (list): _description_
-        target_element (str): _description_
-        bins (int): _description_
-        type_map (dict): _description_
+        energies (Dict[str, np.ndarray]): atomic energies of each element
+        bins (int): number of bins
+        kde (bool, optional): estimate the density by KDE. Defaults to False.
+        bandwidth (Optional[float], optional): see `kde_fft`.
+            Defaults to None.
+        n_grid (int, optional): number of points of the KDE grid.
+            Defaults to 512.
+
+    Returns:
+        Dict[str, dict]: `edges`, `counts` and `density` of each element,
+        with `grid` and `kde` if required
     """
-    filename = 'dump.atom_energy'
-    data = []
-    # target_energy = []
-    folders = tqdm(target_folders)
-    head = [["index", "atom_types", "energy"],]
-    for folder in folders:
-        data = parse_single(Path(folder) / filename, target_element, type_map)
-        head = np.concatenate((head, data), axis=0)
-    plot_data = list(head[1:,2])
-    plot_data = [float(data) for data in plot_data]
-    x_min = float(min(plot_data))
-    x_max = float(max(plot_data))
-    plt.hist(plot_data, bins)
-    xticks = np.linspace(x_min, x_max, 5)
-    xticks_labels = ['{:.3f}'.format(x) for x in xticks]
-    plt.xticks(xticks, xticks_labels)
-    plt.savefig('doas.png', dpi=300)
-    plt.show()
-    fig_path = Path('doas.png')
-    return fig_path
+    ret = {}
+    for element, values in energies.items():
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            continue
+        counts, edges = np.histogram(values, bins)
+        ret[element] = {
+            "edges": edges,
+            "counts": counts,
+            "density": counts / (len(values) * np.diff(edges))
+        }
+        if kde:
+            grid = np.linspace(edges[0], edges[-1], n_grid)
+            ret[element]["grid"] = grid
+            ret[element]["kde"] = kde_fft(values, grid, bandwidth)
+    return ret
+
+def write_doas(
+    doas: Dict[str, dict],
+    statistics: List[dict],
+    prefix: str = 'doas'
+) -> Tuple[Path, Path]:
+    """write the distributions to `<prefix>.npz`, with keys like
+    `Si_edges`, and the statistics of snapshots to `<prefix>_snapshots.csv`
+
+    Args:
+        doas (Dict[str, dict]): output of `compute_doas`
+        statistics (List[dict]): output of `snapshot_statistics`
+        prefix (str, optional): prefix of the files. Defaults to 'doas'.
+
+    Returns:
+        Tuple[Path, Path]: paths of the npz and the csv files
+    """
+    npz_path = Path(f'{prefix}.npz')
+    np.savez(
+        npz_path,
+        **{
+            f'{element}_{key}': value
+            for element, data in doas.items()
+            for key, value in data.items()
+        }
+    )
+    csv_path = Path(f'{prefix}_snapshots.csv')
+    columns = ["snapshot", "element", "count", "mean", "std", "min", "max"]
+    with open(csv_path, 'w', encoding='utf-8') as f:
+        f.write(','.join(columns) + '\n')
+        for row in statistics:
+            f.write(','.join(str(row[key]) for key in columns) + '\n')
+    return npz_path, csv_path
+
+def doas_distance(
+    old: np.ndarray,
+    new: np.ndarray,
+    metric: str = "ks",
+    bins: int = 100
+) -> float:
+    """distance between two samples of atomic energies, used to judge whether
+    the distribution of atomic energies has converged
+
+    Args:
+        old (np.ndarray): energies sampled before
+        new (np.ndarray): energies sampled until now
+        metric (str, optional): `ks` for Kolmogorov-Smirnov distance, `l1`
+            for the L1 change of the normalized histogram. Defaults to "ks".
+        bins (int, optional): number of bins for `l1`. Defaults to 100.
+
+    Raises:
+        NotImplementedError: unknown metric
+
+    Returns:
+        float: the distance, 0 for identical distributions
+    """
+    old = np.sort(np.asarray(old, dtype=float))
+    new = np.sort(np.asarray(new, dtype=float))
+    if metric == "ks":
+        grid = np.concatenate((old, new))
+        cdf_old = np.searchsorted(old, grid, side='right') / len(old)
+        cdf_new = np.searchsorted(new, grid, side='right') / len(new)
+        return float(np.max(np.abs(cdf_old - cdf_new)))
+    if metric == "l1":
+        x_min = min(old[0], new[0])
+        x_max = max(old[-1], new[-1])
+        hist_old, edges = np.histogram(old, bins, (x_min, x_max), density=True)
+        hist_new, _ = np.histogram(new, bins, (x_min, x_max), density=True)
+        return float(np.sum(np.abs(hist_old - hist_new) * np.diff(edges)))
+    raise NotImplementedError('Only ks and l1 supported for now.')
+
+def save_doas_fig(
+    doas: Union[np.ndarray, Dict[str, dict]],
+    bins: int = 100,
+    filename: str = 'doas.png'
+) -> Path:
+    """plot the distribution of atomic energies of each element in its own
+    panel, rendered with the Agg backend without any global pyplot state
+
+    Args:
+        doas (Union[np.ndarray, Dict[str, dict]]): output of
+            `compute_doas`, or atomic energies of a single element
+        bins (int, optional): number of bins for atomic energies.
+            Defaults to 100.
+        filename (str, optional): the figure. Defaults to 'doas.png'.
+
+    Returns:
+        Path: path of the figure
+    """
+    if not isinstance(doas, dict):
+        doas = compute_doas({"": doas}, bins)
+    fig = Figure(figsize=(6.4, 4.8 * max(len(doas), 1) / 1.5))
+    FigureCanvasAgg(fig)
+    for i, (element, data) in enumerate(doas.items()):
+        ax = fig.add_subplot(len(doas), 1, i + 1)
+        edges = data["edges"]
+        ax.bar(
+            edges[:-1],
+            data["density"],
+            width=np.diff(edges),
+            align='edge',
+            alpha=0.6
+        )
+        if "kde" in data:
+            ax.plot(data["grid"], data["kde"])
+        xticks = np.linspace(edges[0], edges[-1], 5)
+        ax.set_xticks(xticks)
+        ax.set_xticklabels(['{:.3f}'.format(x) for x in xticks])
+        if element:
+            ax.set_title(element)
+    fig.tight_layout()
+    fig.savefig(filename, dpi=300)
+    return Path(filename)
+
+def plot_doas(
+    target_folders: list,
+    target_element: Union[str, List[str], None],
+    bins: int,
+    type_map: dict,
+    all_frames: bool = False,
+    kde: bool = False,
+    bandwidth: Optional[float] = None
+) -> Tuple[Path, Path, Path]:
+    """distribution of atomic energies of several elements from a single
+    pass over the dumps
+
+    Args:
+        target_folders (list): folders containing `dump.atom_energy`
+        target_element (Union[str, List[str], None]): element, or list of
+            elements, None or empty for all the elements of the type map
+        bins (int): number of bins
+        type_map (dict): type map
+        all_frames (bool, optional): see `collect_energies`. Defaults to False.
+        kde (bool, optional): see `compute_doas`. Defaults to False.
+        bandwidth (Optional[float], optional): see `kde_fft`.
+            Defaults to None.
+
+    Returns:
+        Tuple[Path, Path, Path]: the figure, the npz of distributions and
+        the csv of statistics of snapshots
+    """
+    if isinstance(target_element, str):
+        target_element = [target_element]
+    snapshots = collect_snapshots(
+        target_folders,
+        type_map,
+        target_element,
+        all_frames
+    )
+    energies = {
+        element: np.concatenate(arrays) if arrays else np.array([])
+        for element, arrays in snapshots.items()
+    }
+    doas = compute_doas(energies, bins, kde, bandwidth)
+    fig_path = save_doas_fig(doas)
+    npz_path, csv_path = write_doas(doas, snapshot_statistics(snapshots))
+    return fig_path, npz_path, csv_path
@@ -3,10 +3,18 @@ import shutil
 from pathlib import Path
 from typing import List
 
+import numpy as np
 from dflow.python import OP, OPIO, Artifact, OPIOSign, Parameter
 
-from glass.io.input import grasp_strucs_from_traj
-from glass.property.doas import generate_doas_mini_input, plot_doas
+from glass.io.input import count_frames, get_n_waves, grasp_strucs_from_traj
+from glass.property.doas import (
+    collect_energies,
+    doas_distance,
+    generate_doas_mini_input,
+    generate_doas_rerun_input,
+    plot_doas,
+    save_doas_fig,
+)
 
 
 class GraspSnapShotOP(OP):
@@ -25,14 +33,18 @@ class GraspSnapShotOP(OP):
             "model": Artifact(Path),
             "energy_n_frame": Parameter(int),
             "type_map": Parameter(dict),
-            "mass_map": Parameter(dict)
+            "mass_map": Parameter(dict),
+            "wave": Parameter(int, default=0),
+            "wave_size": Parameter(int, default=None),
+            "n_workers": Parameter(int, default=1)
         })
 
     @classmethod
     def get_output_sign(cls) -> OPIOSign:
         return OPIOSign({
             "minimize_dirs": Artifact(List[Path]),
-            "num_minimize": Parameter(int)
+            "num_minimize": Parameter(int),
+            "n_waves": Parameter(int)
         })
 
     @OP.exec_sign_check
@@ -43,12 +55,21 @@ class GraspSnapShotOP(OP):
         energy_n_frame = op_in["energy_n_frame"]
         type_map = op_in["type_map"]
         mass_map = op_in["mass_map"]
+        wave = op_in["wave"]
+        wave_size = op_in["wave_size"]
         os.chdir(op_in["md_run"])
+        n_waves = 1
+        if wave_size:
+            n_selected = -(-count_frames(traj_file_name) // energy_n_frame)
+            n_waves = get_n_waves(n_selected, wave_size)
         minimize_dirs = grasp_strucs_from_traj(
             traj_file_name,
             energy_n_frame,
             type_map,
-            mass_map
+            mass_map,
+            wave,
+            wave_size,
+            op_in["n_workers"]
         )
         for mini_dir in minimize_dirs:
             generate_doas_mini_input(model.name, mini_dir)
@@ -56,30 +77,127 @@ class GraspSnapShotOP(OP):
             shutil.copy(model, mini_dir)
         op_out = {
             "minimize_dirs": minimize_dirs,
-            "num_minimize": len(minimize_dirs)
+            "num_minimize": len(minimize_dirs),
+            "n_waves": n_waves
+        }
+        return op_out
+
+class DoasRerunPrepOP(OP):
+    """Prepare a single `rerun` task computing the atomic energies of the
+    selected frames of the trajectory, replacing the minimization fan-out
+    """
+
+    @classmethod
+    def get_input_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "md_run": Artifact(Path),
+            "traj_file_name": Parameter(str),
+            "model": Artifact(Path),
+            "energy_n_frame": Parameter(int)
+        })
+
+    @classmethod
+    def get_output_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "rerun_dir": Artifact(Path)
+        })
+
+    @OP.exec_sign_check
+    def execute(self, op_in: OPIO) -> OPIO:
+        traj_file_name = op_in["traj_file_name"] + '.lammpstrj'
+        model = op_in["model"]
+        md_run = Path(op_in["md_run"])
+        rerun_dir = Path("doas_rerun")
+        rerun_dir.mkdir(exist_ok=True)
+        shutil.copy(md_run / 'lmp.data', rerun_dir)
+        shutil.copy(md_run / traj_file_name, rerun_dir)
+        shutil.copy(model, rerun_dir)
+        generate_doas_rerun_input(
+            model.name,
+            traj_file_name,
+            op_in["energy_n_frame"],
+            rerun_dir
+        )
+        op_out = {
+            "rerun_dir": rerun_dir
         }
         return op_out
 
 class PlotDoas(OP):
-    """_summary_
+    """Distribution of atomic energies of one or several elements, read in a
+    single pass over the minimized or rerun snapshots
+    """
 
-    Args:
-        OP (_type_): _description_
+    @classmethod
+    def get_input_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "minimize_dirs": Artifact(List[Path]),
+            "target_element": Parameter(str, default=""),
+            "elements": Parameter(List[str], default=[]),
+            "bins": Parameter(int),
+            "type_map": Parameter(dict),
+            "all_frames": Parameter(bool, default=False),
+            "kde": Parameter(bool, default=False),
+            "bandwidth": Parameter(float, default=0.0)
+        })
+
+    @classmethod
+    def get_output_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "doas_fig": Artifact(Path),
+            "doas_data": Artifact(Path),
+            "doas_snapshots": Artifact(Path)
+        })
+
+    @OP.exec_sign_check
+    def execute(self, op_in: OPIO) -> OPIO:
+        elements = op_in["elements"]
+        if not elements and op_in["target_element"]:
+            elements = [op_in["target_element"]]
+        fig_path, npz_path, csv_path = plot_doas(
+            op_in["minimize_dirs"],
+            elements,
+            op_in["bins"],
+            op_in["type_map"],
+            op_in["all_frames"],
+            op_in["kde"],
+            op_in["bandwidth"] or None
+        )
+        op_out = {
+            "doas_fig": fig_path,
+            "doas_data": npz_path,
+            "doas_snapshots": csv_path
+        }
+        return op_out
+
+
+class DoasConvergeOP(OP):
+    """Accumulate the atomic energies of one wave of minimized snapshots and
+    check whether the distribution of atomic energies has converged
     """
 
     @classmethod
     def get_input_sign(cls) -> OPIOSign:
         return OPIOSign({
             "minimize_dirs": Artifact(List[Path]),
+            "energies": Artifact(Path, optional=True),
             "target_element": Parameter(str),
             "bins": Parameter(int),
-            "type_map": Parameter(dict)
+            "type_map": Parameter(dict),
+            "metric": Parameter(str, default="ks"),
+            "tol": Parameter(float),
+            "wave": Parameter(int),
+            "n_waves": Parameter(int)
         })
 
     @classmethod
     def get_output_sign(cls) -> OPIOSign:
         return OPIOSign({
-            "doas_fig": Artifact(Path)
+            "energies": Artifact(Path),
+            "doas_fig": Artifact(Path),
+            "distance": Parameter(float),
+            "converged": Parameter(bool),
+            "next_wave": Parameter(int)
         })
 
     @OP.exec_sign_check
@@ -87,9 +205,33 @@ class PlotDoas(OP):
         target_element = op_in["target_element"]
         bins = op_in["bins"]
         type_map = op_in["type_map"]
-        minimize_dirs = op_in["minimize_dirs"]
-        fig_path = plot_doas(minimize_dirs, target_element, bins, type_map)
+        wave = op_in["wave"]
+        new_energies = collect_energies(
+            op_in["minimize_dirs"],
+            target_element,
+            type_map
+        )
+        distance = float("inf")
+        if op_in["energies"] is not None:
+            old_energies = np.load(op_in["energies"])
+            energies = np.concatenate((old_energies, new_energies))
+            distance = doas_distance(
+                old_energies,
+                energies,
+                op_in["metric"],
+                bins
+            )
+        else:
+            energies = new_energies
+        converged = distance < op_in["tol"] or wave + 1 >= op_in["n_waves"]
+        energies_path = Path('doas_energies.npy')
+        np.save(energies_path, energies)
+        fig_path = save_doas_fig(energies, bins)
         op_out = {
-            "doas_fig": fig_path
+            "energies": energies_path,
+            "doas_fig": fig_path,
+            "distance": distance if np.isfinite(distance) else -1.0,
+            "converged": bool(converged),
+            "next_wave": wave + 1
         }
         return op_out
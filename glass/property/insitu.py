@@ -0,0 +1,182 @@
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from glass.io.input import get_type_ids
+from glass.io.protocol import PROTOCOLS, expand_protocol
+
+
+def read_ave_time(
+    filename: str,
+    vector: bool = False
+) -> Tuple[np.ndarray, np.ndarray]:
+    """read the output file of lammps `fix ave/time`
+
+    Args:
+        filename (str): the output file
+        vector (bool, optional): whether the file is written in
+            `mode vector`. Defaults to False.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: timesteps in shape (n_blocks,), and
+        values in shape (n_blocks, n_columns), or (n_blocks, n_rows, n_columns)
+        for `mode vector`
+    """
+    steps = []
+    blocks = []
+    with open(filename, 'r', encoding='utf-8') as f:
+        lines = [
+            line for line in f
+            if line.strip() and not line.startswith('#')
+        ]
+    i = 0
+    while i < len(lines):
+        item = lines[i].split()
+        steps.append(int(item[0]))
+        if vector:
+            n_rows = int(item[1])
+            blocks.append(np.loadtxt(lines[i + 1:i + 1 + n_rows], ndmin=2))
+            i += n_rows + 1
+        else:
+            blocks.append(np.array(item[1:], dtype=float))
+            i += 1
+    return np.array(steps, dtype=int), np.array(blocks, dtype=float)
+
+def read_peratom_dump(filename: str) -> List[Tuple[int, np.ndarray]]:
+    """read a lammps dump with columns `id type value`, like the in-situ
+    per-atom energy or coordination dumps
+
+    Args:
+        filename (str): the dump file
+
+    Returns:
+        List[Tuple[int, np.ndarray]]: timestep and data in shape (n_atoms, 3)
+        for each frame
+    """
+    frames = []
+    with open(filename, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    i = 0
+    while i < len(lines):
+        step = int(lines[i + 1])
+        n_atoms = int(lines[i + 3])
+        data = np.loadtxt(lines[i + 9:i + 9 + n_atoms], ndmin=2)
+        frames.append((step, data))
+        i += 9 + n_atoms
+    return frames
+
+def summarize_rdf(filename: str, pairs: Optional[list] = None) -> dict:
+    """average the in-situ rdf over all the blocks
+
+    Args:
+        filename (str): the `.rdf` file
+        pairs (Optional[list], optional): pairs given to `compute rdf`.
+            Defaults to None, for the total rdf.
+
+    Returns:
+        dict: r, and g(r) and coordination number of each pair
+    """
+    _, blocks = read_ave_time(filename, vector=True)
+    mean = blocks.mean(axis=0)
+    names = [
+        '-'.join(str(ele) for ele in pair)
+        for pair in pairs or [['all', 'all']]
+    ]
+    ret = {"r": mean[:, 1].tolist()}
+    for i, name in enumerate(names):
+        ret[name] = {
+            "g": mean[:, 2 + 2 * i].tolist(),
+            "coord": mean[:, 3 + 2 * i].tolist()
+        }
+    return ret
+
+def summarize_msd(filename: str, type_map: dict) -> dict:
+    """read the in-situ msd of each element
+
+    Args:
+        filename (str): the `.msd` file
+        type_map (dict): type map
+
+    Returns:
+        dict: timesteps and msd of each element
+    """
+    steps, blocks = read_ave_time(filename)
+    ret = {"step": steps.tolist()}
+    for i, element in enumerate(get_type_ids(type_map)):
+        ret[element] = blocks[:, i].tolist()
+    return ret
+
+def summarize_peratom(
+    filename: str,
+    type_map: dict,
+    integer: bool = False
+) -> dict:
+    """statistics of a per-atom in-situ dump for each element
+
+    Args:
+        filename (str): the `.pe_atom` or `.coord` dump
+        type_map (dict): type map
+        integer (bool, optional): whether the values are counts, like
+            coordination numbers, which are then histogrammed.
+            Defaults to False.
+
+    Returns:
+        dict: mean and std over all frames, mean per frame, and the
+        histogram of counts if `integer`
+    """
+    frames = read_peratom_dump(filename)
+    ret = {"step": [step for step, _ in frames]}
+    for element, type_id in get_type_ids(type_map).items():
+        values = [data[data[:, 1] == type_id, 2] for _, data in frames]
+        total = np.concatenate(values)
+        if len(total) == 0:
+            continue
+        ret[element] = {
+            "mean": float(total.mean()),
+            "std": float(total.std()),
+            "frame_mean": [float(value.mean()) for value in values]
+        }
+        if integer:
+            counts = np.bincount(np.rint(total).astype(int))
+            ret[element]["histogram"] = (counts / len(frames)).tolist()
+    return ret
+
+def summarize_insitu(
+    processes: list,
+    type_map: dict,
+    work_dir: Path
+) -> dict:
+    """summarize the in-situ analyses of all md processes, including
+    those of protocol templates
+
+    Args:
+        processes (list): processes used to build in.lmp
+        type_map (dict): type map
+        work_dir (Path): directory of the md run
+
+    Returns:
+        dict: summaries keyed by traj_file_name and analysis
+    """
+    ret = {}
+    for sub_dict in processes:
+        if sub_dict.get('process') in PROTOCOLS:
+            sub_dict = expand_protocol(sub_dict)
+        if sub_dict.get('process') != 'md_run':
+            continue
+        param_dict = sub_dict["params"]
+        traj = Path(work_dir) / param_dict["traj_file_name"]
+        summary = {}
+        if rdf := param_dict.get("rdf"):
+            summary["rdf"] = summarize_rdf(f'{traj}.rdf', rdf.get("pairs"))
+        if param_dict.get("pe_atom"):
+            summary["pe_atom"] = summarize_peratom(f'{traj}.pe_atom', type_map)
+        if param_dict.get("coord"):
+            summary["coord"] = summarize_peratom(
+                f'{traj}.coord', type_map, True
+            )
+        if param_dict.get("msd"):
+            summary["msd"] = summarize_msd(f'{traj}.msd', type_map)
+        if summary:
+            ret[param_dict["traj_file_name"]] = summary
+    return ret
@@ -0,0 +1,42 @@
+import json
+from pathlib import Path
+from typing import List
+
+from dflow.python import OP, OPIO, Artifact, OPIOSign, Parameter
+
+from glass.property.insitu import summarize_insitu
+
+
+class InsituAnalysisOP(OP):
+    """Parse the small result files of the in-situ analyses written by
+    `add_md_process`
+    """
+
+    @classmethod
+    def get_input_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "md_run": Artifact(Path),
+            "processes": Parameter(List[dict]),
+            "type_map": Parameter(dict)
+        })
+
+    @classmethod
+    def get_output_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "insitu": Artifact(Path)
+        })
+
+    @OP.exec_sign_check
+    def execute(self, op_in: OPIO) -> OPIO:
+        summary = summarize_insitu(
+            op_in["processes"],
+            op_in["type_map"],
+            op_in["md_run"]
+        )
+        insitu = Path('insitu.json')
+        with open(insitu, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=4)
+        op_out = {
+            "insitu": insitu
+        }
+        return op_out
@@ -0,0 +1,218 @@
+import json
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from glass.property.neighbor import NeighborEngine, pair_cutoffs
+from glass.traj.traj import Traj, map_chunks
+
+
+def parse_triplets(type_map: dict, triplets: List[str]) -> np.ndarray:
+    """atom types of triplets like `O-Si-O`, the center in the middle
+
+    Args:
+        type_map (dict): type map
+        triplets (List[str]): triplets of elements
+
+    Returns:
+        np.ndarray: types of the two ends and the center in shape
+        (n_triplets, 3)
+    """
+    type_index = {element: int(key) for key, element in type_map.items()}
+    ret = []
+    for triplet in triplets:
+        a, center, b = (type_index[element] for element in triplet.split('-'))
+        ret.append([a, b, center])
+    return np.array(ret, dtype=int).reshape(-1, 3)
+
+def bond_pairs(indptr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """all the pairs of bonds sharing the same center in a CSR neighbor list
+
+    Args:
+        indptr (np.ndarray): index pointer of the neighbor list
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: index of the first and the second bond
+        of every pair, the first before the second
+    """
+    n_bonds = indptr[-1]
+    degree = np.diff(indptr)
+    ends = np.repeat(indptr[1:], degree)
+    n_after = ends - np.arange(n_bonds) - 1
+    first = np.repeat(np.arange(n_bonds), n_after)
+    starts = np.repeat(np.cumsum(n_after) - n_after, n_after)
+    second = first + 1 + np.arange(len(first)) - starts
+    return first, second
+
+def local_structure_frame(
+    frame: dict,
+    cutoffs: np.ndarray,
+    triplets: np.ndarray,
+    max_coord: int,
+    n_bins: int,
+    engine: Optional[NeighborEngine] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """coordination and bond angle histograms of a frame from a single
+    neighbor search
+
+    Args:
+        frame (dict): frame read by `Traj`
+        cutoffs (np.ndarray): output of `pair_cutoffs`
+        triplets (np.ndarray): output of `parse_triplets`
+        max_coord (int): max coordination number, larger ones are counted
+            in the last bin
+        n_bins (int): number of bins of angle in [0, 180] degrees
+        engine (Optional[NeighborEngine], optional): engine reusing the
+            neighbor list of the previous frames. Defaults to None, for a
+            new search.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: counts of coordination numbers of every
+        type in shape (n_types, max_coord + 1), and counts of angles of every
+        triplet in shape (n_triplets, n_bins)
+    """
+    n_types = len(cutoffs)
+    types = frame["atom_types"]
+    engine = engine or NeighborEngine()
+    nlist = engine.get(frame["cell"], frame["coords"], cutoffs.max())
+    nlist = nlist.bonded(types, cutoffs)
+    coord = np.minimum(np.diff(nlist.indptr), max_coord)
+    coord_hist = np.bincount(
+        types * (max_coord + 1) + coord,
+        minlength=n_types * (max_coord + 1)
+    ).reshape(n_types, max_coord + 1)
+
+    angle_hist = np.zeros((len(triplets), n_bins), dtype=int)
+    first, second = bond_pairs(nlist.indptr)
+    if len(first) == 0 or len(triplets) == 0:
+        return coord_hist, angle_hist
+    v1, v2 = nlist.vectors[first], nlist.vectors[second]
+    cos = np.einsum('ij,ij->i', v1, v2) \
+        / (nlist.distances[first] * nlist.distances[second])
+    angle = np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+    index = np.minimum((angle / 180.0 * n_bins).astype(int), n_bins - 1)
+    center = types[nlist.centers[first]]
+    end_1, end_2 = types[nlist.indices[first]], types[nlist.indices[second]]
+    for i, (a, b, c) in enumerate(triplets):
+        mask = (center == c) & (
+            ((end_1 == a) & (end_2 == b)) | ((end_1 == b) & (end_2 == a))
+        )
+        angle_hist[i] = np.bincount(index[mask], minlength=n_bins)
+    return coord_hist, angle_hist
+
+def _local_structure_chunk(
+    frames: List[dict],
+    cutoffs: np.ndarray,
+    triplets: np.ndarray,
+    max_coord: int,
+    n_bins: int,
+    skin: float
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """sum of the histograms over a chunk of frames, consecutive frames
+    sharing a Verlet list"""
+    engine = NeighborEngine(skin)
+    coord_hist = np.zeros((len(cutoffs), max_coord + 1), dtype=int)
+    angle_hist = np.zeros((len(triplets), n_bins), dtype=int)
+    for frame in frames:
+        coord, angle = local_structure_frame(
+            frame, cutoffs, triplets, max_coord, n_bins, engine
+        )
+        coord_hist += coord
+        angle_hist += angle
+    return coord_hist, angle_hist, len(frames)
+
+def compute_local_structure(
+    traj_file: str,
+    type_map: dict,
+    cutoffs: dict,
+    triplets: List[str],
+    max_coord: int = 12,
+    n_bins: int = 180,
+    every_n_frame: int = 1,
+    chunk_size: int = 10,
+    n_workers: int = 1,
+    skin: float = 1.0
+) -> dict:
+    """coordination number distribution of every element and bond angle
+    distribution of every triplet, reading every selected frame once and
+    accumulating integer histograms across frames and workers
+
+    Args:
+        traj_file (str): lammps trajectory
+        type_map (dict): type map
+        cutoffs (dict): cutoff of bonded pairs like {"Si-O": 2.0}
+        triplets (List[str]): triplets like ["O-Si-O", "Si-O-Si"]
+        max_coord (int, optional): max coordination number. Defaults to 12.
+        n_bins (int, optional): number of bins of angle. Defaults to 180.
+        every_n_frame (int, optional): select frame from the traj every n
+            frames. Defaults to 1.
+        chunk_size (int, optional): number of frames in each chunk.
+            Defaults to 10.
+        n_workers (int, optional): number of processes. Defaults to 1.
+        skin (float, optional): skin of the neighbor lists reused by the
+            following frames of a chunk, see `NeighborEngine`, 0 to search
+            every frame. Defaults to 1.0.
+
+    Returns:
+        dict: `coordination` with the fraction of every coordination number
+        and the mean of each element, and `angle` with the normalized
+        distribution in 1/degree of each triplet
+    """
+    matrix = pair_cutoffs(type_map, cutoffs)
+    types = parse_triplets(type_map, triplets)
+    coord_hist = np.zeros((len(type_map), max_coord + 1), dtype=int)
+    angle_hist = np.zeros((len(types), n_bins), dtype=int)
+    n_frames = 0
+    chunks = Traj(traj_file).iter_chunks(chunk_size, every_n_frame)
+    results = map_chunks(
+        _local_structure_chunk, chunks, n_workers,
+        matrix, types, max_coord, n_bins, skin, shared=True
+    )
+    for coord, angle, n in results:
+        coord_hist, angle_hist = coord_hist + coord, angle_hist + angle
+        n_frames += n
+    if n_frames == 0:
+        raise ValueError(f"No frame selected from {traj_file}")
+
+    ret = {"coordination": {}, "angle": {}, "n_frames": n_frames}
+    numbers = np.arange(max_coord + 1)
+    for key, element in type_map.items():
+        counts = coord_hist[int(key)]
+        if counts.sum() == 0:
+            continue
+        fraction = counts / counts.sum()
+        ret["coordination"][element] = {
+            "n": numbers.tolist(),
+            "fraction": fraction.tolist(),
+            "mean": float(fraction @ numbers)
+        }
+    width = 180.0 / n_bins
+    edges = np.linspace(0, 180.0, n_bins + 1)
+    for triplet, counts in zip(triplets, angle_hist):
+        total = counts.sum()
+        ret["angle"][triplet] = {
+            "angle": ((edges[1:] + edges[:-1]) / 2).tolist(),
+            "distribution": (
+                counts / (total * width) if total else np.zeros(n_bins)
+            ).tolist()
+        }
+    return ret
+
+def write_local_structure(
+    local_structure: dict,
+    filename: str = 'local_structure.json'
+) -> Path:
+    """write the output of `compute_local_structure` to a json file
+
+    Args:
+        local_structure (dict): output of `compute_local_structure`
+        filename (str, optional): output file.
+            Defaults to 'local_structure.json'.
+
+    Returns:
+        Path: path of the json file
+    """
+    with open(filename, 'w') as f:
+        json.dump(local_structure, f, indent=4)
+    return Path(filename)
@@ -0,0 +1,59 @@
+from pathlib import Path
+from typing import List
+
+from dflow.python import OP, OPIO, Artifact, OPIOSign, Parameter
+
+from glass.property.local_structure import (
+    compute_local_structure,
+    write_local_structure,
+)
+
+
+class LocalStructureOP(OP):
+    """Compute coordination number and bond angle distributions in one pass
+    over the selected frames of the trajectory of a md run
+    """
+
+    @classmethod
+    def get_input_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "md_run": Artifact(Path),
+            "traj_file_name": Parameter(str),
+            "type_map": Parameter(dict),
+            "cutoffs": Parameter(dict),
+            "triplets": Parameter(List[str], default=[]),
+            "max_coord": Parameter(int, default=12),
+            "n_bins": Parameter(int, default=180),
+            "every_n_frame": Parameter(int, default=1),
+            "chunk_size": Parameter(int, default=10),
+            "n_workers": Parameter(int, default=1),
+            "skin": Parameter(float, default=1.0)
+        })
+
+    @classmethod
+    def get_output_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "local_structure": Artifact(Path)
+        })
+
+    @OP.exec_sign_check
+    def execute(self, op_in: OPIO) -> OPIO:
+        traj_file = Path(op_in["md_run"]) / (
+            op_in["traj_file_name"] + '.lammpstrj'
+        )
+        local_structure = compute_local_structure(
+            traj_file,
+            op_in["type_map"],
+            op_in["cutoffs"],
+            op_in["triplets"],
+            op_in["max_coord"],
+            op_in["n_bins"],
+            op_in["every_n_frame"],
+            op_in["chunk_size"],
+            op_in["n_workers"],
+            op_in["skin"]
+        )
+        op_out = {
+            "local_structure": write_local_structure(local_structure)
+        }
+        return op_out
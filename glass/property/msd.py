@@ -0,0 +1,188 @@
+import tempfile
+from pathlib import Path
+from typing import Sequence, Tuple
+
+import numpy as np
+
+from glass.io.input import count_frames
+from glass.traj.traj import Traj
+
+
+def unwrap_traj(
+    traj_file: str,
+    every_n_frame: int = 1,
+    out_file: str = 'unwrapped.npy'
+) -> Tuple[np.ndarray, np.ndarray]:
+    """stream the frames of a traj into unwrapped coordinates, stored in a
+    memory-mapped `.npy` file instead of memory. Wrapped coordinates are
+    unwrapped with the minimum image displacement between selected frames,
+    so no atom should move more than half of the box between them.
+
+    Args:
+        traj_file (str): lammps trajectory
+        every_n_frame (int, optional): select frame from the traj every n
+            frames. Defaults to 1.
+        out_file (str, optional): the memory-mapped file.
+            Defaults to 'unwrapped.npy'.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: memory-mapped unwrapped coordinates
+        in shape (n_frames, n_atoms, 3), and atom types in shape (n_atoms,)
+    """
+    n_frames = -(-count_frames(traj_file) // every_n_frame)
+    coords = None
+    for i, frame in enumerate(Traj(traj_file).iter_frames(every_n_frame)):
+        if coords is None:
+            coords = np.lib.format.open_memmap(
+                out_file,
+                mode='w+',
+                shape=(n_frames, len(frame["atom_types"]), 3)
+            )
+            types = frame["atom_types"]
+            coords[0] = frame["coords"]
+        elif frame.get("unwrapped"):
+            coords[i] = frame["coords"]
+        else:
+            delta = frame["coords"] - raw
+            frac = delta @ np.linalg.inv(frame["cell"])
+            coords[i] = coords[i - 1] + (frac - np.round(frac)) @ frame["cell"]
+        raw = frame["coords"]
+    coords.flush()
+    return coords, types
+
+def autocorr_fft(x: np.ndarray) -> np.ndarray:
+    """autocorrelation along the first axis, through FFT
+
+    Args:
+        x (np.ndarray): data in shape (n_frames, ...)
+
+    Returns:
+        np.ndarray: autocorrelation in shape (n_frames, ...)
+    """
+    n = x.shape[0]
+    f = np.fft.rfft(x, n=2 * n, axis=0)
+    res = np.fft.irfft(f * f.conjugate(), axis=0)[:n]
+    return res / (n - np.arange(n)).reshape((n,) + (1,) * (x.ndim - 1))
+
+def msd_fft(r: np.ndarray) -> np.ndarray:
+    """mean squared displacement of every atom over all time origins, in
+    O(T log T) through FFT
+
+    Args:
+        r (np.ndarray): unwrapped coordinates in shape (n_frames, n_atoms, 3)
+
+    Returns:
+        np.ndarray: msd in shape (n_frames, n_atoms)
+    """
+    n = r.shape[0]
+    d = np.square(r).sum(axis=2)
+    s2 = autocorr_fft(r).sum(axis=2)
+    # d[m - 1] + d[n - m] removed from the sum for lag m
+    removed = np.zeros_like(d)
+    removed[1:] = np.cumsum(d[:-1] + d[:0:-1], axis=0)
+    s1 = (2 * d.sum(axis=0) - removed) / (n - np.arange(n))[:, None]
+    return s1 - 2 * s2
+
+def diffusion_coefficient(
+    time: np.ndarray,
+    msd: np.ndarray,
+    fit_range: Sequence[float] = (0.2, 0.8)
+) -> float:
+    """diffusion coefficient from the slope of the msd, D = slope / 6
+
+    Args:
+        time (np.ndarray): time in ps
+        msd (np.ndarray): msd in angstrom^2
+        fit_range (Sequence[float], optional): fraction of the time to fit,
+            excluding the ballistic start and the noisy tail.
+            Defaults to (0.2, 0.8).
+
+    Returns:
+        float: diffusion coefficient in cm^2/s
+
+    Raises:
+        ValueError: less than 2 frames to fit
+    """
+    start = int(len(time) * fit_range[0])
+    end = max(int(len(time) * fit_range[1]), start + 2)
+    if len(time[start:end]) < 2:
+        raise ValueError(
+            f"Cannot fit the msd of {len(time)} frames in the range "
+            f"{tuple(fit_range)}, at least 2 frames are needed"
+        )
+    slope = np.polyfit(time[start:end], msd[start:end], 1)[0]
+    # 1 angstrom^2/ps = 1e-4 cm^2/s
+    return float(slope / 6 * 1e-4)
+
+def compute_msd(
+    traj_file: str,
+    type_map: dict,
+    frame_time: float,
+    every_n_frame: int = 1,
+    chunk_size: int = 1000,
+    fit_range: Sequence[float] = (0.2, 0.8)
+) -> dict:
+    """msd and diffusion coefficient of each element. Only `chunk_size`
+    atoms of the memory-mapped unwrapped coordinates are loaded at a time.
+
+    Args:
+        traj_file (str): lammps trajectory
+        type_map (dict): type map
+        frame_time (float): time between two frames of the traj in ps
+        every_n_frame (int, optional): select frame from the traj every n
+            frames. Defaults to 1.
+        chunk_size (int, optional): number of atoms in each chunk.
+            Defaults to 1000.
+        fit_range (Sequence[float], optional): see `diffusion_coefficient`.
+            Defaults to (0.2, 0.8).
+
+    Returns:
+        dict: `time` in ps, msd in angstrom^2 and diffusion coefficient in
+        cm^2/s of each element
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        coords, types = unwrap_traj(
+            traj_file,
+            every_n_frame,
+            Path(tmp_dir) / 'unwrapped.npy'
+        )
+        time = np.arange(len(coords)) * frame_time * every_n_frame
+        ret = {"time": time, "msd": {}, "diffusion": {}}
+        for key, element in type_map.items():
+            indices = np.nonzero(types == int(key))[0]
+            if len(indices) == 0:
+                continue
+            total = np.zeros(len(coords))
+            for start in range(0, len(indices), chunk_size):
+                chunk = np.asarray(
+                    coords[:, indices[start:start + chunk_size]]
+                )
+                total += msd_fft(chunk).sum(axis=1)
+            msd = total / len(indices)
+            ret["msd"][element] = msd
+            ret["diffusion"][element] = diffusion_coefficient(
+                time,
+                msd,
+                fit_range
+            )
+        del coords
+    return ret
+
+def write_msd(msd: dict, filename: str = 'msd.csv') -> Path:
+    """write time and msd of each element to a csv file
+
+    Args:
+        msd (dict): output of `compute_msd`
+        filename (str, optional): output file. Defaults to 'msd.csv'.
+
+    Returns:
+        Path: path of the csv file
+    """
+    np.savetxt(
+        filename,
+        np.column_stack([msd["time"], *msd["msd"].values()]),
+        delimiter=',',
+        header=','.join(["time", *msd["msd"].keys()]),
+        comments=''
+    )
+    return Path(filename)
@@ -0,0 +1,54 @@
+import json
+from pathlib import Path
+from typing import List
+
+from dflow.python import OP, OPIO, Artifact, OPIOSign, Parameter
+
+from glass.property.msd import compute_msd, write_msd
+
+
+class MsdOP(OP):
+    """Compute the msd and diffusion coefficient of each element over the
+    trajectory of a md run
+    """
+
+    @classmethod
+    def get_input_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "md_run": Artifact(Path),
+            "traj_file_name": Parameter(str),
+            "type_map": Parameter(dict),
+            "frame_time": Parameter(float),
+            "every_n_frame": Parameter(int, default=1),
+            "chunk_size": Parameter(int, default=1000),
+            "fit_range": Parameter(List[float], default=[0.2, 0.8])
+        })
+
+    @classmethod
+    def get_output_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "msd": Artifact(Path),
+            "diffusion": Artifact(Path)
+        })
+
+    @OP.exec_sign_check
+    def execute(self, op_in: OPIO) -> OPIO:
+        traj_file = Path(op_in["md_run"]) / (
+            op_in["traj_file_name"] + '.lammpstrj'
+        )
+        msd = compute_msd(
+            traj_file,
+            op_in["type_map"],
+            op_in["frame_time"],
+            op_in["every_n_frame"],
+            op_in["chunk_size"],
+            op_in["fit_range"]
+        )
+        diffusion = Path('diffusion.json')
+        with open(diffusion, 'w', encoding='utf-8') as f:
+            json.dump(msd["diffusion"], f, indent=4)
+        op_out = {
+            "msd": write_msd(msd),
+            "diffusion": diffusion
+        }
+        return op_out
@@ -0,0 +1,292 @@
+from collections import OrderedDict
+from itertools import product
+from typing import Hashable, Optional
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def find_pairs(cell: np.ndarray, coords: np.ndarray, cutoff: float):
+    """find all the ordered pairs of atoms within cutoff under periodic
+    boundaries. Periodic images close to the box are added as ghosts, so
+    that a KD-tree search without periodicity finds all the pairs, which
+    works for triclinic cells and for cutoffs larger than the cell.
+
+    Args:
+        cell (np.ndarray): lattice vectors as rows, in shape (3, 3)
+        coords (np.ndarray): cartesian coordinates in shape (n_atoms, 3)
+        cutoff (float): cutoff radius
+
+    Returns:
+        tuple: index of the first atom, index of the second atom, and the
+        vector from the first atom to the image of the second atom
+    """
+    frac = coords @ np.linalg.inv(cell)
+    wrap = np.floor(frac)
+    frac -= wrap
+    volume = abs(np.linalg.det(cell))
+    areas = np.linalg.norm(np.cross(cell[[1, 2, 0]], cell[[2, 0, 1]]), axis=1)
+    margin = cutoff / (volume / areas)
+    n_images = np.ceil(margin).astype(int)
+    shifts = np.array(list(product(*[range(-n, n + 1) for n in n_images])))
+    ghost_frac = frac[None, :, :] + shifts[:, None, :]
+    keep = np.all((ghost_frac > -margin) & (ghost_frac < 1 + margin), axis=2)
+    shift_index, atom_index = np.nonzero(keep)
+    ghost = ghost_frac[shift_index, atom_index] @ cell
+    pairs = cKDTree(frac @ cell).sparse_distance_matrix(
+        cKDTree(ghost), cutoff, output_type='ndarray'
+    )
+    i = pairs['i']
+    j = atom_index[pairs['j']]
+    # images relative to the input coordinates, which may be unwrapped
+    images = shifts[shift_index[pairs['j']]] - wrap[j] + wrap[i]
+    not_self = (i != j) | np.any(images != 0, axis=1)
+    i, j, images = i[not_self], j[not_self], images[not_self]
+    vectors = coords[j] + images @ cell - coords[i]
+    return i, j, vectors
+
+
+def pair_cutoffs(type_map: dict, cutoffs: dict) -> np.ndarray:
+    """cutoff of every pair of atom types
+
+    Args:
+        type_map (dict): type map
+        cutoffs (dict): cutoff of pairs of elements like {"Si-O": 2.0},
+            pairs not given are not bonded
+
+    Returns:
+        np.ndarray: symmetric cutoffs in shape (n_types, n_types)
+    """
+    type_index = {element: int(key) for key, element in type_map.items()}
+    matrix = np.zeros((len(type_map), len(type_map)))
+    for pair, cutoff in cutoffs.items():
+        a, b = (type_index[element] for element in pair.split('-'))
+        matrix[a, b] = matrix[b, a] = cutoff
+    return matrix
+
+
+class NeighborList(object):
+    def __init__(
+        self,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        vectors: np.ndarray,
+        cutoff: float
+    ) -> None:
+        """
+        Neighbors of every atom stored in CSR style: the neighbors of atom `i`
+        are `indices[indptr[i]:indptr[i + 1]]`, with the vectors pointing to
+        their nearest images in `vectors` and the distances in `distances`
+        """
+        self.indptr = indptr
+        self.indices = indices
+        self.vectors = vectors
+        self.distances = np.linalg.norm(vectors, axis=1)
+        self.cutoff = cutoff
+
+    @classmethod
+    def from_pairs(
+        cls,
+        i: np.ndarray,
+        j: np.ndarray,
+        vectors: np.ndarray,
+        n_atoms: int,
+        cutoff: float
+    ) -> "NeighborList":
+        """build the CSR arrays from unsorted pairs
+
+        Args:
+            i (np.ndarray): index of the first atom
+            j (np.ndarray): index of the second atom
+            vectors (np.ndarray): vectors from the first atom to the second
+            n_atoms (int): number of atoms
+            cutoff (float): cutoff radius
+
+        Returns:
+            NeighborList: the neighbor list
+        """
+        order = np.lexsort((j, i))
+        indptr = np.zeros(n_atoms + 1, dtype=int)
+        np.cumsum(np.bincount(i, minlength=n_atoms), out=indptr[1:])
+        return cls(indptr, j[order], vectors[order], cutoff)
+
+    @classmethod
+    def build(
+        cls,
+        cell: np.ndarray,
+        coords: np.ndarray,
+        cutoff: float
+    ) -> "NeighborList":
+        """build the neighbor list of a frame
+
+        Args:
+            cell (np.ndarray): lattice vectors as rows, in shape (3, 3)
+            coords (np.ndarray): cartesian coordinates in shape (n_atoms, 3)
+            cutoff (float): cutoff radius
+
+        Returns:
+            NeighborList: the neighbor list
+        """
+        i, j, vectors = find_pairs(cell, coords, cutoff)
+        return cls.from_pairs(i, j, vectors, len(coords), cutoff)
+
+    @property
+    def n_atoms(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def n_pairs(self) -> int:
+        return len(self.indices)
+
+    @property
+    def centers(self) -> np.ndarray:
+        """index of the first atom of every pair"""
+        return np.repeat(np.arange(self.n_atoms), np.diff(self.indptr))
+
+    def neighbors(self, i: int) -> np.ndarray:
+        """index of the neighbors of atom `i`"""
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def filter(self, mask: np.ndarray, cutoff: Optional[float] = None):
+        """keep the pairs in `mask`
+
+        Args:
+            mask (np.ndarray): bool mask of the pairs
+            cutoff (Optional[float], optional): cutoff of the new list.
+                Defaults to None, for the same cutoff.
+
+        Returns:
+            NeighborList: the neighbor list of the kept pairs
+        """
+        indptr = np.zeros_like(self.indptr)
+        counts = np.bincount(self.centers[mask], minlength=self.n_atoms)
+        np.cumsum(counts, out=indptr[1:])
+        return NeighborList(
+            indptr,
+            self.indices[mask],
+            self.vectors[mask],
+            self.cutoff if cutoff is None else cutoff
+        )
+
+    def within(self, cutoff: float) -> "NeighborList":
+        """neighbor list with a smaller cutoff, without searching again"""
+        return self.filter(self.distances < cutoff, cutoff)
+
+    def bonded(self, types: np.ndarray, cutoffs: np.ndarray) -> "NeighborList":
+        """neighbor list with a cutoff per pair of atom types
+
+        Args:
+            types (np.ndarray): atom types start from zero
+            cutoffs (np.ndarray): output of `pair_cutoffs`
+
+        Returns:
+            NeighborList: the neighbor list of bonded pairs
+        """
+        cutoff = cutoffs[types[self.centers], types[self.indices]]
+        return self.filter(self.distances < cutoff)
+
+    def images(self, cell: np.ndarray, coords: np.ndarray) -> np.ndarray:
+        """periodic image of the second atom of every pair
+
+        Args:
+            cell (np.ndarray): lattice vectors as rows, in shape (3, 3)
+            coords (np.ndarray): coordinates the list was built from
+
+        Returns:
+            np.ndarray: integer images in shape (n_pairs, 3)
+        """
+        shift = self.vectors - coords[self.indices] + coords[self.centers]
+        return np.rint(shift @ np.linalg.inv(cell)).astype(int)
+
+
+class NeighborEngine(object):
+    def __init__(self, skin: float = 0.0, cache_size: int = 16) -> None:
+        """
+        Build neighbor lists of frames, cached per frame and cutoff.
+
+        With a positive `skin`, the pairs are searched within `cutoff + skin`
+        and reused, Verlet-style, by the following frames as long as no pair
+        left out can have come within the cutoff, that is while
+        `2 * max displacement + (cutoff + skin) * strain < skin`, with the
+        displacements of the atoms and the strain of the cell since the
+        search. The cell of a NPT run may then change between frames.
+        """
+        self.skin = skin
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.verlet = {}
+        self.n_builds = 0
+
+    def get(
+        self,
+        cell: np.ndarray,
+        coords: np.ndarray,
+        cutoff: float,
+        key: Optional[Hashable] = None
+    ) -> NeighborList:
+        """neighbor list of a frame
+
+        Args:
+            cell (np.ndarray): lattice vectors as rows, in shape (3, 3)
+            coords (np.ndarray): cartesian coordinates in shape (n_atoms, 3)
+            cutoff (float): cutoff radius
+            key (Optional[Hashable], optional): key of the frame, like the
+                timestep, to cache the list. Defaults to None, no caching.
+
+        Returns:
+            NeighborList: the neighbor list
+        """
+        if key is not None:
+            for (cached_key, cached_cutoff), nlist in self.cache.items():
+                if cached_key == key and cached_cutoff >= cutoff:
+                    self.cache.move_to_end((cached_key, cached_cutoff))
+                    if cached_cutoff == cutoff:
+                        return nlist
+                    return nlist.within(cutoff)
+        nlist = self._verlet_get(cell, coords, cutoff)
+        if key is not None:
+            self.cache[(key, cutoff)] = nlist
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return nlist
+
+    def _verlet_get(
+        self,
+        cell: np.ndarray,
+        coords: np.ndarray,
+        cutoff: float
+    ) -> NeighborList:
+        """reuse the list of a previous frame searched with `cutoff + skin`
+        if possible, search again otherwise"""
+        if self.skin <= 0:
+            self.n_builds += 1
+            return NeighborList.build(cell, coords, cutoff)
+        ref = self.verlet.get(cutoff)
+        if ref is not None and ref["frac"].shape == coords.shape:
+            frac = coords @ np.linalg.inv(cell) - ref["frac"]
+            frac -= np.round(frac)
+            displacement = np.linalg.norm(frac @ cell, axis=1).max()
+            # largest stretch of a vector by the deformation of the cell
+            strain = np.linalg.norm(ref["inv"] @ cell - np.eye(3), 2)
+            if 2 * displacement + (cutoff + self.skin) * strain < self.skin:
+                nlist = ref["nlist"]
+                vectors = (
+                    nlist.vectors @ ref["inv"]
+                    + frac[nlist.indices] - frac[nlist.centers]
+                ) @ cell
+                candidate = NeighborList(
+                    nlist.indptr,
+                    nlist.indices,
+                    vectors,
+                    nlist.cutoff
+                )
+                return candidate.within(cutoff)
+        self.n_builds += 1
+        nlist = NeighborList.build(cell, coords, cutoff + self.skin)
+        inv = np.linalg.inv(cell)
+        self.verlet[cutoff] = {
+            "inv": inv,
+            "frac": coords @ inv,
+            "nlist": nlist
+        }
+        return nlist.within(cutoff)
@@ -0,0 +1,148 @@
+from itertools import combinations_with_replacement
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from glass.property.neighbor import NeighborEngine
+from glass.traj.traj import Traj, map_chunks
+
+
+def rdf_frame(
+    frame: dict,
+    n_types: int,
+    r_max: float,
+    n_bins: int,
+    engine: Optional[NeighborEngine] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """total and partial g(r) of a single frame
+
+    Args:
+        frame (dict): frame read by `Traj`
+        n_types (int): number of atom types
+        r_max (float): max distance
+        n_bins (int): number of bins
+        engine (Optional[NeighborEngine], optional): engine reusing the
+            neighbor list of the previous frames. Defaults to None, for a
+            new search.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: total g(r) in shape (n_bins,) and
+        partial g(r) in shape (n_types, n_types, n_bins)
+    """
+    types = frame["atom_types"]
+    engine = engine or NeighborEngine()
+    nlist = engine.get(frame["cell"], frame["coords"], r_max)
+    index = np.minimum(
+        (nlist.distances / r_max * n_bins).astype(int),
+        n_bins - 1
+    )
+    index += (types[nlist.centers] * n_types + types[nlist.indices]) * n_bins
+    counts = np.bincount(index, minlength=n_types * n_types * n_bins)
+    counts = counts.reshape(n_types, n_types, n_bins)
+    edges = np.linspace(0, r_max, n_bins + 1)
+    shell = 4.0 / 3.0 * np.pi * np.diff(edges ** 3)
+    volume = abs(np.linalg.det(frame["cell"]))
+    n_each = np.bincount(types, minlength=n_types).astype(float)
+    g_total = counts.sum(axis=(0, 1)) * volume / (len(types) ** 2 * shell)
+    norm = np.outer(n_each, n_each)[:, :, None] * shell
+    g_partial = np.divide(
+        counts * volume,
+        norm,
+        out=np.zeros(counts.shape),
+        where=norm > 0
+    )
+    return g_total, g_partial
+
+def _rdf_chunk(
+    frames: List[dict],
+    n_types: int,
+    r_max: float,
+    n_bins: int,
+    skin: float
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """sum of the g(r) over a chunk of frames, consecutive frames sharing
+    a Verlet list"""
+    engine = NeighborEngine(skin)
+    g_total = np.zeros(n_bins)
+    g_partial = np.zeros((n_types, n_types, n_bins))
+    for frame in frames:
+        total, partial = rdf_frame(frame, n_types, r_max, n_bins, engine)
+        g_total += total
+        g_partial += partial
+    return g_total, g_partial, len(frames)
+
+def compute_rdf(
+    traj_file: str,
+    type_map: dict,
+    r_max: float = 6.0,
+    n_bins: int = 200,
+    every_n_frame: int = 1,
+    chunk_size: int = 10,
+    n_workers: int = 1,
+    skin: float = 1.0
+) -> dict:
+    """total and partial g(r) averaged over the selected frames of a traj.
+    Frames are read in chunks, so that at most `chunk_size` frames per
+    worker are held in memory.
+
+    Args:
+        traj_file (str): lammps trajectory
+        type_map (dict): type map
+        r_max (float, optional): max distance. Defaults to 6.0.
+        n_bins (int, optional): number of bins. Defaults to 200.
+        every_n_frame (int, optional): select frame from the traj every n
+            frames. Defaults to 1.
+        chunk_size (int, optional): number of frames in each chunk.
+            Defaults to 10.
+        n_workers (int, optional): number of processes. Defaults to 1.
+        skin (float, optional): skin of the neighbor lists reused by the
+            following frames of a chunk, see `NeighborEngine`, 0 to search
+            every frame. Defaults to 1.0.
+
+    Returns:
+        dict: `r` at the center of bins, `total` g(r), and g(r) of each
+        pair of elements like `Si-O`
+    """
+    n_types = len(type_map)
+    g_total = np.zeros(n_bins)
+    g_partial = np.zeros((n_types, n_types, n_bins))
+    n_frames = 0
+    chunks = Traj(traj_file).iter_chunks(chunk_size, every_n_frame)
+    results = map_chunks(
+        _rdf_chunk, chunks, n_workers, n_types, r_max, n_bins, skin,
+        shared=True
+    )
+    for total, partial, n in results:
+        g_total, g_partial = g_total + total, g_partial + partial
+        n_frames += n
+    if n_frames == 0:
+        raise ValueError(f"No frame selected from {traj_file}")
+    edges = np.linspace(0, r_max, n_bins + 1)
+    ret = {
+        "r": (edges[1:] + edges[:-1]) / 2,
+        "total": g_total / n_frames
+    }
+    for a, b in combinations_with_replacement(range(n_types), 2):
+        name = f"{type_map[str(a)]}-{type_map[str(b)]}"
+        ret[name] = g_partial[a, b] / n_frames
+    return ret
+
+def write_rdf(rdf: dict, filename: str = 'rdf.csv') -> Path:
+    """write g(r) to a csv file, one column per item of `rdf`
+
+    Args:
+        rdf (dict): output of `compute_rdf`
+        filename (str, optional): output file. Defaults to 'rdf.csv'.
+
+    Returns:
+        Path: path of the csv file
+    """
+    np.savetxt(
+        filename,
+        np.column_stack(list(rdf.values())),
+        delimiter=',',
+        header=','.join(rdf.keys()),
+        comments=''
+    )
+    return Path(filename)
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+from dflow.python import OP, OPIO, Artifact, OPIOSign, Parameter
+
+from glass.property.rdf import compute_rdf, write_rdf
+
+
+class RdfOP(OP):
+    """Compute total and partial g(r) over the selected frames of the
+    trajectory of a md run
+    """
+
+    @classmethod
+    def get_input_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "md_run": Artifact(Path),
+            "traj_file_name": Parameter(str),
+            "type_map": Parameter(dict),
+            "r_max": Parameter(float, default=6.0),
+            "n_bins": Parameter(int, default=200),
+            "every_n_frame": Parameter(int, default=1),
+            "chunk_size": Parameter(int, default=10),
+            "n_workers": Parameter(int, default=1),
+            "skin": Parameter(float, default=1.0)
+        })
+
+    @classmethod
+    def get_output_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "rdf": Artifact(Path)
+        })
+
+    @OP.exec_sign_check
+    def execute(self, op_in: OPIO) -> OPIO:
+        traj_file = Path(op_in["md_run"]) / (
+            op_in["traj_file_name"] + '.lammpstrj'
+        )
+        rdf = compute_rdf(
+            traj_file,
+            op_in["type_map"],
+            op_in["r_max"],
+            op_in["n_bins"],
+            op_in["every_n_frame"],
+            op_in["chunk_size"],
+            op_in["n_workers"],
+            op_in["skin"]
+        )
+        op_out = {
+            "rdf": write_rdf(rdf)
+        }
+        return op_out
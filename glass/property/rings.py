@@ -0,0 +1,338 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from glass.property.neighbor import NeighborEngine, pair_cutoffs
+from glass.traj.traj import Traj, map_chunks
+
+# bond graph of the frame analysed by the workers of the pool, and keys of
+# the rings already found by the worker
+_GRAPH = None
+_KNOWN = None
+
+
+def bond_graph(
+    frame: dict,
+    type_map: dict,
+    cutoffs: dict,
+    engine: Optional[NeighborEngine] = None
+) -> list:
+    """bond graph of a frame, from a periodic neighbor search with a cutoff
+    per pair of elements
+
+    Args:
+        frame (dict): frame read by `Traj`
+        type_map (dict): type map
+        cutoffs (dict): cutoff of bonded pairs like {"Si-O": 2.0}
+        engine (Optional[NeighborEngine], optional): engine reusing the
+            neighbor list of the previous frames. Defaults to None, for a
+            new search.
+
+    Returns:
+        list: for every atom, the list of (neighbor, image) of its bonds
+    """
+    matrix = pair_cutoffs(type_map, cutoffs)
+    engine = engine or NeighborEngine()
+    nlist = engine.get(frame["cell"], frame["coords"], matrix.max())
+    nlist = nlist.bonded(frame["atom_types"], matrix)
+    images = [
+        tuple(image)
+        for image in nlist.images(frame["cell"], frame["coords"])
+    ]
+    indices = nlist.indices.tolist()
+    return [
+        list(zip(indices[start:end], images[start:end]))
+        for start, end in zip(nlist.indptr[:-1], nlist.indptr[1:])
+    ]
+
+def _shift(image: tuple, shift: tuple) -> tuple:
+    return (image[0] + shift[0], image[1] + shift[1], image[2] + shift[2])
+
+def _bfs(
+    graph: list,
+    start: tuple,
+    depth: int,
+    banned: Optional[int] = None
+) -> Tuple[dict, dict]:
+    """breadth-first search over (atom, image) states
+
+    Args:
+        graph (list): output of `bond_graph`
+        start (tuple): (atom, image) to start from
+        depth (int): max number of bonds
+        banned (Optional[int], optional): atom not to pass through.
+            Defaults to None.
+
+    Returns:
+        Tuple[dict, dict]: distance and parents of every state reached
+    """
+    dist = {start: 0}
+    parents = {start: []}
+    frontier = [start]
+    for d in range(1, depth + 1):
+        next_frontier = []
+        for state in frontier:
+            atom, image = state
+            for neighbor, shift in graph[atom]:
+                if neighbor == banned:
+                    continue
+                new = (neighbor, _shift(image, shift))
+                if new not in dist:
+                    dist[new] = d
+                    parents[new] = [state]
+                    next_frontier.append(new)
+                elif dist[new] == d:
+                    parents[new].append(state)
+        frontier = next_frontier
+    return dist, parents
+
+def _paths(parents: dict, end: tuple) -> List[list]:
+    """all the shortest paths to `end` in the tree of `_bfs`"""
+    if not parents[end]:
+        return [[end]]
+    return [
+        path + [end]
+        for parent in parents[end]
+        for path in _paths(parents, parent)
+    ]
+
+def _is_primitive(graph: list, ring: list) -> bool:
+    """a ring is primitive if no path between two of its atoms is shorter
+    than the path along the ring"""
+    n = len(ring)
+    for i, (atom, image) in enumerate(ring):
+        dist, _ = _bfs(graph, (atom, (0, 0, 0)), n // 2 - 1)
+        for j in range(i + 2, n):
+            along = min(j - i, n - j + i)
+            other, other_image = ring[j]
+            relative = (other, _shift(other_image, tuple(-x for x in image)))
+            if dist.get(relative, along) < along:
+                return False
+    return True
+
+def _ring_key(ring: list) -> tuple:
+    """key of a ring independent of the atom and image it is found from"""
+    atom, image = min(ring)
+    offset = tuple(-x for x in image)
+    return tuple(sorted((a, _shift(i, offset)) for a, i in ring))
+
+def find_rings(
+    graph: list,
+    sources: List[int],
+    max_size: int,
+    criterion: str = "primitive",
+    known: Optional[set] = None
+) -> Dict[tuple, int]:
+    """find King's shortest-path rings through every source atom: for every
+    pair of bonds of the source, the shortest paths joining the two
+    neighbors without passing through the source close a ring. The paths
+    are found by meeting in the middle of two searches of half depth, one
+    from each neighbor.
+
+    Args:
+        graph (list): output of `bond_graph`
+        sources (List[int]): atoms to search rings from
+        max_size (int): max number of atoms in a ring
+        criterion (str, optional): `king` for the rings above, or
+            `primitive` to keep only those that can not be split into two
+            smaller rings (Guttman). Defaults to "primitive".
+        known (Optional[set], optional): keys of rings already found, which
+            are skipped, updated in place. Defaults to None.
+
+    Returns:
+        Dict[tuple, int]: size of every new ring found, keyed by the ring
+    """
+    if criterion not in ["king", "primitive"]:
+        raise NotImplementedError('Only king and primitive supported for now.')
+    if known is None:
+        known = set()
+    rings = {}
+    origin = (0, 0, 0)
+    half = (max_size - 1) // 2
+    for source in sources:
+        searches = [
+            _bfs(graph, bond, half, banned=source) for bond in graph[source]
+        ]
+        for a, (dist_a, parents_a) in enumerate(searches):
+            for dist_b, parents_b in searches[a + 1:]:
+                common = dist_a.keys() & dist_b.keys()
+                if not common:
+                    continue
+                length = min(dist_a[state] + dist_b[state] for state in common)
+                if length > max_size - 2:
+                    continue
+                middle = (length + 1) // 2
+                for state in common:
+                    if dist_a[state] != middle \
+                            or dist_b[state] != length - middle:
+                        continue
+                    for path_a in _paths(parents_a, state):
+                        for path_b in _paths(parents_b, state):
+                            ring = [(source, origin)] + path_a + path_b[-2::-1]
+                            key = _ring_key(ring)
+                            if key in known:
+                                continue
+                            known.add(key)
+                            if criterion == "king" \
+                                    or _is_primitive(graph, ring):
+                                rings[key] = len(ring)
+    return rings
+
+def _init_graph(graph: list):
+    global _GRAPH, _KNOWN
+    _GRAPH = graph
+    _KNOWN = set()
+
+def _find_rings_batch(
+    sources: List[int],
+    max_size: int,
+    criterion: str
+) -> Dict[tuple, int]:
+    return find_rings(_GRAPH, sources, max_size, criterion, _KNOWN)
+
+def ring_statistics(
+    frame: dict,
+    type_map: dict,
+    cutoffs: dict,
+    max_size: int = 12,
+    criterion: str = "primitive",
+    n_workers: int = 1,
+    batch_size: int = 1000,
+    engine: Optional[NeighborEngine] = None
+) -> np.ndarray:
+    """number of rings of every size in a frame. Batches of source atoms are
+    spread over a process pool, every worker receiving the graph once.
+
+    Args:
+        frame (dict): frame read by `Traj`
+        type_map (dict): type map
+        cutoffs (dict): cutoff of bonded pairs like {"Si-O": 2.0}
+        max_size (int, optional): max number of atoms in a ring.
+            Defaults to 12.
+        criterion (str, optional): see `find_rings`.
+            Defaults to "primitive".
+        n_workers (int, optional): number of processes. Defaults to 1.
+        batch_size (int, optional): number of source atoms in a batch.
+            Defaults to 1000.
+        engine (Optional[NeighborEngine], optional): see `bond_graph`.
+            Defaults to None.
+
+    Returns:
+        np.ndarray: number of rings with index as size, in shape
+        (max_size + 1,)
+    """
+    graph = bond_graph(frame, type_map, cutoffs, engine)
+    batches = [
+        list(range(start, min(start + batch_size, len(graph))))
+        for start in range(0, len(graph), batch_size)
+    ]
+    rings = {}
+    known = set()
+    if n_workers > 1:
+        with ProcessPoolExecutor(
+            n_workers,
+            initializer=_init_graph,
+            initargs=(graph,)
+        ) as pool:
+            futures = [
+                pool.submit(_find_rings_batch, batch, max_size, criterion)
+                for batch in batches
+            ]
+            for future in futures:
+                rings.update(future.result())
+    else:
+        for batch in batches:
+            rings.update(find_rings(graph, batch, max_size, criterion, known))
+    return np.bincount(
+        np.array(list(rings.values()), dtype=int),
+        minlength=max_size + 1
+    )
+
+def _rings_chunk(
+    frames: List[dict],
+    type_map: dict,
+    cutoffs: dict,
+    max_size: int,
+    criterion: str,
+    skin: float,
+    n_workers: int = 1,
+    batch_size: int = 1000
+) -> Tuple[np.ndarray, np.ndarray]:
+    """number of rings of every frame of a chunk, consecutive frames sharing
+    a Verlet list"""
+    engine = NeighborEngine(skin)
+    counts = [
+        ring_statistics(
+            frame, type_map, cutoffs, max_size, criterion,
+            n_workers, batch_size, engine
+        )
+        for frame in frames
+    ]
+    n_atoms = [len(frame["atom_types"]) for frame in frames]
+    return np.array(counts).reshape(-1, max_size + 1), np.array(n_atoms)
+
+def compute_rings(
+    traj_file: str,
+    type_map: dict,
+    cutoffs: dict,
+    max_size: int = 12,
+    criterion: str = "primitive",
+    every_n_frame: int = 1,
+    n_workers: int = 1,
+    batch_size: int = 1000,
+    skin: float = 1.0,
+    chunk_size: int = 10
+) -> dict:
+    """ring size distribution averaged over the selected frames of a traj.
+    Chunks of frames are spread over a process pool, which attach to the
+    frames in shared memory, see `map_chunks`. With fewer chunks than
+    workers, like a single large frame, the batches of source atoms of
+    every frame are spread over the pool instead, see `ring_statistics`.
+
+    Args:
+        traj_file (str): lammps trajectory
+        type_map (dict): type map
+        cutoffs (dict): cutoff of bonded pairs like {"Si-O": 2.0}
+        max_size (int, optional): max number of atoms in a ring.
+            Defaults to 12.
+        criterion (str, optional): see `find_rings`.
+            Defaults to "primitive".
+        every_n_frame (int, optional): select frame from the traj every n
+            frames. Defaults to 1.
+        n_workers (int, optional): number of processes. Defaults to 1.
+        batch_size (int, optional): number of source atoms in a batch.
+            Defaults to 1000.
+        skin (float, optional): skin of the neighbor lists reused by the
+            following frames of a chunk, see `NeighborEngine`, 0 to search
+            every frame. Defaults to 1.0.
+        chunk_size (int, optional): number of frames in each chunk.
+            Defaults to 10.
+
+    Returns:
+        dict: `size`, mean number of rings per frame `count`, and per atom
+        `per_atom`
+    """
+    chunks = Traj(traj_file).iter_chunks(chunk_size, every_n_frame)
+    args = (type_map, cutoffs, max_size, criterion, skin)
+    head = list(islice(chunks, n_workers))
+    if len(head) < n_workers:
+        results = [
+            _rings_chunk(chunk, *args, n_workers, batch_size)
+            for chunk in head
+        ]
+    else:
+        results = list(map_chunks(
+            _rings_chunk, chain(head, chunks), n_workers, *args, 1,
+            batch_size, shared=True
+        ))
+    if not results:
+        raise ValueError(f"No frame selected from {traj_file}")
+    counts = np.concatenate([counts for counts, _ in results]).astype(float)
+    n_atoms = np.concatenate([n for _, n in results])
+    return {
+        "size": list(range(3, max_size + 1)),
+        "count": counts.mean(axis=0)[3:].tolist(),
+        "per_atom": (counts / n_atoms[:, None]).mean(axis=0)[3:].tolist()
+    }
@@ -0,0 +1,58 @@
+import json
+from pathlib import Path
+
+from dflow.python import OP, OPIO, Artifact, OPIOSign, Parameter
+
+from glass.property.rings import compute_rings
+
+
+class RingsOP(OP):
+    """Compute the ring size distribution over the selected frames of the
+    trajectory of a md run
+    """
+
+    @classmethod
+    def get_input_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "md_run": Artifact(Path),
+            "traj_file_name": Parameter(str),
+            "type_map": Parameter(dict),
+            "cutoffs": Parameter(dict),
+            "max_size": Parameter(int, default=12),
+            "criterion": Parameter(str, default="primitive"),
+            "every_n_frame": Parameter(int, default=1),
+            "n_workers": Parameter(int, default=1),
+            "batch_size": Parameter(int, default=1000),
+            "skin": Parameter(float, default=1.0),
+            "chunk_size": Parameter(int, default=10)
+        })
+
+    @classmethod
+    def get_output_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "rings": Artifact(Path)
+        })
+
+    @OP.exec_sign_check
+    def execute(self, op_in: OPIO) -> OPIO:
+        traj_file = Path(op_in["md_run"]) / (
+            op_in["traj_file_name"] + '.lammpstrj'
+        )
+        rings = compute_rings(
+            traj_file,
+            op_in["type_map"],
+            op_in["cutoffs"],
+            op_in["max_size"],
+            op_in["criterion"],
+            op_in["every_n_frame"],
+            op_in["n_workers"],
+            op_in["batch_size"],
+            op_in["skin"],
+            op_in["chunk_size"]
+        )
+        with open('rings.json', 'w') as f:
+            json.dump(rings, f, indent=4)
+        op_out = {
+            "rings": Path('rings.json')
+        }
+        return op_out
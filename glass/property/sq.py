@@ -0,0 +1,294 @@
+from itertools import combinations_with_replacement, product
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from glass.property.rdf import rdf_frame
+from glass.traj.traj import Traj, map_chunks
+
+
+def sq_fourier(
+    frame: dict,
+    n_types: int,
+    q: np.ndarray,
+    r_max: float,
+    n_bins: int
+) -> np.ndarray:
+    """Ashcroft-Langreth partial S(q) of a frame by Fourier transform of the
+    partial g(r), S_ab(q) = delta_ab + 4 pi rho sqrt(c_a c_b)
+    int r^2 (g_ab(r) - 1) sin(qr) / (qr) dr
+
+    Args:
+        frame (dict): frame read by `Traj`
+        n_types (int): number of atom types
+        q (np.ndarray): wave numbers in 1/angstrom
+        r_max (float): max distance of g(r), the integral is truncated here
+        n_bins (int): number of bins of g(r)
+
+    Returns:
+        np.ndarray: partial S(q) in shape (n_types, n_types, n_q)
+    """
+    _, g_partial = rdf_frame(frame, n_types, r_max, n_bins)
+    edges = np.linspace(0, r_max, n_bins + 1)
+    r = (edges[1:] + edges[:-1]) / 2
+    rho = len(frame["atom_types"]) / abs(np.linalg.det(frame["cell"]))
+    conc = np.bincount(frame["atom_types"], minlength=n_types) \
+        / len(frame["atom_types"])
+    # sin(qr) / (qr) in shape (n_q, n_bins)
+    kernel = np.sinc(np.outer(q, r) / np.pi) * r ** 2 * (r_max / n_bins)
+    integral = (g_partial - 1) @ kernel.T
+    weight = 4 * np.pi * rho * np.sqrt(np.outer(conc, conc))[:, :, None]
+    return np.eye(n_types)[:, :, None] + weight * integral
+
+def reciprocal_vectors(
+    cell: np.ndarray,
+    q_min: float,
+    q_max: float,
+    n_q: int,
+    q_per_bin: Optional[int] = None,
+    seed: int = 42
+) -> Tuple[np.ndarray, np.ndarray]:
+    """reciprocal lattice vectors with q_min <= |q| < q_max
+
+    Args:
+        cell (np.ndarray): lattice vectors as rows, in shape (3, 3)
+        q_min (float): min wave number
+        q_max (float): max wave number
+        n_q (int): number of bins of |q|
+        q_per_bin (Optional[int], optional): if set, at most `q_per_bin`
+            randomly chosen vectors are kept in every bin, which bounds
+            the cost for large cells. Defaults to None, for all of them.
+        seed (int, optional): random seed. Defaults to 42.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: vectors in shape (n_vectors, 3), and
+        the bin of every vector
+    """
+    recip = 2 * np.pi * np.linalg.inv(cell).T
+    widths = 2 * np.pi / np.linalg.norm(recip, axis=1)
+    n_max = np.ceil(q_max * widths / (2 * np.pi)).astype(int)
+    hkl = np.array(list(product(*[range(-n, n + 1) for n in n_max])))
+    vectors = hkl @ recip
+    norm = np.linalg.norm(vectors, axis=1)
+    bins = np.floor((norm - q_min) / (q_max - q_min) * n_q).astype(int)
+    keep = (bins >= 0) & (bins < n_q)
+    vectors, bins = vectors[keep], bins[keep]
+    if q_per_bin:
+        rng = np.random.default_rng(seed)
+        selected = []
+        for i in range(n_q):
+            index = np.nonzero(bins == i)[0]
+            if len(index) > q_per_bin:
+                index = rng.choice(index, q_per_bin, replace=False)
+            selected.append(index)
+        selected = np.sort(np.concatenate(selected))
+        vectors, bins = vectors[selected], bins[selected]
+    return vectors, bins
+
+def sq_direct(
+    frame: dict,
+    n_types: int,
+    q_min: float,
+    q_max: float,
+    n_q: int,
+    q_per_bin: Optional[int] = None,
+    atom_chunk: int = 2000,
+    q_chunk: int = 2000
+) -> np.ndarray:
+    """Ashcroft-Langreth partial S(q) of a frame directly on reciprocal
+    lattice vectors, S_ab(q) = Re(rho_a(q) rho_b(-q)) / sqrt(N_a N_b) with
+    rho_a(q) = sum_j exp(i q r_j), averaged in bins of |q|. The complex
+    exponentials are evaluated in batches of `atom_chunk` atoms times
+    `q_chunk` vectors to bound memory.
+
+    Args:
+        frame (dict): frame read by `Traj`
+        n_types (int): number of atom types
+        q_min (float): min wave number
+        q_max (float): max wave number
+        n_q (int): number of bins of |q|
+        q_per_bin (Optional[int], optional): see `reciprocal_vectors`.
+            Defaults to None.
+        atom_chunk (int, optional): atoms in a batch. Defaults to 2000.
+        q_chunk (int, optional): vectors in a batch. Defaults to 2000.
+
+    Returns:
+        np.ndarray: partial S(q) in shape (n_types, n_types, n_q), zero for
+        bins without vector
+    """
+    types = frame["atom_types"]
+    coords = frame["coords"]
+    vectors, bins = reciprocal_vectors(
+        frame["cell"], q_min, q_max, n_q, q_per_bin
+    )
+    rho = np.zeros((n_types, len(vectors)), dtype=complex)
+    for q_start in range(0, len(vectors), q_chunk):
+        q_batch = vectors[q_start:q_start + q_chunk]
+        for a_start in range(0, len(coords), atom_chunk):
+            phase = np.exp(
+                1j * coords[a_start:a_start + atom_chunk] @ q_batch.T
+            )
+            one_hot = np.eye(n_types)[types[a_start:a_start + atom_chunk]]
+            rho[:, q_start:q_start + q_chunk] += one_hot.T @ phase
+    n_each = np.bincount(types, minlength=n_types)
+    norm = np.sqrt(np.outer(n_each, n_each))
+    per_vector = np.real(rho[:, None, :] * rho.conj()[None, :, :])
+    per_vector = np.divide(
+        per_vector,
+        norm[:, :, None],
+        out=np.zeros(per_vector.shape),
+        where=norm[:, :, None] > 0
+    )
+    counts = np.bincount(bins, minlength=n_q)
+    sums = np.zeros((n_types, n_types, n_q))
+    for a, b in product(range(n_types), repeat=2):
+        sums[a, b] = np.bincount(bins, per_vector[a, b], minlength=n_q)
+    return np.divide(
+        sums,
+        counts,
+        out=np.zeros(sums.shape),
+        where=counts > 0
+    )
+
+def _sq_chunk(
+    frames: List[dict],
+    n_types: int,
+    method: str,
+    q_min: float,
+    q_max: float,
+    n_q: int,
+    kwargs: dict
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """sum of the partial S(q) and concentrations over a chunk of frames"""
+    sq = np.zeros((n_types, n_types, n_q))
+    conc = np.zeros(n_types)
+    edges = np.linspace(q_min, q_max, n_q + 1)
+    for frame in frames:
+        if method == "fourier":
+            q = (edges[1:] + edges[:-1]) / 2
+            sq += sq_fourier(frame, n_types, q, **kwargs)
+        elif method == "direct":
+            sq += sq_direct(frame, n_types, q_min, q_max, n_q, **kwargs)
+        else:
+            raise NotImplementedError(
+                'Only fourier and direct supported for now.'
+            )
+        types = frame["atom_types"]
+        conc += np.bincount(types, minlength=n_types) / len(types)
+    return sq, conc, len(frames)
+
+def total_sq(
+    partial: np.ndarray,
+    conc: np.ndarray,
+    weights: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Faber-Ziman total S(q) from the Ashcroft-Langreth partials
+
+    Args:
+        partial (np.ndarray): partial S(q) in shape (n_types, n_types, n_q)
+        conc (np.ndarray): concentration of every type
+        weights (Optional[np.ndarray], optional): scattering length or form
+            factor of every type, like neutron scattering lengths.
+            Defaults to None, for number-number weighting.
+
+    Returns:
+        np.ndarray: total S(q) in shape (n_q,)
+    """
+    n_types = len(conc)
+    if weights is None:
+        weights = np.ones(n_types)
+    cc = np.outer(conc, conc)
+    eye = np.eye(n_types)[:, :, None]
+    faber_ziman = np.divide(
+        partial - eye,
+        np.sqrt(cc)[:, :, None],
+        out=np.zeros(partial.shape),
+        where=cc[:, :, None] > 0
+    ) + 1
+    cb = conc * weights
+    numerator = np.einsum('a,b,abq->q', cb, cb, faber_ziman - 1)
+    return 1 + numerator / np.sum(cb) ** 2
+
+def compute_sq(
+    traj_file: str,
+    type_map: dict,
+    method: str = "fourier",
+    q_min: float = 0.5,
+    q_max: float = 12.0,
+    n_q: int = 200,
+    every_n_frame: int = 1,
+    chunk_size: int = 10,
+    n_workers: int = 1,
+    weights: Optional[dict] = None,
+    **kwargs
+) -> dict:
+    """partial and total S(q) averaged over the selected frames of a traj
+
+    Args:
+        traj_file (str): lammps trajectory
+        type_map (dict): type map
+        method (str, optional): `fourier` to transform the partial g(r),
+            with kwargs `r_max` and `n_bins`, or `direct` to evaluate on
+            reciprocal lattice vectors, with kwargs `q_per_bin`,
+            `atom_chunk` and `q_chunk`. Defaults to "fourier".
+        q_min (float, optional): min wave number. Defaults to 0.5.
+        q_max (float, optional): max wave number. Defaults to 12.0.
+        n_q (int, optional): number of q points. Defaults to 200.
+        every_n_frame (int, optional): select frame from the traj every n
+            frames. Defaults to 1.
+        chunk_size (int, optional): number of frames in each chunk.
+            Defaults to 10.
+        n_workers (int, optional): number of processes. Defaults to 1.
+        weights (Optional[dict], optional): scattering length of every
+            element for the total S(q). Defaults to None.
+
+    Returns:
+        dict: `q`, Faber-Ziman `total` S(q), and Ashcroft-Langreth S(q) of
+        each pair of elements like `Si-O`
+    """
+    if method == "fourier":
+        kwargs = {"r_max": 10.0, "n_bins": 500, **kwargs}
+    n_types = len(type_map)
+    sq = np.zeros((n_types, n_types, n_q))
+    conc = np.zeros(n_types)
+    n_frames = 0
+    chunks = Traj(traj_file).iter_chunks(chunk_size, every_n_frame)
+    results = map_chunks(
+        _sq_chunk, chunks, n_workers,
+        n_types, method, q_min, q_max, n_q, kwargs, shared=True
+    )
+    for partial, frame_conc, n in results:
+        sq, conc, n_frames = sq + partial, conc + frame_conc, n_frames + n
+    if n_frames == 0:
+        raise ValueError(f"No frame selected from {traj_file}")
+    sq, conc = sq / n_frames, conc / n_frames
+    if weights is not None:
+        weights = np.array([weights[type_map[str(i)]] for i in range(n_types)])
+    edges = np.linspace(q_min, q_max, n_q + 1)
+    ret = {
+        "q": (edges[1:] + edges[:-1]) / 2,
+        "total": total_sq(sq, conc, weights)
+    }
+    for a, b in combinations_with_replacement(range(n_types), 2):
+        ret[f"{type_map[str(a)]}-{type_map[str(b)]}"] = sq[a, b]
+    return ret
+
+def write_sq(sq: dict, filename: str = 'sq.csv') -> Path:
+    """write S(q) to a csv file, one column per item of `sq`
+
+    Args:
+        sq (dict): output of `compute_sq`
+        filename (str, optional): output file. Defaults to 'sq.csv'.
+
+    Returns:
+        Path: path of the csv file
+    """
+    np.savetxt(
+        filename,
+        np.column_stack(list(sq.values())),
+        delimiter=',',
+        header=','.join(sq.keys()),
+        comments=''
+    )
+    return Path(filename)
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+from dflow.python import OP, OPIO, Artifact, OPIOSign, Parameter
+
+from glass.property.sq import compute_sq, write_sq
+
+
+class SqOP(OP):
+    """Compute partial and total S(q) over the selected frames of the
+    trajectory of a md run
+    """
+
+    @classmethod
+    def get_input_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "md_run": Artifact(Path),
+            "traj_file_name": Parameter(str),
+            "type_map": Parameter(dict),
+            "method": Parameter(str, default="fourier"),
+            "q_min": Parameter(float, default=0.5),
+            "q_max": Parameter(float, default=12.0),
+            "n_q": Parameter(int, default=200),
+            "every_n_frame": Parameter(int, default=1),
+            "chunk_size": Parameter(int, default=10),
+            "n_workers": Parameter(int, default=1),
+            "weights": Parameter(dict, default=None),
+            "method_kwargs": Parameter(dict, default={})
+        })
+
+    @classmethod
+    def get_output_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "sq": Artifact(Path)
+        })
+
+    @OP.exec_sign_check
+    def execute(self, op_in: OPIO) -> OPIO:
+        traj_file = Path(op_in["md_run"]) / (
+            op_in["traj_file_name"] + '.lammpstrj'
+        )
+        sq = compute_sq(
+            traj_file,
+            op_in["type_map"],
+            op_in["method"],
+            op_in["q_min"],
+            op_in["q_max"],
+            op_in["n_q"],
+            op_in["every_n_frame"],
+            op_in["chunk_size"],
+            op_in["n_workers"],
+            op_in["weights"],
+            **op_in["method_kwargs"]
+        )
+        op_out = {
+            "sq": write_sq(sq)
+        }
+        return op_out
@@ -0,0 +1,210 @@
+import abc
+import importlib
+import itertools
+import json
+import re
+import subprocess
+from pathlib import Path
+from typing import Dict, Type, Union
+
+import numpy as np
+
+from glass.io.structure import Atoms, write_poscar
+
+RESULT_FILE = "result.json"
+
+
+class DftRunner(abc.ABC):
+    """Single point calculation of a structure with parameters like `encut`
+    and `kspacing`. Subclasses implement `run`, and are picked by the
+    `type` of the runner settings, see `get_runner`.
+    """
+
+    @abc.abstractmethod
+    def run(
+        self,
+        atoms: Atoms,
+        params: dict,
+        work_dir: Union[str, Path]
+    ) -> dict:
+        """energy per atom and forces of a structure
+
+        Args:
+            atoms (Atoms): the structure
+            params (dict): parameters of the calculation, lower case
+            work_dir (Union[str, Path]): directory of the calculation
+
+        Returns:
+            dict: `energy` in eV/atom and `forces` in eV/A, in the order
+            of the atoms
+        """
+
+
+class VaspRunner(DftRunner):
+    def __init__(
+        self,
+        command: str = "vasp_std",
+        potcar_dir: Union[str, Path] = "potcars"
+    ) -> None:
+        """
+        VASP run by `command` in the work directory. The parameters are
+        written as tags of INCAR, like `kspacing` as KSPACING, and POTCAR
+        is joined from `potcar_dir/<element>/POTCAR`.
+        """
+        self.command = command
+        self.potcar_dir = Path(potcar_dir)
+
+    def write_inputs(self, atoms: Atoms, params: dict, work_dir: Path):
+        write_poscar(atoms, work_dir / "POSCAR")
+        with open(work_dir / "INCAR", 'w', encoding='utf-8') as f:
+            for key, value in params.items():
+                if isinstance(value, bool):
+                    value = ".TRUE." if value else ".FALSE."
+                f.write(f"{key.upper()} = {value}\n")
+        # POSCAR groups the atoms by element
+        counts = np.bincount(atoms.codes, minlength=len(atoms.elements))
+        elements = [e for e, n in zip(atoms.elements, counts) if n > 0]
+        with open(work_dir / "POTCAR", 'w', encoding='utf-8') as f:
+            for element in elements:
+                potcar = self.potcar_dir / element / "POTCAR"
+                f.write(potcar.read_text(encoding='utf-8'))
+
+    def run(
+        self,
+        atoms: Atoms,
+        params: dict,
+        work_dir: Union[str, Path]
+    ) -> dict:
+        work_dir = Path(work_dir)
+        work_dir.mkdir(parents=True, exist_ok=True)
+        self.write_inputs(atoms, params, work_dir)
+        subprocess.run(self.command, shell=True, cwd=work_dir, check=True)
+        energy, forces = read_outcar(work_dir / "OUTCAR", len(atoms))
+        # back to the order of the atoms
+        order = np.argsort(atoms.codes, kind='stable')
+        ordered = np.empty_like(forces)
+        ordered[order] = forces
+        return {"energy": energy / len(atoms), "forces": ordered.tolist()}
+
+
+class StandInRunner(DftRunner):
+    def __init__(
+        self,
+        epsilon: float = 1.0,
+        rho: float = 0.5,
+        cutoff: float = 6.0,
+        encut_error: float = 10.0,
+        encut_scale: float = 60.0,
+        kspacing_error: float = 0.02
+    ) -> None:
+        """
+        Stand-in calculator to run the convergence tests locally: a
+        Born-Mayer pair repulsion `epsilon * exp(-r / rho)`, with an error
+        decaying with `encut` and growing with `kspacing` added to the
+        energy per atom and scaling the forces, like an unconverged basis
+        and k-point mesh would.
+        """
+        self.epsilon = epsilon
+        self.rho = rho
+        self.cutoff = cutoff
+        self.encut_error = encut_error
+        self.encut_scale = encut_scale
+        self.kspacing_error = kspacing_error
+
+    def error(self, params: dict) -> float:
+        ret = 0.0
+        if "encut" in params:
+            ret += self.encut_error \
+                * np.exp(-params["encut"] / self.encut_scale)
+        if "kspacing" in params:
+            ret += self.kspacing_error * params["kspacing"] ** 2
+        return ret
+
+    def pair_forces(self, atoms: Atoms):
+        """energy and forces of the pair repulsion, over the periodic images
+        within the cutoff"""
+        inv = np.linalg.inv(atoms.cell)
+        spacing = 1 / np.linalg.norm(inv, axis=0)
+        n_images = np.ceil(self.cutoff / spacing).astype(int)
+        energy = 0.0
+        forces = np.zeros_like(atoms.coords)
+        for shift in itertools.product(*(range(-n, n + 1) for n in n_images)):
+            offset = np.asarray(shift) @ atoms.cell
+            vectors = atoms.coords[None, :, :] + offset \
+                - atoms.coords[:, None, :]
+            r = np.linalg.norm(vectors, axis=-1)
+            mask = (r > 1e-8) & (r < self.cutoff)
+            e = np.where(
+                mask,
+                self.epsilon * np.exp(-np.where(mask, r, 0.0) / self.rho),
+                0.0
+            )
+            # every pair is seen from both of its atoms
+            energy += e.sum() / 2
+            f = np.where(mask, e / self.rho / np.where(mask, r, 1.0), 0.0)
+            forces -= (f[:, :, None] * vectors).sum(axis=1)
+        return energy, forces
+
+    def run(
+        self,
+        atoms: Atoms,
+        params: dict,
+        work_dir: Union[str, Path]
+    ) -> dict:
+        energy, forces = self.pair_forces(atoms)
+        error = self.error(params)
+        return {
+            "energy": energy / len(atoms) + error,
+            "forces": (forces * (1 + error)).tolist()
+        }
+
+
+RUNNERS: Dict[str, Type[DftRunner]] = {
+    "vasp": VaspRunner,
+    "stand_in": StandInRunner
+}
+
+
+def read_outcar(filename: Union[str, Path], n_atoms: int):
+    """free energy TOTEN and forces of the last ionic step of an OUTCAR
+
+    Raises:
+        ValueError: no energy in the OUTCAR
+    """
+    text = Path(filename).read_text(encoding='utf-8', errors='replace')
+    energies = re.findall(r'free\s+energy\s+TOTEN\s+=\s+(\S+)', text)
+    if not energies:
+        raise ValueError(f"No energy in {filename}")
+    lines = text.rsplit('TOTAL-FORCE (eV/Angst)', 1)[-1].splitlines()
+    block = lines[2:2 + n_atoms]
+    forces = np.array([line.split()[3:6] for line in block], dtype=float)
+    return float(energies[-1]), forces
+
+def get_runner(settings: dict) -> DftRunner:
+    """runner of the settings, by `type` in `RUNNERS` or as `module:Class`
+
+    Raises:
+        ValueError: unknown type
+    """
+    settings = dict(settings)
+    runner_type = settings.pop("type", "vasp")
+    if runner_type in RUNNERS:
+        return RUNNERS[runner_type](**settings)
+    if ":" in runner_type:
+        module, name = runner_type.split(":", 1)
+        return getattr(importlib.import_module(module), name)(**settings)
+    raise ValueError(f"Unknown dft runner {runner_type}")
+
+def write_result(result: dict, work_dir: Union[str, Path]) -> Path:
+    path = Path(work_dir) / RESULT_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+    return path
+
+def read_result(path: Union[str, Path]) -> dict:
+    path = Path(path)
+    if path.is_dir():
+        path = path / RESULT_FILE
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
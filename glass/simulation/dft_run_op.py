@@ -0,0 +1,47 @@
+import time
+from pathlib import Path
+
+from dflow.python import OP, OPIO, Artifact, OPIOSign, Parameter
+
+from glass.io.structure import read_structure
+from glass.simulation.dft_run import get_runner, write_result
+
+
+class DftRunOP(OP):
+    """Single point DFT calculation of a structure with one value of the
+    tested parameter, by the runner of `glass.simulation.dft_run`
+    """
+
+    @classmethod
+    def get_input_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "structure": Artifact(Path),
+            "runner": Parameter(dict),
+            "params": Parameter(dict, default={}),
+            "name": Parameter(str),
+            "value": Parameter(float)
+        })
+
+    @classmethod
+    def get_output_sign(cls) -> OPIOSign:
+        return OPIOSign({
+            "result": Artifact(Path),
+            "timing": Parameter(dict)
+        })
+
+    @OP.exec_sign_check
+    def execute(self, op_in: OPIO) -> OPIO:
+        # on the machine of the dispatcher job, after its queueing
+        start = time.time()
+        name, value = op_in["name"], op_in["value"]
+        work_dir = Path(f"{name}-{value}")
+        result = get_runner(op_in["runner"]).run(
+            read_structure(op_in["structure"]),
+            {**op_in["params"], name: value},
+            work_dir
+        )
+        op_out = {
+            "result": write_result(result, work_dir),
+            "timing": {"start": start, "end": time.time()}
+        }
+        return op_out
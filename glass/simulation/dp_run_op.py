@@ -1,7 +1,8 @@
 import os
+import time
 from pathlib import Path
 
-from dflow.python import OP, OPIO, Artifact, OPIOSign
+from dflow.python import OP, OPIO, Artifact, OPIOSign, Parameter
 
 
 class DpRunOP(OP):
@@ -14,22 +15,44 @@ class DpRunOP(OP):
     @classmethod
     def get_input_sign(cls) -> OPIOSign:
         return OPIO({
-            "work_dir": Artifact(Path)
+            "work_dir": Artifact(Path),
+            "partitions": Parameter(int, default=1),
+            "procs_per_partition": Parameter(int, default=1),
+            "n_procs": Parameter(int, default=1),
+            "n_threads": Parameter(int, default=0)
         })
 
     @classmethod
     def get_output_sign(cls) -> OPIOSign:
         return OPIOSign({
-            "dp_dir": Artifact(Path)
+            "dp_dir": Artifact(Path),
+            "timing": Parameter(dict)
         })
 
     @OP.exec_sign_check
     def execute(self, op_in: OPIO) -> OPIO:
+        # on the machine of the dispatcher job, after its queueing
+        start = time.time()
         work_dir = op_in["work_dir"]
         command = "lmp < in.lmp"
+        if op_in["n_procs"] > 1:
+            command = f"mpirun -np {op_in['n_procs']} lmp -in in.lmp"
+        if op_in["partitions"] > 1:
+            # replicas of in.lmp side by side, see `build_in_lmp`
+            n_procs = op_in["partitions"] * op_in["procs_per_partition"]
+            command = f"mpirun -np {n_procs} lmp -partition " \
+                f"{op_in['partitions']}x{op_in['procs_per_partition']} " \
+                "-in in.lmp"
+        if op_in["n_threads"] > 0:
+            # threads of deepmd in every mpi process, see `choose_machine`
+            n_threads = str(op_in["n_threads"])
+            os.environ["OMP_NUM_THREADS"] = n_threads
+            os.environ["TF_INTRA_OP_PARALLELISM_THREADS"] = n_threads
+            os.environ["TF_INTER_OP_PARALLELISM_THREADS"] = "1"
         os.chdir(work_dir)
         os.system(command)
         op_out = {
-            "dp_dir": op_in["work_dir"]
+            "dp_dir": op_in["work_dir"],
+            "timing": {"start": start, "end": time.time()}
         }
         return op_out
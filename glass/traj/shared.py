@@ -0,0 +1,112 @@
+import os
+from multiprocessing import shared_memory
+from typing import Any, Callable, List, Tuple
+
+import numpy as np
+
+# offsets of the arrays in a block are aligned for vectorized reads
+ALIGNMENT = 64
+SHM_DIR = "/dev/shm"
+
+
+def frames_nbytes(frames: List[dict]) -> int:
+    """bytes of the arrays of frames, aligned as in `SharedFrames`"""
+    return sum(
+        -(-value.nbytes // ALIGNMENT) * ALIGNMENT
+        for frame in frames for value in frame.values()
+        if isinstance(value, np.ndarray)
+    )
+
+def shared_memory_fits(nbytes: int) -> bool:
+    """whether a block fits in the shared memory left, which is small in
+    containers, writing past it kills the process with SIGBUS"""
+    if not os.path.isdir(SHM_DIR):
+        # not backed by a tmpfs, like on windows and macos
+        return True
+    stat = os.statvfs(SHM_DIR)
+    return nbytes < stat.f_bavail * stat.f_frsize
+
+
+class SharedFrames(object):
+    def __init__(self, frames: List[dict]) -> None:
+        """
+        Frames published in a block of shared memory, so that processes
+        analysing them attach to their arrays as views with `attach_frames`
+        instead of receiving pickled copies. Only the small `handle` is
+        sent to the processes. The publisher unlinks the block by `close`,
+        after the processes are done with it.
+        """
+        self.shm = shared_memory.SharedMemory(
+            create=True, size=max(1, frames_nbytes(frames))
+        )
+        self.layout = []
+        offset = 0
+        for frame in frames:
+            arrays, values = {}, {}
+            for key, value in frame.items():
+                if not isinstance(value, np.ndarray):
+                    values[key] = value
+                    continue
+                view = np.ndarray(
+                    value.shape, value.dtype, buffer=self.shm.buf,
+                    offset=offset
+                )
+                view[...] = value
+                del view
+                arrays[key] = (offset, value.shape, value.dtype.str)
+                offset += -(-value.nbytes // ALIGNMENT) * ALIGNMENT
+            self.layout.append((arrays, values))
+
+    @property
+    def handle(self) -> Tuple[str, list]:
+        return self.shm.name, self.layout
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self) -> 'SharedFrames':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def attach_frames(
+    handle: Tuple[str, list]
+) -> Tuple[shared_memory.SharedMemory, List[dict]]:
+    """frames of a `SharedFrames.handle`, with read-only views of the shared
+    arrays. The block must be closed once the frames are dropped.
+
+    Args:
+        handle (Tuple[str, list]): name and layout of the block
+
+    Returns:
+        Tuple[shared_memory.SharedMemory, List[dict]]: the block and frames
+    """
+    name, layout = handle
+    shm = shared_memory.SharedMemory(name=name)
+    frames = []
+    for arrays, values in layout:
+        frame = dict(values)
+        for key, (offset, shape, dtype) in arrays.items():
+            view = np.ndarray(shape, dtype, buffer=shm.buf, offset=offset)
+            # other processes may read the same frames
+            view.flags.writeable = False
+            frame[key] = view
+        frames.append(frame)
+    return shm, frames
+
+def call_shared(func: Callable, handle: Tuple[str, list], *args) -> Any:
+    """`func(frames, *args)` on the frames of a shared block, in a process
+    of a pool"""
+    shm, frames = attach_frames(handle)
+    try:
+        return func(frames, *args)
+    finally:
+        del frames
+        try:
+            shm.close()
+        except BufferError:
+            # views kept by the result, released with the process
+            pass
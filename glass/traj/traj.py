@@ -1,7 +1,208 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from glass.traj.shared import (
+    SharedFrames,
+    call_shared,
+    frames_nbytes,
+    shared_memory_fits,
+)
 
 
 class Traj(object):
-    def __init__(self, format: str) -> None:
+    def __init__(self, filename: str, format: str = "lammps/dump") -> None:
         """
         A class to store and manipulate MD traj datas
+
+        Frames are read lazily, one at a time, as dicts with keys
+        `timestep`, `cell` (3x3, lattice vectors as rows), `atom_types`
+        (start from zero, same as type_map) and `coords` (cartesian,
+        sorted by atom id, shifted so that the box origin is zero)
         """
+        if format != "lammps/dump":
+            raise NotImplementedError('Only lammps/dump supported for now.')
+        self.filename = filename
+        self.format = format
+
+    def __iter__(self) -> Iterator[dict]:
+        return self.iter_frames()
+
+    def iter_frames(
+        self,
+        every_n_frame: int = 1,
+        start: int = 0
+    ) -> Iterator[dict]:
+        """iterate over the frames of the traj
+
+        Args:
+            every_n_frame (int, optional): select frame from the traj every
+                n frames, the others are skipped without parsing.
+                Defaults to 1.
+            start (int, optional): index of the first selected frame.
+                Defaults to 0.
+
+        Yields:
+            Iterator[dict]: frame
+        """
+        with open(self.filename, 'r', encoding='utf-8') as f:
+            i_frame = 0
+            while True:
+                header = list(islice(f, 9))
+                if len(header) < 9:
+                    return
+                n_atoms = int(header[3])
+                lines = list(islice(f, n_atoms))
+                if i_frame >= start and (i_frame - start) % every_n_frame == 0:
+                    yield parse_dump_frame(header, lines)
+                i_frame += 1
+
+    def iter_chunks(
+        self,
+        chunk_size: int,
+        every_n_frame: int = 1
+    ) -> Iterator[List[dict]]:
+        """iterate over the frames of the traj in chunks, so that at most
+        `chunk_size` frames are held in memory
+
+        Args:
+            chunk_size (int): number of frames in each chunk
+            every_n_frame (int, optional): see `iter_frames`. Defaults to 1.
+
+        Yields:
+            Iterator[List[dict]]: chunk of frames
+        """
+        frames = self.iter_frames(every_n_frame)
+        while chunk := list(islice(frames, chunk_size)):
+            yield chunk
+
+
+def dump_box_to_cell(bounds: np.ndarray, tilt: Optional[np.ndarray] = None):
+    """convert the box bounds of a lammps dump to a cell
+
+    Args:
+        bounds (np.ndarray): bounds in shape (3, 2)
+        tilt (Optional[np.ndarray], optional): xy xz yz for triclinic boxes.
+            Defaults to None.
+
+    Returns:
+        tuple: cell in shape (3, 3) and origin in shape (3,)
+    """
+    xy, xz, yz = tilt if tilt is not None else (0.0, 0.0, 0.0)
+    xlo = bounds[0, 0] - min(0.0, xy, xz, xy + xz)
+    xhi = bounds[0, 1] - max(0.0, xy, xz, xy + xz)
+    ylo = bounds[1, 0] - min(0.0, yz)
+    yhi = bounds[1, 1] - max(0.0, yz)
+    zlo, zhi = bounds[2]
+    cell = np.array([
+        [xhi - xlo, 0.0, 0.0],
+        [xy, yhi - ylo, 0.0],
+        [xz, yz, zhi - zlo]
+    ])
+    return cell, np.array([xlo, ylo, zlo])
+
+
+def parse_dump_frame(header: List[str], lines: List[str]) -> dict:
+    """parse a frame of lammps dump with columns including `id type` and
+    coordinates `x y z`, `xu yu zu` or `xs ys zs`
+
+    Args:
+        header (List[str]): the 9 header lines of the frame
+        lines (List[str]): the atom lines of the frame
+
+    Returns:
+        dict: frame
+    """
+    timestep = int(header[1])
+    box = np.array([line.split() for line in header[5:8]], dtype=float)
+    tilt = box[:, 2] if box.shape[1] > 2 else None
+    cell, origin = dump_box_to_cell(box[:, :2], tilt)
+    columns = header[8].split()[2:]
+    data = np.array(' '.join(lines).split(), dtype=float)
+    data = data.reshape(len(lines), len(columns))
+    data = data[np.argsort(data[:, columns.index('id')])]
+    frame = {
+        "timestep": timestep,
+        "cell": cell,
+        "atom_types": data[:, columns.index('type')].astype(int) - 1,
+    }
+    for keys in (['x', 'y', 'z'], ['xu', 'yu', 'zu'], ['xs', 'ys', 'zs']):
+        if set(keys) <= set(columns):
+            coords = data[:, [columns.index(k) for k in keys]]
+            if keys[0] == 'xs':
+                frame["coords"] = coords @ cell
+            else:
+                frame["coords"] = coords - origin
+            frame["unwrapped"] = keys[0] == 'xu'
+            break
+    for key in set(columns) - {'id', 'type', 'x', 'y', 'z', 'xu', 'yu', 'zu',
+                               'xs', 'ys', 'zs'}:
+        frame[key] = data[:, columns.index(key)]
+    return frame
+
+
+def map_chunks(
+    func: Callable,
+    chunks: Iterable[List[dict]],
+    n_workers: int = 1,
+    *args,
+    shared: bool = False
+) -> Iterator[Any]:
+    """apply `func(chunk, *args)` to every chunk of frames, in a process pool
+    if `n_workers > 1`. At most `2 * n_workers` chunks are in flight, so
+    that the frames are not read faster than they are analysed.
+
+    Args:
+        func (Callable): picklable function analysing a chunk of frames
+        chunks (Iterable[List[dict]]): chunks of frames, like
+            `Traj.iter_chunks`
+        n_workers (int, optional): number of processes. Defaults to 1.
+        shared (bool, optional): pass the arrays of the frames to the
+            processes in shared memory, as read-only views, rather than
+            pickled. Chunks not fitting in the shared memory left are
+            pickled. Defaults to False.
+
+    Yields:
+        Iterator[Any]: result of every chunk, in order
+    """
+    if n_workers <= 1:
+        for chunk in chunks:
+            yield func(chunk, *args)
+        return
+    with ProcessPoolExecutor(n_workers) as pool:
+        futures = deque()
+        try:
+            for chunk in chunks:
+                if shared and shared_memory_fits(frames_nbytes(chunk)):
+                    block = SharedFrames(chunk)
+                    future = pool.submit(
+                        call_shared, func, block.handle, *args
+                    )
+                else:
+                    block = None
+                    future = pool.submit(func, chunk, *args)
+                futures.append((future, block))
+                if len(futures) >= 2 * n_workers:
+                    yield _pop_result(futures)
+            while futures:
+                yield _pop_result(futures)
+        finally:
+            # blocks of chunks left by an error or an early stop
+            for future, block in futures:
+                future.cancel()
+                if block is not None:
+                    wait([future])
+                    block.close()
+
+
+def _pop_result(futures: deque) -> Any:
+    """result of the first chunk in flight, unlinking its shared block"""
+    future, block = futures.popleft()
+    try:
+        return future.result()
+    finally:
+        if block is not None:
+            block.close()
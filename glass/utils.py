@@ -229,11 +229,18 @@ def config_argo(**config):
     dflow.s3_config["repo_key"] = "oss-bohrium"
     dflow.s3_config["storage_client"] = TiefblueClient()
 
-def dispatcher_executor(**config_para):
+def dispatcher_executor(input_data: Optional[dict] = None, **config_para):
+    """executor of the dispatcher of machine parameters, `input_data`
+    replaces the one of `config_para["dispatcher"]` for steps on their own
+    machines, see `glass.flow.sizing.step_profiles`
+    """
     return DispatcherExecutor(
         machine_dict={
             "batch_type": config_para["dispatcher"].get("batch_type"),
             "context_type": config_para["dispatcher"].get("context_type"),
-            "remote_profile": {"input_data": config_para["dispatcher"].get("input_data")}
+            "remote_profile": {
+                "input_data": input_data
+                or config_para["dispatcher"].get("input_data")
+            }
             },
             image_pull_policy = "IfNotPresent")
@@ -6,6 +6,7 @@ Read more about conftest.py under:
 """
 from pathlib import Path
 
+import numpy as np
 import pytest as pytest
 from pymatgen.core.structure import Structure
 
@@ -22,3 +23,28 @@ def make_single_struc(data_path):
     filename = Path(data_path / 'silica.vasp')
     pmg_struc = Structure.from_file(filename)
     return pmg_struc
+
+
+def _write_dump(path, frames):
+    """write frames like those of `Traj` to a lammps dump, the cell must be
+    orthogonal. The atom ids are `ids` of a frame if given."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for step, frame in enumerate(frames):
+            coords = frame["coords"]
+            ids = frame.get("ids", range(1, len(coords) + 1))
+            f.write(f"ITEM: TIMESTEP\n{frame.get('timestep', step)}\n")
+            f.write(f"ITEM: NUMBER OF ATOMS\n{len(coords)}\n")
+            f.write("ITEM: BOX BOUNDS pp pp pp\n")
+            f.write(''.join(
+                f"0 {length}\n" for length in np.diag(frame["cell"])
+            ))
+            f.write("ITEM: ATOMS id type x y z\n")
+            for i, t, (x, y, z) in zip(ids, frame["atom_types"], coords):
+                f.write(f"{i} {t + 1} {x} {y} {z}\n")
+    return Path(path)
+
+
+@pytest.fixture(scope='session')
+def write_dump():
+    """Return a function writing frames to a lammps dump."""
+    return _write_dump
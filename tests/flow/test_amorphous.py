@@ -0,0 +1,22 @@
+import pytest
+
+from glass.flow.amorphous import amorphous_flow, has_insitu
+
+
+def test_partitions_not_analysed():
+    processes = [{
+        "_idx": 0,
+        "process": "md_run",
+        "params": {"traj_file_name": "md", "rdf": {"pairs": [["Si", "O"]]}}
+    }]
+    assert has_insitu(processes)
+    assert not has_insitu([{"_idx": 0, "process": "minimize"}])
+    partitions = [{"seed": 1}, {"seed": 2}]
+    with pytest.raises(ValueError):
+        amorphous_flow(processes=processes, partitions=partitions)
+    with pytest.raises(ValueError):
+        amorphous_flow(
+            processes=[{"_idx": 0, "process": "md_run", "params": {}}],
+            partitions=partitions,
+            properties={"rdf": {"_idx": 0}}
+        )
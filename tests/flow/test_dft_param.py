@@ -0,0 +1,118 @@
+import json
+from functools import partial
+
+import numpy as np
+import pytest
+
+from glass.flow.dft_param import (
+    ResultCache,
+    converged_index,
+    convergence_sweep,
+    local_wave,
+    main_dft_param_test,
+)
+from glass.simulation.dft_run import (
+    DftRunner,
+    StandInRunner,
+    get_runner,
+    read_outcar,
+)
+
+RUNNER = {"type": "stand_in"}
+ENCUTS = [300, 400, 500, 600, 700]
+
+OUTCAR = """
+  free  energy   TOTEN  =      -10.00000000 eV
+ POSITION                                       TOTAL-FORCE (eV/Angst)
+ -----------------------------------------------------------------------------------
+      0.00000      0.00000      0.00000         0.100000      0.000000     -0.100000
+      1.00000      1.00000      1.00000        -0.100000      0.000000      0.100000
+ -----------------------------------------------------------------------------------
+  free  energy   TOTEN  =      -12.50000000 eV
+"""
+
+
+def test_converged_index():
+    results = [
+        {"energy": e, "forces": [[f, 0.0, 0.0]]}
+        for e, f in [
+            (1.0, 0.0), (0.1, 0.0), (0.0995, 0.5), (0.0991, 0.501),
+            (0.099, 0.5)
+        ]
+    ]
+    assert converged_index(results[:2]) is None
+    # the energy agrees but not the forces
+    assert converged_index(results, f_tol=0.1) == 2
+    assert converged_index(results, stable=3) is None
+    assert converged_index(results, e_tol=1.0, stable=2) == 2
+
+
+def test_convergence_sweep(data_path, tmp_path):
+    structure = data_path / 'silica.vasp'
+    calls = []
+
+    def evaluate(structure, name, values):
+        calls.append(list(values))
+        return local_wave(
+            structure, name, values, RUNNER, {}, 2, tmp_path / 'runs'
+        )
+
+    sweep = partial(
+        convergence_sweep, structure, "encut", ENCUTS, evaluate,
+        ResultCache(tmp_path / 'cache'), RUNNER, {"kspacing": 0.2}
+    )
+    # stops as soon as 400 agrees with 500, without running 700
+    ret = sweep(e_tol=0.02)
+    assert ret["converged"] == 400
+    assert calls == [[300, 400], [500, 600]]
+    assert (ret["n_runs"], ret["n_waves"]) == (4, 2)
+    assert [d["value"] for d in ret["diffs"]] == [300, 400, 500]
+
+    # the cached values are free
+    ret = sweep(e_tol=1e-3)
+    assert ret["converged"] == 600
+    assert calls[2:] == [[700]]
+    assert [r["cached"] for r in ret["results"]] == [True] * 4 + [False]
+    ret = sweep(e_tol=1e-3)
+    assert ret["n_runs"] == 0
+    assert len(calls) == 3
+
+
+def test_main_dft_param_test(data_path, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pdata = {
+        "structures": [str(data_path / 'silica.vasp')],
+        "runner": RUNNER,
+        "params": {"encut": 500, "kspacing": 0.3},
+        "tests": {"encut": ENCUTS, "kspacing": [0.5, 0.4, 0.3, 0.2, 0.1]},
+        "e_tol": 1e-3
+    }
+    with open('param.json', 'w', encoding='utf-8') as f:
+        json.dump(pdata, f)
+    ret = main_dft_param_test('param.json')
+    assert ret["recommended"] == {"encut": 600, "kspacing": 0.2}
+    result_file = tmp_path / 'dft_param' / 'dft_param.json'
+    with open(result_file, 'r', encoding='utf-8') as f:
+        assert json.load(f)["recommended"] == ret["recommended"]
+    assert any((tmp_path / '.glass_dft_cache').iterdir())
+
+
+def test_runners(tmp_path):
+    (tmp_path / 'OUTCAR').write_text(OUTCAR)
+    energy, forces = read_outcar(tmp_path / 'OUTCAR', 2)
+    assert energy == -12.5
+    np.testing.assert_allclose(forces, [[0.1, 0.0, -0.1], [-0.1, 0.0, 0.1]])
+
+    runner = get_runner({
+        "type": "glass.simulation.dft_run:StandInRunner", "rho": 0.4
+    })
+    assert isinstance(runner, StandInRunner) and runner.rho == 0.4
+    with pytest.raises(ValueError):
+        get_runner({"type": "unknown"})
+
+    class NoRun(DftRunner):
+        pass
+
+    # runners must implement run
+    with pytest.raises(TypeError):
+        NoRun()
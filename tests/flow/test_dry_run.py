@@ -0,0 +1,96 @@
+import copy
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+import glass
+from glass.flow.dry_run import (
+    dry_run,
+    estimate_cost,
+    validate_mdata,
+    validate_pdata,
+)
+
+EXAMPLE = Path(glass.__file__).parent / 'example'
+
+
+@pytest.fixture
+def pdata():
+    with open(EXAMPLE / 'param.json', 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_validate_pdata(pdata, tmp_path):
+    shutil.copy(EXAMPLE / 'example.vasp', tmp_path)
+    (tmp_path / 'graph.000.pb').touch()
+    assert validate_pdata(pdata, tmp_path) == []
+
+    bad = copy.deepcopy(pdata)
+    bad["processes"][0]["params"]["ensemble"] = "nve"
+    del bad["processes"][1]["params"]["dump_freq"]
+    bad["properties"]["doas"]["_idx"] = 5
+    bad["properties"]["rings"] = {"_idx": 2, "cutoffs": {"Si-Ge": 2.0}}
+    bad["mass_map"].pop("Bi")
+    assert validate_pdata(bad, tmp_path) == [
+        "mass_map: missing Bi",
+        "processes[0].params.ensemble: 'nve' is not one of npt, nvt",
+        "processes[1].params: missing dump_freq",
+        "properties.doas._idx: no md process with _idx 5",
+        "properties.rings.cutoffs: Ge of Si-Ge not in type_map",
+    ]
+
+    parted = copy.deepcopy(pdata)
+    parted["partitions"] = [{"seed": 1}, {"seed": 2}]
+    assert validate_pdata(parted, tmp_path) == [
+        "partitions: not analysed, use replicas for analyses"
+    ]
+    assert validate_mdata({"dflow_config": {"host": "<HOST>"}}) == [
+        "dispatcher: a dict is required",
+        "machine.dflow_config.host: placeholder <HOST> not replaced"
+    ]
+
+
+def test_estimate_cost(pdata):
+    pdata["replicas"] = 2
+    estimate = estimate_cost(
+        pdata, 216,
+        {"dispatcher": {"input_data": {"scass_type": "c32_m64_cpu"}}}
+    )
+    assert estimate["n_steps"] == 1200000
+    assert estimate["n_frames"]["2"] == 1001
+    assert estimate["n_snapshots"] == 2 * 501
+    assert estimate["atom_steps"]["md"] == 2 * 216 * 1200000
+    assert estimate["core_hours"]["md"] == pytest.approx(
+        2 * 216 * 1200000 / 2e4 / 3600
+    )
+    assert estimate["cores_per_job"] == 32
+
+
+def test_estimate_cost_stages(pdata, tmp_path):
+    params = pdata["processes"][1]["params"]
+    del params["n_steps"], params["ini_t"], params["final_t"]
+    params["stages"] = [
+        {"ini_t": 4000, "final_t": 2000, "n_steps": 60000},
+        {"ini_t": 2000, "final_t": 300, "n_steps": 90000}
+    ]
+    shutil.copy(EXAMPLE / 'example.vasp', tmp_path)
+    (tmp_path / 'graph.000.pb').touch()
+    assert validate_pdata(pdata, tmp_path) == []
+    estimate = estimate_cost(pdata, 216)
+    assert estimate["n_steps"] == 1200000 + 50000
+    assert estimate["n_frames"]["1"] == 150000 // 1000 + 1
+
+
+def test_dry_run(tmp_path, monkeypatch):
+    for name in ['param.json', 'machine.json', 'example.vasp']:
+        shutil.copy(EXAMPLE / name, tmp_path)
+    (tmp_path / 'graph.000.pb').touch()
+    monkeypatch.chdir(tmp_path)
+    ret = dry_run('param.json', 'machine.json', 'dry_run')
+    assert ret["errors"] == []
+    assert ret["estimate"]["n_atoms"] == 216
+    in_lmp = (tmp_path / 'dry_run' / 'in.lmp').read_text()
+    assert 'run             1000000' in in_lmp
+    assert (tmp_path / 'dry_run' / 'lmp.data').is_file()
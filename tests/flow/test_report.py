@@ -0,0 +1,110 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from glass.flow.report import (
+    pod_parents,
+    step_records,
+    summarize,
+    write_report,
+)
+
+
+def timestamp(seconds):
+    return f"2024-01-01T00:{seconds // 60:02d}:{seconds % 60:02d}Z"
+
+
+def timestamp_seconds(seconds):
+    # 2024-01-01T00:00:00Z
+    return 1704067200.0 + seconds
+
+
+def pod(name, start, end, phase="Succeeded", job=None):
+    outputs = SimpleNamespace(parameters={})
+    if job is not None:
+        outputs.parameters["timing"] = SimpleNamespace(value=json.dumps({
+            "start": timestamp_seconds(job[0]),
+            "end": timestamp_seconds(job[1])
+        }))
+    return SimpleNamespace(
+        type="Pod", id=name, name=name, displayName=name, key=None,
+        phase=phase, boundaryID="amorphous", startedAt=timestamp(start),
+        finishedAt=timestamp(end), outputs=outputs
+    )
+
+
+@pytest.fixture
+def steps():
+    return [
+        SimpleNamespace(
+            type="Steps", name="amorphous", displayName="amorphous"
+        ),
+        pod("prep-md-input", 0, 10),
+        pod("run-md", 20, 300),
+        pod("rdf", 305, 314),
+        pod("grasp-snapshot", 302, 310),
+        pod("mini-snapshot(0)", 315, 400),
+        pod("mini-snapshot(1)", 315, 420),
+        pod("mini-snapshot(2)", 316, 600, job=(330, 590)),
+        pod("plot-doas", 610, 620),
+    ]
+
+
+@pytest.fixture
+def nodes():
+    # step groups of the steps, each a child of the pods it waits for
+    groups = [
+        ["prep-md-input"],
+        ["run-md"],
+        ["rdf", "grasp-snapshot"],
+        ["mini-snapshot(0)", "mini-snapshot(1)", "mini-snapshot(2)"],
+        ["plot-doas"]
+    ]
+    ret = {"amorphous": {
+        "type": "Steps", "children": ["group-0"], "startedAt": timestamp(0)
+    }}
+    for i, group in enumerate(groups):
+        ret[f"group-{i}"] = {"type": "StepGroup", "children": group}
+        for name in group:
+            ret[name] = {"type": "Pod", "boundaryID": "amorphous"}
+            if i + 1 < len(groups) and name != "rdf":
+                ret[name]["children"] = [f"group-{i + 1}"]
+    return ret
+
+
+def test_pod_parents(nodes):
+    parents = pod_parents(nodes)
+    assert parents["prep-md-input"] == []
+    assert parents["grasp-snapshot"] == ["run-md"]
+    # rdf ends the branch, nothing waits for it
+    assert parents["mini-snapshot(0)"] == ["grasp-snapshot"]
+    assert parents["plot-doas"] == [
+        "mini-snapshot(0)", "mini-snapshot(1)", "mini-snapshot(2)"
+    ]
+
+
+def test_summarize(steps, nodes, tmp_path):
+    records = step_records(steps, nodes)
+    assert len(records) == 8
+    report = summarize(records)
+    assert report["span"] == 620
+    assert report["critical_path"]["steps"] == [
+        "prep-md-input", "run-md", "grasp-snapshot", "mini-snapshot(2)",
+        "plot-doas"
+    ]
+    assert report["critical_path"]["queue"] == 24
+    run_md = next(step for step in report["steps"] if step["name"] == "run-md")
+    assert run_md["wait"] == 10 and run_md["run"] == 280
+    assert run_md["queue"] is None
+    mini = report["groups"]["mini-snapshot"]
+    assert mini["count"] == 3 and mini["max"] == 260
+    assert mini["queue"]["count"] == 1 and mini["queue"]["max"] == 24
+    # from the end of grasp-snapshot, not of the unrelated rdf
+    assert mini["p50"] == 105 and mini["wait"]["p50"] == 5
+    assert mini["straggler_ratio"] == pytest.approx(260 / 105)
+
+    files = write_report(report, tmp_path / 'report', html_gantt=True)
+    assert [file.suffix for file in files] == ['.json', '.txt', '.html']
+    assert json.loads(files[0].read_text())["n_pods"] == 8
+    assert "mini-snapshot" in files[1].read_text()
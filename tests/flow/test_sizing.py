@@ -0,0 +1,110 @@
+import pytest
+
+from glass.flow.sizing import (
+    calibrate,
+    choose_machine,
+    machine_list,
+    predict_hours,
+    report_timings,
+    step_profiles,
+)
+
+ESTIMATE = {
+    "n_atoms": 3200,
+    "n_runs": 1,
+    "n_steps": 1000000,
+    "n_snapshots": 100,
+    "snapshot_evaluations": 1000,
+    "atom_steps_per_core_second": 2e4
+}
+
+
+def test_calibrate():
+    rate, overhead = 5e4, 60.0
+    timings = [
+        {"n_atoms": n_atoms, "n_steps": n_steps, "cores": cores}
+        for n_atoms, n_steps, cores in [
+            (1000, 10000, 4), (8000, 50000, 16), (200, 1000, 32)
+        ]
+    ]
+    for record in timings:
+        hours = predict_hours(**record, rate=rate, overhead=overhead)
+        record["seconds"] = hours * 3600
+    model = calibrate(timings)
+    assert model["atom_steps_per_core_second"] == pytest.approx(rate)
+    assert model["overhead_seconds"] == pytest.approx(overhead)
+
+    # a single run can not separate the overhead
+    model = calibrate(timings[:1])
+    assert model["overhead_seconds"] == 0.0
+    with pytest.raises(ValueError):
+        calibrate([])
+
+
+def test_choose_machine():
+    machines = machine_list()
+    # small systems do not scale past a few cores
+    small = choose_machine(200, 1000, machines, 2e4)
+    assert small["scass_type"] == "c2_m4_cpu"
+    assert (small["n_procs"], small["n_threads"]) == (2, 1)
+    # a large run takes the fastest machine of the same core-hours
+    large = choose_machine(3200, 1000000, machines, 2e4)
+    assert large["scass_type"] == "c32_m64_cpu"
+    assert large["n_procs"] == 32
+    # with an overhead, a smaller machine is cheaper within the target
+    slow = choose_machine(
+        3200, 10000, machines, 2e4, overhead=600, target_hours=1
+    )
+    assert slow["scass_type"] == "c2_m4_cpu"
+    # none in time, the fastest
+    late = choose_machine(3200, 1e9, machines, 2e4, target_hours=1)
+    assert late["scass_type"] == "c32_m64_cpu"
+    # processes shared by partitions, threads on the cores left
+    parted = choose_machine(500, 1000, machines, 2e4, partitions=2)
+    assert parted["n_procs"] == 4
+    assert parted["n_threads"] == parted["cores"] // 4
+
+
+def test_step_profiles():
+    mdata = {
+        "dispatcher": {"input_data": {
+            "job_type": "container", "scass_type": "c8_m16_cpu"
+        }},
+        "executors": {"mini-snapshot": {
+            "scass_type": "c4_m8_cpu", "n_threads": 2
+        }}
+    }
+    profiles = step_profiles(mdata)
+    assert profiles["run-md"] == {
+        "input_data": {"job_type": "container", "scass_type": "c8_m16_cpu"},
+        "launch": {}
+    }
+    assert profiles["mini-snapshot"]["input_data"]["scass_type"] == "c4_m8_cpu"
+    assert profiles["mini-snapshot"]["launch"] == {"n_threads": 2}
+
+    mdata["auto_sizing"] = {"target_hours": 12}
+    profiles = step_profiles(mdata, ESTIMATE)
+    assert profiles["run-md"]["input_data"] == {
+        "job_type": "container", "scass_type": "c32_m64_cpu"
+    }
+    assert profiles["run-md"]["launch"] == {"n_procs": 32, "n_threads": 1}
+    # the machine of a profile is kept, its launch sized
+    assert profiles["mini-snapshot"]["input_data"]["scass_type"] == "c4_m8_cpu"
+    assert profiles["mini-snapshot"]["launch"] == {
+        "n_procs": 4, "n_threads": 2
+    }
+    assert profiles["rerun-snapshot"]["hours"] == pytest.approx(
+        3200 * 100 / 2e4 / 32 / 3600
+    )
+
+
+def test_report_timings():
+    report = {"steps": [
+        {"base": "run-md-r0", "run": 3600.0, "phase": "Succeeded"},
+        {"base": "run-md-r1", "run": None, "phase": "Running"},
+        {"base": "prep-md-input", "run": 10.0, "phase": "Succeeded"}
+    ]}
+    workloads = {"run-md": {"n_atoms": 3200, "n_steps": 1000000}}
+    assert report_timings(report, workloads, {"run-md": 32}) == [
+        {"n_atoms": 3200, "n_steps": 1000000, "cores": 32, "seconds": 3600.0}
+    ]
@@ -0,0 +1,39 @@
+import json
+import time
+
+import pytest
+
+from glass.flow.transfer import run_concurrently, upload_files
+from glass.flow.upload import LocalStorageClient, UploadRegistry
+
+
+def test_run_concurrently():
+    jobs = [lambda i=i: time.sleep(0.2) or i for i in range(8)]
+    start = time.time()
+    ret = run_concurrently(jobs, max_workers=8, progress=False)
+    assert ret == list(range(8))
+    assert time.time() - start < 1.0
+
+    def fail():
+        raise RuntimeError("lost connection")
+
+    with pytest.raises(RuntimeError):
+        run_concurrently([fail] + jobs[:2], progress=False)
+
+
+def test_upload_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    paths = {}
+    for name in ["structure", "in_lmp", "model"]:
+        paths[name] = tmp_path / name
+        paths[name].write_text(name)
+    paths["in_lmp"] = None
+    client = LocalStorageClient(tmp_path / 'storage')
+    registry = UploadRegistry(tmp_path / 'uploads.json', client)
+
+    artifacts = upload_files(paths, registry.upload, progress=False)
+    assert artifacts["in_lmp"] is None
+    assert client.list(artifacts["model"].key)
+    assert len(json.loads((tmp_path / 'uploads.json').read_text())) == 2
+    again = upload_files(paths, registry.upload, progress=False)
+    assert again["model"].key == artifacts["model"].key
@@ -0,0 +1,41 @@
+import json
+
+from glass.flow.upload import LocalStorageClient, UploadRegistry, content_hash
+
+
+def test_upload_registry(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    model = tmp_path / 'graph.pb'
+    model.write_bytes(b'frozen model')
+    client = LocalStorageClient(tmp_path / 'storage')
+    registry = UploadRegistry(tmp_path / 'uploads.json', client)
+
+    first = registry.upload(model)
+    assert client.list(first.key)
+    # the same content is not uploaded again
+    second = registry.upload(model)
+    assert second.key == first.key
+    assert len(client.list('')) == 1
+    records = json.loads((tmp_path / 'uploads.json').read_text())
+    assert records[content_hash(model)]["key"] == first.key
+
+    # changed content, or a record whose object is gone, is uploaded again
+    model.write_bytes(b'another model')
+    third = registry.upload(model)
+    assert third.key != first.key
+    for key in client.list(third.key):
+        (client.root / key).unlink()
+    assert registry.upload(model).key != third.key
+
+
+def test_content_hash(tmp_path):
+    a, b = tmp_path / 'a', tmp_path / 'b'
+    a.write_text('same')
+    b.write_text('same')
+    assert content_hash(a) != content_hash(b)
+    folder = tmp_path / 'folder'
+    folder.mkdir()
+    (folder / 'x').write_text('x')
+    digest = content_hash(folder)
+    (folder / 'x').write_text('y')
+    assert content_hash(folder) != digest
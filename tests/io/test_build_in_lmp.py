@@ -0,0 +1,127 @@
+import pytest
+
+from glass.io.input import build_in_lmp
+
+
+def test_build_in_lmp_insitu(tmp_path):
+    processes = [{
+        "_idx": 1,
+        "process": "md_run",
+        "params": {
+            "thermo_steps": 100,
+            "traj_file_name": "quench",
+            "ensemble": "nvt",
+            "n_steps": 1000,
+            "ini_t": 300,
+            "final_t": 300,
+            "t_damp": 0.1,
+            "time_step": 1e-3,
+            "dump_freq": 1000,
+            "rdf": {"n_bins": 50, "cutoff": 6.0, "pairs": [["Si", "O"]]},
+            "pe_atom": {"freq": 100},
+            "msd": {"freq": 10}
+        }
+    }]
+    build_in_lmp(
+        processes,
+        "graph.pb",
+        "lmp.data",
+        tmp_path,
+        {"0": "Si", "1": "O"}
+    )
+    lines = [
+        ' '.join(line.split())
+        for line in (tmp_path / 'in.lmp').read_text().splitlines()
+    ]
+    assert 'compute rdf1 all rdf 50 1 2 cutoff 6.0' in lines
+    assert 'fix rdf1 all ave/time 1000 1 1000 c_rdf1[*] file quench.rdf mode vector' in lines
+    assert 'dump pe1 all custom 100 quench.pe_atom id type c_pe1' in lines
+    assert 'fix msd1 all ave/time 10 1 10 c_msd1Si[4] c_msd1O[4] file quench.msd' in lines
+    # analyses are cleaned up after the run
+    run = lines.index('run 1000')
+    assert {'unfix rdf1', 'undump pe1', 'unfix msd1'} < set(lines[run:])
+
+
+def test_build_in_lmp_protocol_partitions(tmp_path):
+    common = {
+        "thermo_steps": 100,
+        "ensemble": "nvt",
+        "t_damp": 0.1,
+        "time_step": 1e-3,
+        "dump_freq": 1000
+    }
+    processes = [
+        {
+            "_idx": 0,
+            "process": "melt",
+            "params": {
+                **common, "traj_file_name": "melt", "temp": 5000, "time": 10
+            }
+        },
+        {
+            "_idx": 1,
+            "process": "quench",
+            "params": {
+                **common,
+                "traj_file_name": "quench",
+                "ini_t": 5000,
+                "stages": [
+                    {"final_t": 2000, "rate": 100},
+                    {"final_t": 300, "rate": 10},
+                    {"final_t": 300, "time": 5}
+                ]
+            }
+        }
+    ]
+    build_in_lmp(
+        processes,
+        "graph.pb",
+        "lmp.data",
+        tmp_path,
+        partitions=[
+            {"seed": 11},
+            {"seed": 12, "processes": {"1": {"stages": [
+                {"final_t": 2000, "rate": 100},
+                {"final_t": 300, "rate": 1},
+                {"final_t": 300, "time": 5}
+            ]}}}
+        ]
+    )
+    lines = [
+        ' '.join(line.split())
+        for line in (tmp_path / 'in.lmp').read_text().splitlines()
+    ]
+    assert 'variable partition world 0 1' in lines
+    assert 'shell cd partition.${partition}' in lines
+    assert 'read_data ../lmp.data' in lines
+    assert 'pair_style deepmd ../graph.pb' in lines
+    # seeds and the steps of the second quench stage differ
+    assert 'variable velocity_1 world 11 12' in lines
+    assert 'velocity all create 5000 ${velocity_1} dist gaussian' in lines
+    assert 'variable run_2 world 170000 1700000' in lines
+    runs = [line for line in lines if line.startswith('run')]
+    assert runs == ['run 10000', 'run 30000', 'run ${run_2}', 'run 5000']
+    assert 'fix 1 all nvt temp 2000 300 0.1' in lines
+    # one dump per process, shared by the stages
+    assert sum(line.startswith('dump Dumpquench') for line in lines) == 1
+
+
+def test_build_in_lmp_insitu_msd_type_map(tmp_path):
+    processes = [{
+        "_idx": 1,
+        "process": "md_run",
+        "params": {
+            "thermo_steps": 100,
+            "traj_file_name": "quench",
+            "ensemble": "nvt",
+            "n_steps": 1000,
+            "ini_t": 300,
+            "final_t": 300,
+            "t_damp": 0.1,
+            "time_step": 1e-3,
+            "dump_freq": 1000,
+            "msd": {"freq": 10}
+        }
+    }]
+    with pytest.raises(ValueError, match="type map"):
+        build_in_lmp(processes, "graph.pb", "lmp.data", tmp_path)
@@ -0,0 +1,53 @@
+import json
+import shutil
+
+import numpy as np
+
+from glass.io.convert import MANIFEST, convert_files
+from glass.io.structure import read_structure
+
+TYPE_MAP = {"0": "Si", "1": "O"}
+MASS_MAP = {"Si": 28.085, "O": 15.999}
+
+
+def test_convert_files(tmp_path, data_path):
+    for i in range(3):
+        folder = tmp_path / 'inputs' / f'task.{i:03d}'
+        folder.mkdir(parents=True)
+        shutil.copy(data_path / 'silica.vasp', folder / 'POSCAR')
+    out_dir = tmp_path / 'outputs'
+
+    ret = convert_files(
+        [str(tmp_path / 'inputs' / 'task.*')], "lmp", TYPE_MAP, MASS_MAP,
+        out_dir=out_dir, n_workers=2, chunk_size=1
+    )
+    assert len(ret["converted"]) == 3 and not ret["failed"]
+    data = out_dir / 'task.000' / 'POSCAR.data'
+    assert data.read_text().splitlines() == \
+        (data_path / 'ref_lmp.data').read_text().splitlines()
+
+    # only the changed input is converted again
+    with open(tmp_path / 'inputs' / 'task.001' / 'POSCAR', 'a') as f:
+        f.write('\n')
+    ret = convert_files(
+        [str(tmp_path / 'inputs' / 'task.*')], "lmp", TYPE_MAP, MASS_MAP,
+        out_dir=out_dir
+    )
+    assert ret["converted"] == [str(out_dir / 'task.001' / 'POSCAR.data')]
+    assert len(ret["skipped"]) == 2
+    assert len(json.loads((out_dir / MANIFEST).read_text())) == 3
+
+
+def test_convert_dump(tmp_path, monkeypatch, write_dump):
+    write_dump(tmp_path / 'md.dump', [{
+        "cell": np.eye(3) * 5,
+        "ids": [2, 1],
+        "atom_types": [1, 0],
+        "coords": [[1.0, 1.0, 1.0], [0, 0, 0]]
+    }])
+    monkeypatch.chdir(tmp_path)
+    ret = convert_files([str(tmp_path)], "poscar", TYPE_MAP)
+    assert ret["converted"] == [str(tmp_path / 'md.dump.vasp')]
+    atoms = read_structure(tmp_path / 'md.dump.vasp')
+    assert atoms.symbols == ["Si", "O"]
+    assert atoms.coords[1].tolist() == [1.0, 1.0, 1.0]
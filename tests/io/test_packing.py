@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from glass.io.input import write_lmp_data
+from glass.io.packing import random_packing, random_packing_structure
+from glass.property.neighbor import find_pairs
+
+
+def test_random_packing_min_distances():
+    min_distances = {"Si-O": 1.5, "O-O": 2.2, "Si-Si": 2.8}
+    cell, coords, species = random_packing(
+        composition="SiO2",
+        density=2.2,
+        min_distances=min_distances,
+        n_formula=200,
+        batch_size=64
+    )
+    species = np.array(species)
+    assert (species == "Si").sum() == 200
+    assert (species == "O").sum() == 400
+    # mass of 200 SiO2 over the volume
+    density = 200 * 60.083 * 1.66053907 / np.linalg.det(cell)
+    assert np.isclose(density, 2.2, rtol=1e-3)
+    i, j, vectors = find_pairs(cell, coords, 2.8)
+    distances = np.linalg.norm(vectors, axis=1)
+    for pair, limit in min_distances.items():
+        a, b = pair.split('-')
+        mask = (species[i] == a) & (species[j] == b)
+        assert np.all(distances[mask] >= limit)
+
+
+def test_random_packing_too_dense():
+    with pytest.raises(ValueError):
+        random_packing(
+            composition={"Si": 64},
+            density=10.0,
+            min_distances={"Si-Si": 3.0},
+            max_trials=10
+        )
+
+
+def test_write_lmp_data(tmp_path, make_single_struc, data_path):
+    types = [
+        0 if site.species_string == "Si" else 1 for site in make_single_struc
+    ]
+    file_path = write_lmp_data(
+        make_single_struc.lattice.matrix,
+        make_single_struc.cart_coords,
+        types,
+        {"0": "Si", "1": "O"},
+        {"Si": 28.085, "O": 15.999},
+        tmp_path
+    )
+    lines = [line.rstrip() for line in file_path.read_text().splitlines()]
+    ref = [
+        line.rstrip()
+        for line in (data_path / 'ref_lmp.data').read_text().splitlines()
+    ]
+    assert lines == ref
+
+    structure = random_packing_structure(
+        composition={"Si": 8, "O": 16},
+        density=2.2,
+        min_distances={"Si-O": 1.5}
+    )
+    assert structure.composition.reduced_formula == "SiO2"
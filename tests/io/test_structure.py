@@ -0,0 +1,51 @@
+import numpy as np
+from pymatgen.io.cif import CifWriter
+
+from glass.io.structure import read_structure
+
+
+def test_read_poscar(tmp_path, make_single_struc, data_path):
+    atoms = read_structure(data_path / 'silica.vasp')
+    assert atoms.elements == ["Si", "O"]
+    assert atoms.symbols == [site.specie.symbol for site in make_single_struc]
+    assert np.allclose(atoms.cell, make_single_struc.lattice.matrix)
+    assert np.allclose(atoms.coords, make_single_struc.cart_coords)
+
+    file_path = atoms.to_lmp_data(
+        {"0": "Si", "1": "O"},
+        {"Si": 28.085, "O": 15.999},
+        tmp_path
+    )
+    assert file_path.read_text().splitlines() == \
+        (data_path / 'ref_lmp.data').read_text().splitlines()
+
+
+def test_read_cif(tmp_path, make_single_struc):
+    filename = tmp_path / 'silica.cif'
+    CifWriter(make_single_struc, symprec=0.1).write_file(filename)
+    assert 'x, y, z' in filename.read_text()
+    atoms = read_structure(filename)
+    assert len(atoms) == len(make_single_struc)
+    assert atoms.to_structure().matches(make_single_struc)
+
+
+def test_read_extxyz(tmp_path, make_single_struc):
+    lattice = ' '.join(
+        f'{x:.10f}' for x in make_single_struc.lattice.matrix.flat
+    )
+    lines = [
+        f'{len(make_single_struc)}\n',
+        f'Lattice="{lattice}" '
+        'Properties=species:S:1:pos:R:3:forces:R:3 pbc="T T T"\n'
+    ]
+    for site in make_single_struc:
+        x, y, z = site.coords
+        lines.append(
+            f'{site.specie.symbol} {x:.10f} {y:.10f} {z:.10f} 0 0 0\n'
+        )
+    filename = tmp_path / 'silica.extxyz'
+    filename.write_text(''.join(lines))
+    atoms = read_structure(filename)
+    assert atoms.symbols == [site.specie.symbol for site in make_single_struc]
+    assert np.allclose(atoms.coords, make_single_struc.cart_coords)
+    assert np.allclose(atoms.atom_types({"0": "O", "1": "Si"})[:3], 1)
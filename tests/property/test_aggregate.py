@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+
+from glass.property.aggregate import (
+    aggregate_csv,
+    aggregate_doas,
+    aggregate_json,
+    mean_stderr,
+)
+
+
+def test_mean_stderr():
+    values = np.array([[1.0, 2.0], [3.0, 2.0], [5.0, 2.0]])
+    mean, stderr = mean_stderr(values)
+    assert np.allclose(mean, [3.0, 2.0])
+    assert np.allclose(stderr, [2.0 / np.sqrt(3), 0.0])
+    mean, stderr = mean_stderr(values[:1])
+    assert np.allclose(stderr, 0.0)
+
+
+def test_aggregate_csv(tmp_path):
+    files = []
+    for i in range(2):
+        file = tmp_path / f'rdf.{i}.csv'
+        file.write_text(f'r,Si-O,O-O\n1.0,{i},1.0\n2.0,{2 * i},3.0\n')
+        files.append(file)
+    ret = aggregate_csv(files, tmp_path / 'replicas_rdf.csv')
+    header = ret.read_text().splitlines()[0]
+    assert header == 'r,Si-O,Si-O_stderr,O-O,O-O_stderr'
+    data = np.loadtxt(ret, delimiter=',', skiprows=1)
+    assert np.allclose(data[:, 0], [1.0, 2.0])
+    assert np.allclose(data[:, 1], [0.5, 1.0])
+    assert np.allclose(data[:, 2], [0.5, 1.0])
+    assert np.allclose(data[:, 4], 0.0)
+
+
+def test_aggregate_json(tmp_path):
+    files = []
+    for i in range(2):
+        file = tmp_path / f'rings.{i}.json'
+        file.write_text(json.dumps({
+            "size": [3, 4, 5],
+            "count": [i, 2 * i, 4],
+            "n_frames": 2,
+            "per_atom": {"Si": 1.0 + i}
+        }))
+        files.append(file)
+    ret = aggregate_json(files, tmp_path / 'replicas.json')
+    ret = json.loads(ret.read_text())
+    assert ret["size"] == [3, 4, 5]
+    assert ret["n_frames"] == 2
+    assert np.allclose(ret["count"]["mean"], [0.5, 1.0, 4.0])
+    assert np.allclose(ret["count"]["stderr"], [0.5, 1.0, 0.0])
+    assert ret["per_atom"]["Si"] == {"mean": 1.5, "stderr": 0.5}
+
+
+def test_aggregate_doas(tmp_path):
+    files = []
+    for i, shift in enumerate([0.0, 1.0]):
+        edges = np.linspace(0, 2, 3) + shift
+        grid = np.linspace(0, 2, 5) + shift
+        file = tmp_path / f'doas.{i}.npz'
+        np.savez(
+            file,
+            Si_edges=edges,
+            Si_density=np.array([0.25, 0.25]),
+            Si_grid=grid,
+            Si_kde=np.full(5, 0.25)
+        )
+        files.append(file)
+    ret = np.load(aggregate_doas(files, tmp_path / 'replicas_doas.npz'))
+    assert np.allclose(ret["Si_edges"], [0.0, 1.0, 2.0, 3.0])
+    assert np.allclose(ret["Si_density"], [0.125, 0.25, 0.125])
+    assert np.allclose(ret["Si_density_stderr"], [0.125, 0.0, 0.125])
+    assert len(ret["Si_kde"]) == 5
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from dflow.python import OPIO
+
+from glass.property import doas_op
+from glass.property.doas_op import DoasConvergeOP
+
+
+@pytest.fixture
+def converge(tmp_path, monkeypatch):
+    waves = []
+    monkeypatch.setattr(
+        doas_op, "collect_energies", lambda *args: waves.pop(0)
+    )
+
+    def run(new, energies=None, wave=0, n_waves=5):
+        waves.append(new)
+        # every wave writes its outputs in its own step
+        work_dir = tmp_path / f"step-{len(list(tmp_path.iterdir()))}"
+        work_dir.mkdir()
+        monkeypatch.chdir(work_dir)
+        op_out = DoasConvergeOP().execute(OPIO({
+            "minimize_dirs": [tmp_path],
+            "energies": energies,
+            "target_element": "Si",
+            "bins": 20,
+            "type_map": {"0": "Si"},
+            "metric": "ks",
+            "tol": 0.05,
+            "wave": wave,
+            "n_waves": n_waves
+        }))
+        op_out["energies"] = work_dir / op_out["energies"]
+        return op_out
+    return run
+
+
+def test_doas_converge(converge):
+    rng = np.random.default_rng(0)
+    first = converge(rng.normal(size=2000))
+    # nothing to compare the first wave with
+    assert not first["converged"] and first["next_wave"] == 1
+    assert first["distance"] == -1.0
+    assert len(np.load(first["energies"])) == 2000
+
+    same = converge(rng.normal(size=2000), first["energies"], wave=1)
+    assert same["converged"] and same["next_wave"] == 2
+    assert 0.0 <= same["distance"] < 0.05
+    assert len(np.load(same["energies"])) == 4000
+
+    shifted = converge(rng.normal(size=2000) + 1.0, first["energies"], wave=1)
+    assert not shifted["converged"] and shifted["next_wave"] == 2
+    assert shifted["distance"] > 0.05
+
+    # the last wave stops the loop even if not converged
+    last = converge(rng.normal(size=2000) + 1.0, first["energies"], wave=4)
+    assert last["converged"] and last["next_wave"] == 5
@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from glass.property.doas import doas_distance
+
+
+def test_doas_distance():
+    rng = np.random.default_rng(0)
+    old = rng.normal(size=2000)
+    new = np.concatenate((old, rng.normal(size=2000)))
+    shifted = old + 1.0
+
+    assert doas_distance(old, old) == 0.0
+    assert doas_distance(old, new) < 0.05
+    assert doas_distance(old, shifted) > 0.3
+    assert doas_distance(old, new, "l1", 20) \
+        < doas_distance(old, shifted, "l1", 20)
+
+    with pytest.raises(NotImplementedError):
+        doas_distance(old, new, "kl")
@@ -0,0 +1,58 @@
+import shutil
+
+import numpy as np
+
+from glass.property.doas import (
+    collect_snapshots,
+    kde_fft,
+    parse_frames,
+    parse_single,
+    plot_doas,
+)
+
+
+def test_collect_snapshots(data_path, tmp_path):
+    folder = tmp_path / 'task.000'
+    folder.mkdir()
+    shutil.copy(data_path / 'dump.atom_energy', folder)
+    type_map = {"0": "Si", "1": "O", "2": "Bi"}
+
+    frames = collect_snapshots([folder], type_map, all_frames=True)
+    assert list(frames.keys()) == ["Si", "O", "Bi"]
+    ref = parse_frames(data_path / 'dump.atom_energy', "Bi", type_map)
+    assert [arr.tolist() for arr in frames["Bi"]] == \
+        [[float(item[2]) for item in frame] for frame in ref]
+
+    minimized = collect_snapshots([folder], type_map, ["Bi"])
+    ref = parse_single(data_path / 'dump.atom_energy', "Bi", type_map)
+    assert minimized["Bi"][0].tolist() == [float(item[2]) for item in ref]
+
+
+def test_kde_fft():
+    rng = np.random.default_rng(0)
+    samples = rng.normal(size=500)
+    grid = np.linspace(-4, 4, 256)
+    bandwidth = 0.3
+    direct = np.exp(
+        -0.5 * ((grid[:, None] - samples[None, :]) / bandwidth) ** 2
+    ).sum(axis=1) / (len(samples) * np.sqrt(2 * np.pi) * bandwidth)
+    assert np.allclose(kde_fft(samples, grid, bandwidth), direct, atol=2e-3)
+    assert abs(kde_fft(samples, grid).sum() * (grid[1] - grid[0]) - 1) < 1e-2
+
+
+def test_plot_doas_multi(data_path, tmp_path, monkeypatch):
+    folder = tmp_path / 'task.000'
+    folder.mkdir()
+    shutil.copy(data_path / 'dump.atom_energy', folder)
+    monkeypatch.chdir(tmp_path)
+    fig, npz, csv = plot_doas(
+        [folder], ["Si", "O"], 20, {"0": "Si", "1": "O", "2": "Bi"},
+        all_frames=True, kde=True
+    )
+    assert fig.exists()
+    data = np.load(npz)
+    assert data["Si_counts"].sum() + data["O_counts"].sum() == 2 * 215
+    assert len(data["O_kde"]) == len(data["O_grid"])
+    rows = csv.read_text().splitlines()
+    assert rows[0] == "snapshot,element,count,mean,std,min,max"
+    assert len(rows) == 1 + 2 * 2
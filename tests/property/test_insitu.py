@@ -0,0 +1,52 @@
+import numpy as np
+
+from glass.property.insitu import (
+    read_ave_time,
+    summarize_insitu,
+    summarize_rdf,
+)
+
+
+def write_rdf(rdf_file):
+    rdf_file.write_text(
+        "# Time-averaged data for fix rdf1\n"
+        "# TimeStep Number-of-rows\n"
+        "# Row c_rdf1[1] c_rdf1[2] c_rdf1[3] c_rdf1[4]\n"
+        "1000 2\n"
+        "1 1.0 0.5 0.1\n"
+        "2 3.0 1.5 0.3\n"
+        "2000 2\n"
+        "1 1.0 1.5 0.3\n"
+        "2 3.0 2.5 0.5\n"
+    )
+
+
+def test_read_ave_time(tmp_path):
+    rdf_file = tmp_path / 'quench.rdf'
+    write_rdf(rdf_file)
+    steps, blocks = read_ave_time(rdf_file, vector=True)
+    assert steps.tolist() == [1000, 2000]
+    assert blocks.shape == (2, 2, 4)
+
+    summary = summarize_rdf(rdf_file, [["Si", "O"]])
+    assert summary["r"] == [1.0, 3.0]
+    assert np.allclose(summary["Si-O"]["g"], [1.0, 2.0])
+    assert np.allclose(summary["Si-O"]["coord"], [0.2, 0.4])
+
+
+def test_summarize_insitu_protocol(tmp_path):
+    write_rdf(tmp_path / 'quench.rdf')
+    processes = [{
+        "_idx": 0,
+        "process": "quench",
+        "params": {
+            "traj_file_name": "quench",
+            "time_step": 0.001,
+            "ini_t": 3000,
+            "stages": [{"final_t": 300, "rate": 1000}],
+            "rdf": {"pairs": [["Si", "O"]]}
+        }
+    }]
+    summary = summarize_insitu(processes, {"0": "Si", "1": "O"}, tmp_path)
+    assert list(summary) == ["quench"]
+    assert np.allclose(summary["quench"]["rdf"]["Si-O"]["g"], [1.0, 2.0])
@@ -0,0 +1,83 @@
+from itertools import product
+
+import numpy as np
+
+from glass.property.local_structure import (
+    compute_local_structure,
+    local_structure_frame,
+    parse_triplets,
+)
+from glass.property.neighbor import NeighborEngine, pair_cutoffs
+
+
+def test_local_structure_silica(make_single_struc):
+    type_map = {"0": "Si", "1": "O"}
+    frame = {
+        "cell": make_single_struc.lattice.matrix,
+        "coords": make_single_struc.cart_coords,
+        "atom_types": np.array([
+            0 if site.species_string == "Si" else 1
+            for site in make_single_struc
+        ])
+    }
+    coord, angle = local_structure_frame(
+        frame,
+        pair_cutoffs(type_map, {"Si-O": 2.0}),
+        parse_triplets(type_map, ["O-Si-O", "Si-O-Si"]),
+        max_coord=6,
+        n_bins=180
+    )
+    assert coord[0].tolist() == [0, 0, 0, 0, 3, 0, 0]
+    assert coord[1].tolist() == [0, 0, 6, 0, 0, 0, 0]
+    # 6 O-Si-O angles per tetrahedron around 109.5, one Si-O-Si per O
+    assert angle[0].sum() == 18
+    assert np.all(np.abs(np.nonzero(angle[0])[0] - 109) < 3)
+    assert angle[1].sum() == 6
+    assert np.all(np.abs(np.nonzero(angle[1])[0] - 145) < 5)
+
+
+def test_local_structure_reused_neighbors(make_single_struc):
+    type_map = {"0": "Si", "1": "O"}
+    rng = np.random.default_rng(0)
+    args = (
+        pair_cutoffs(type_map, {"Si-O": 2.0}),
+        parse_triplets(type_map, ["O-Si-O", "Si-O-Si"]),
+        6,
+        180
+    )
+    engine = NeighborEngine(skin=0.5)
+    for _ in range(3):
+        frame = {
+            "cell": make_single_struc.lattice.matrix,
+            "coords": make_single_struc.cart_coords
+            + rng.normal(scale=0.02, size=(len(make_single_struc), 3)),
+            "atom_types": np.array([
+                0 if site.species_string == "Si" else 1
+                for site in make_single_struc
+            ])
+        }
+        reused = local_structure_frame(frame, *args, engine)
+        for hist, expected in zip(reused, local_structure_frame(frame, *args)):
+            np.testing.assert_array_equal(hist, expected)
+    # thermal displacements stay within the skin
+    assert engine.n_builds == 1
+
+
+def test_compute_local_structure_simple_cubic(tmp_path, write_dump):
+    coords = np.array(list(product(range(4), repeat=3)), dtype=float) * 2.0
+    frame = {
+        "cell": np.eye(3) * 8.0,
+        "atom_types": np.zeros(64, dtype=int),
+        "coords": coords
+    }
+    traj = write_dump(tmp_path / 'cubic.lammpstrj', [frame] * 3)
+    ret = compute_local_structure(
+        traj, {"0": "Si"}, {"Si-Si": 2.1}, ["Si-Si-Si"],
+        max_coord=8, n_bins=18, chunk_size=1, n_workers=2
+    )
+    assert ret["n_frames"] == 3
+    assert ret["coordination"]["Si"]["mean"] == 6.0
+    distribution = np.array(ret["angle"]["Si-Si-Si"]["distribution"])
+    # 12 right angles and 3 straight angles per atom
+    assert np.isclose(distribution[9] * 10, 12 / 15)
+    assert np.isclose(distribution[17] * 10, 3 / 15)
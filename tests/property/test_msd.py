@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from glass.property.msd import compute_msd, diffusion_coefficient, msd_fft
+
+
+def test_msd_fft():
+    rng = np.random.default_rng(0)
+    r = np.cumsum(rng.normal(size=(50, 4, 3)), axis=0)
+    naive = np.array([
+        np.mean(np.square(r[m:] - r[:len(r) - m]).sum(axis=2), axis=0)
+        for m in range(len(r))
+    ])
+    assert np.allclose(msd_fft(r), naive)
+
+
+def test_compute_msd_unwrap(tmp_path, write_dump):
+    # atoms of type 1 drift by 0.5 per frame across the periodic box
+    length = 5.0
+    traj = write_dump(tmp_path / 'drift.lammpstrj', [
+        {
+            "cell": np.eye(3) * length,
+            "atom_types": np.array([0, 1]),
+            "coords": np.array([
+                [(1.0 + 0.5 * step) % length, 1.0, 1.0], [2.0, 2.0, 2.0]
+            ])
+        }
+        for step in range(20)
+    ])
+    msd = compute_msd(traj, {"0": "Si", "1": "O"}, 0.1, chunk_size=1)
+    lag = np.arange(20)
+    assert np.allclose(msd["msd"]["Si"], (0.5 * lag) ** 2)
+    assert np.allclose(msd["msd"]["O"], 0.0)
+    assert np.isclose(msd["time"][-1], 1.9)
+
+
+def test_diffusion_coefficient():
+    time = np.arange(10) * 0.1
+    # msd = 6 D t with D = 1 angstrom^2/ps
+    assert np.isclose(diffusion_coefficient(time, 6 * time), 1e-4)
+    assert np.isclose(diffusion_coefficient(time[:2], 6 * time[:2]), 1e-4)
+    with pytest.raises(ValueError, match="at least 2 frames"):
+        diffusion_coefficient(time[:1], time[:1])
+    with pytest.raises(ValueError, match="at least 2 frames"):
+        diffusion_coefficient(time, time, fit_range=(0.95, 1.0))
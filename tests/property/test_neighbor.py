@@ -0,0 +1,78 @@
+from itertools import product
+
+import numpy as np
+
+from glass.property.neighbor import NeighborEngine, NeighborList
+
+
+def brute_force_pairs(cell, coords, cutoff):
+    pairs = set()
+    for i, j in product(range(len(coords)), repeat=2):
+        for shift in product(range(-3, 4), repeat=3):
+            vector = coords[j] + np.array(shift) @ cell - coords[i]
+            if 1e-8 < np.linalg.norm(vector) < cutoff:
+                pairs.add((i, j, *np.round(vector, 6)))
+    return pairs
+
+
+def nlist_pairs(nlist):
+    return {
+        (i, j, *np.round(v, 6))
+        for i, j, v in zip(nlist.centers, nlist.indices, nlist.vectors)
+    }
+
+
+def test_neighbor_list_triclinic():
+    rng = np.random.default_rng(0)
+    cell = np.array([[5.0, 0.0, 0.0], [1.5, 4.5, 0.0], [0.7, -0.9, 6.0]])
+    # unwrapped coordinates outside the box are allowed
+    coords = rng.random((20, 3)) @ cell * 1.5 - 2.0
+    nlist = NeighborList.build(cell, coords, 4.0)
+    assert nlist_pairs(nlist) == brute_force_pairs(cell, coords, 4.0)
+    assert np.all(np.diff(nlist.indptr) >= 0)
+    assert np.allclose(nlist.distances, np.linalg.norm(nlist.vectors, axis=1))
+    assert nlist_pairs(nlist.within(3.0)) == \
+        brute_force_pairs(cell, coords, 3.0)
+
+
+def test_neighbor_engine_skin_and_cache():
+    rng = np.random.default_rng(1)
+    cell = np.eye(3) * 10.0
+    coords = rng.random((200, 3)) * 10.0
+    engine = NeighborEngine(skin=1.0)
+    first = engine.get(cell, coords, 3.0, key=0)
+    moved = coords + rng.normal(scale=0.1, size=coords.shape)
+    second = engine.get(cell, moved, 3.0, key=1)
+    assert engine.n_builds == 1
+    assert nlist_pairs(second) == nlist_pairs(
+        NeighborList.build(cell, moved, 3.0)
+    )
+
+    assert engine.get(cell, coords, 3.0, key=0) is first
+    assert engine.get(cell, coords, 2.0, key=0).n_pairs < first.n_pairs
+    engine.get(cell, coords + 2.0, 3.0, key=2)
+    assert engine.n_builds == 2
+
+
+def test_neighbor_engine_changing_cell():
+    rng = np.random.default_rng(2)
+    cell = np.array([[10.0, 0.0, 0.0], [0.5, 10.0, 0.0], [0.0, 0.3, 10.0]])
+    frac = rng.random((200, 3))
+    engine = NeighborEngine(skin=1.0)
+    for i in range(4):
+        # box fluctuations of a NPT run, with atoms following the box
+        deformation = np.eye(3) + 0.002 * i * np.array(
+            [[1.0, 0.2, 0.0], [0.0, -0.5, 0.0], [0.0, 0.0, 1.0]]
+        )
+        new_cell = cell @ deformation
+        coords = (frac + rng.normal(scale=0.002, size=frac.shape)) @ new_cell
+        nlist = engine.get(new_cell, coords, 3.0)
+        assert nlist_pairs(nlist) == \
+            nlist_pairs(NeighborList.build(new_cell, coords, 3.0))
+    assert engine.n_builds == 1
+
+    # a strain beyond the skin searches again
+    coords = frac @ (cell * 1.3)
+    assert nlist_pairs(engine.get(cell * 1.3, coords, 3.0)) == \
+        nlist_pairs(NeighborList.build(cell * 1.3, coords, 3.0))
+    assert engine.n_builds == 2
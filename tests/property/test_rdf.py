@@ -0,0 +1,33 @@
+import numpy as np
+
+from glass.property.rdf import compute_rdf
+
+
+def random_frames(n_frames, n_atoms, length, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "cell": np.eye(3) * length,
+            "atom_types": np.arange(n_atoms) % 2,
+            "coords": rng.random((n_atoms, 3)) * length
+        }
+        for _ in range(n_frames)
+    ]
+
+
+def test_compute_rdf_ideal_gas(tmp_path, write_dump):
+    traj = tmp_path / 'gas.lammpstrj'
+    write_dump(traj, random_frames(4, 400, 12.0))
+    type_map = {"0": "Si", "1": "O"}
+    rdf = compute_rdf(traj, type_map, r_max=5.0, n_bins=10, chunk_size=3)
+    assert list(rdf.keys()) == ["r", "total", "Si-Si", "Si-O", "O-O"]
+    assert np.allclose(rdf["total"][4:], 1.0, atol=0.1)
+    assert np.allclose(rdf["Si-O"][4:], 1.0, atol=0.15)
+
+    pooled = compute_rdf(
+        traj, type_map, r_max=5.0, n_bins=10, chunk_size=1, n_workers=2
+    )
+    assert np.allclose(pooled["total"], rdf["total"])
+
+    searched = compute_rdf(traj, type_map, r_max=5.0, n_bins=10, skin=0.0)
+    assert np.allclose(searched["total"], rdf["total"])
@@ -0,0 +1,84 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+
+from glass.property import rings as rings_module
+from glass.property.rings import compute_rings, ring_statistics
+
+
+def simple_cubic_frame(n, a=2.0):
+    coords = np.array(list(product(range(n), repeat=3)), dtype=float) * a
+    return {
+        "cell": np.eye(3) * n * a,
+        "coords": coords,
+        "atom_types": np.zeros(len(coords), dtype=int)
+    }
+
+
+def test_ring_statistics_simple_cubic():
+    # every atom belongs to 12 squares, every square has 4 atoms
+    frame = simple_cubic_frame(4)
+    type_map = {"0": "Si"}
+    cutoffs = {"Si-Si": 2.1}
+    primitive = ring_statistics(frame, type_map, cutoffs, max_size=6)
+    assert primitive.tolist() == [0, 0, 0, 0, 3 * 64, 0, 0]
+
+    king = ring_statistics(
+        frame, type_map, cutoffs, max_size=6, criterion="king",
+        n_workers=2, batch_size=16
+    )
+    assert king[4] == 3 * 64
+    assert king[6] > 0
+
+
+def test_ring_statistics_silica(make_single_struc):
+    frame = {
+        "cell": make_single_struc.lattice.matrix,
+        "coords": make_single_struc.cart_coords,
+        "atom_types": np.array([
+            0 if site.species_string == "Si" else 1
+            for site in make_single_struc
+        ])
+    }
+    rings = ring_statistics(
+        frame, {"0": "Si", "1": "O"}, {"Si-O": 2.0}, max_size=12
+    )
+    # quartz only has 6-membered Si6O6 primitive rings below size 12
+    assert rings[:12].sum() == 0
+    assert rings[12] > 0
+
+
+def test_compute_rings_pooled(tmp_path, write_dump):
+    frame = simple_cubic_frame(3)
+    rng = np.random.default_rng(0)
+    traj = write_dump(tmp_path / 'cubic.lammpstrj', [
+        {
+            **frame,
+            "coords": frame["coords"] + rng.normal(scale=0.05, size=(27, 3))
+        }
+        for _ in range(4)
+    ])
+    args = (traj, {"0": "Si"}, {"Si-Si": 2.5}, 4)
+    serial = compute_rings(*args)
+    assert serial["count"] == [0.0, 3 * 27]
+    assert serial["per_atom"] == [0.0, 3.0]
+    assert compute_rings(*args, chunk_size=1, n_workers=2) == serial
+
+
+def test_compute_rings_single_frame_pool(tmp_path, write_dump, monkeypatch):
+    pools = []
+
+    class Pool(ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(args)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(rings_module, "ProcessPoolExecutor", Pool)
+    traj = write_dump(tmp_path / 'cubic.lammpstrj', [simple_cubic_frame(3)])
+    args = (traj, {"0": "Si"}, {"Si-Si": 2.5}, 4)
+    serial = compute_rings(*args)
+    assert not pools
+    # the source atoms of the single frame are spread over the pool
+    assert compute_rings(*args, n_workers=2, batch_size=8) == serial
+    assert len(pools) == 1
@@ -0,0 +1,66 @@
+from itertools import product
+
+import numpy as np
+
+from glass.property.sq import compute_sq, sq_direct, sq_fourier, total_sq
+
+
+def test_sq_direct_bragg_peak():
+    # simple cubic lattice with a = 2, the first Bragg peak is at |q| = pi
+    coords = np.array(list(product(range(4), repeat=3)), dtype=float) * 2.0
+    frame = {
+        "cell": np.eye(3) * 8.0,
+        "coords": coords,
+        "atom_types": np.zeros(len(coords), dtype=int)
+    }
+    peak = sq_direct(frame, 1, 3.1, 3.2, 1, atom_chunk=10, q_chunk=7)
+    assert np.allclose(peak[0, 0], [len(coords)])
+    below = sq_direct(frame, 1, 0.5, 3.0, 5, atom_chunk=10, q_chunk=7)
+    assert np.allclose(below, 0.0)
+
+
+def test_total_sq_ideal():
+    partial = np.broadcast_to(np.eye(2)[:, :, None], (2, 2, 5))
+    assert np.allclose(total_sq(partial, np.array([0.25, 0.75])), 1.0)
+    assert np.allclose(
+        total_sq(partial, np.array([0.25, 0.75]), np.array([4.1, 5.8])),
+        1.0
+    )
+
+
+def random_frame(n_atoms, length, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "cell": np.eye(3) * length,
+        "coords": rng.random((n_atoms, 3)) * length,
+        "atom_types": np.arange(n_atoms) % 2
+    }
+
+
+def test_sq_fourier_direct():
+    frame = random_frame(800, 20.0)
+    q = np.linspace(6.5, 11.5, 5)
+    fourier = sq_fourier(frame, 2, q, 10.0, 500)
+    direct = sq_direct(frame, 2, 6.0, 12.0, 5, q_per_bin=400)
+    # both tend to the ideal delta_ab at large q
+    assert np.allclose(fourier, direct, atol=0.15)
+    assert np.allclose(fourier, np.eye(2)[:, :, None], atol=0.1)
+
+
+def test_compute_sq(tmp_path, write_dump):
+    traj = write_dump(
+        tmp_path / 'gas.lammpstrj',
+        [random_frame(400, 15.0, seed) for seed in range(3)]
+    )
+    type_map = {"0": "Si", "1": "O"}
+    args = (traj, type_map, "fourier", 6.0, 12.0, 6)
+    sq = compute_sq(*args, r_max=7.0, n_bins=350)
+    assert list(sq.keys()) == ["q", "total", "Si-Si", "Si-O", "O-O"]
+    assert np.allclose(sq["total"], 1.0, atol=0.1)
+    assert np.allclose(sq["Si-O"], 0.0, atol=0.1)
+
+    pooled = compute_sq(
+        *args, chunk_size=1, n_workers=2, r_max=7.0, n_bins=350
+    )
+    for key, value in sq.items():
+        assert np.allclose(pooled[key], value)
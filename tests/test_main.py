@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+import pytest
+
+from glass.main import main
+
+# packages that only the handlers of subcommands may load
+HEAVY_MODULES = ["dflow", "pymatgen", "dpdata", "matplotlib", "tqdm", "scipy"]
+
+
+def imported_modules(code: str) -> dict:
+    """modules imported by `code` with their cumulative import time in us,
+    from `python -X importtime`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True
+    )
+    ret = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        ret[name.strip()] = int(cumulative)
+    return ret
+
+
+def test_import_time():
+    modules = imported_modules("import glass.main")
+    heavy = [
+        name for name in modules
+        if name.split(".")[0] in HEAVY_MODULES
+    ]
+    assert heavy == []
+    # well below the seconds of dflow and pymatgen
+    assert modules["glass.main"] < 500000
+
+
+def test_help(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["glass", "--help"])
+    with pytest.raises(SystemExit):
+        main()
+    assert "convert" in capsys.readouterr().out
@@ -0,0 +1,75 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from glass.io.input import grasp_strucs_from_traj
+from glass.traj.shared import SharedFrames, attach_frames
+from glass.traj.traj import Traj, map_chunks
+
+
+def make_frames(n_frames, n_atoms, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "timestep": i,
+            "cell": np.eye(3) * 10,
+            "atom_types": rng.integers(0, 2, n_atoms),
+            "coords": rng.random((n_atoms, 3)) * 10,
+            "unwrapped": False
+        }
+        for i in range(n_frames)
+    ]
+
+
+def coords_sum(frames):
+    return [
+        float(frame["coords"].sum()) + frame["timestep"] for frame in frames
+    ]
+
+
+def test_shared_frames():
+    frames = make_frames(3, 7)
+    with SharedFrames(frames) as block:
+        shm, shared = attach_frames(block.handle)
+        for frame, view in zip(frames, shared):
+            assert view.keys() == frame.keys()
+            np.testing.assert_array_equal(view["coords"], frame["coords"])
+            assert view["atom_types"].dtype == frame["atom_types"].dtype
+            assert view["timestep"] == frame["timestep"]
+        with pytest.raises(ValueError):
+            shared[0]["coords"][0, 0] = 0.0
+        del shared, view
+        shm.close()
+    assert not os.path.exists(f"/dev/shm/{block.shm.name.lstrip('/')}")
+
+
+def test_map_chunks_shared():
+    chunks = [make_frames(2, 100, seed) for seed in range(6)]
+    expected = [coords_sum(chunk) for chunk in chunks]
+    assert list(map_chunks(coords_sum, chunks, 2, shared=True)) == expected
+
+    # the blocks of the chunks in flight are unlinked on an early stop
+    before = set(os.listdir("/dev/shm"))
+    results = map_chunks(coords_sum, iter(chunks), 2, shared=True)
+    assert next(results) == expected[0]
+    results.close()
+    assert set(os.listdir("/dev/shm")) <= before
+
+
+def test_grasp_strucs_from_traj(tmp_path, monkeypatch, write_dump):
+    traj = write_dump(tmp_path / 'traj.lammpstrj', make_frames(13, 4))
+    monkeypatch.chdir(tmp_path)
+    # 7 selected frames in 4 waves, the third takes the frames 4 and 12
+    paths = grasp_strucs_from_traj(
+        str(traj), 2, {"0": "Si", "1": "O"}, {"Si": 28.08, "O": 16.0},
+        wave=2, wave_size=2, n_workers=2, chunk_size=1
+    )
+    assert paths == [Path('lmp-0'), Path('lmp-1')]
+    frames = list(Traj(str(traj)).iter_frames(8, 4))
+    assert [frame["timestep"] for frame in frames] == [4, 12]
+    for path, frame in zip(paths, frames):
+        lines = (path / 'lmp.data').read_text().splitlines()
+        data = np.loadtxt(lines[lines.index('Atoms # atomic') + 2:])
+        np.testing.assert_allclose(data[:, 2:], frame["coords"], atol=1e-8)